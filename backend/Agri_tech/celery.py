@@ -0,0 +1,27 @@
+"""
+Celery app for Agri_tech (worker + beat for scheduled jobs)
+    
+    celery -A Agri_tech worker -B
+
+Periodic jobs are listed in app.conf.beat_schedule below; each also has
+a management command for running it from cron instead.
+"""
+
+import os
+
+from celery import Celery
+from celery.schedules import crontab
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Agri_tech.settings')
+
+app = Celery('Agri_tech')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
+
+app.conf.beat_schedule = {
+    # After the nightly weather drop (see import_weather)
+    'assess-climate-risk': {
+        'task': 'climate.tasks.assess_climate_risk',
+        'schedule': crontab(hour=4, minute=0),
+    },
+}
@@ -234,3 +234,20 @@ DEFAULT_FROM_EMAIL = 'LIMA <noreply@lima-agro.com>'
 
 # Frontend URL (for password reset links)
 FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:5173')
+
+# ============================================
+# MARKET ANALYTICS CACHE
+# ============================================
+# 'local': per-process LRU (default); 'redis': shared by all workers (needs the redis package)
+MARKET_ANALYTICS_CACHE = {
+    'BACKEND': os.getenv('MARKET_CACHE_BACKEND', 'local'),
+    'LOCATION': os.getenv('MARKET_CACHE_REDIS_URL', 'redis://localhost:6379/1'),
+    'MAX_ENTRIES': int(os.getenv('MARKET_CACHE_MAX_ENTRIES', '2048')),
+    'TIMEOUT': 60 * 60 * 24,
+}
+
+# ============================================
+# CELERY (scheduled jobs, see Agri_tech/celery.py)
+# ============================================
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+CELERY_TIMEZONE = TIME_ZONE
@@ -0,0 +1,179 @@
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Min
+
+from .grid import cell_id
+from .models import ClimateAccumulator, WeatherData
+from .stations import resolve_station
+
+# Growing degree days: daily mean of temp_min/temp_max above this base (°C)
+GDD_BASE_TEMP = 10
+# Same cut-off as the consecutive_dry_days insurance trigger
+DRY_DAY_RAINFALL = 1
+
+TOTAL_FIELDS = ['days', 'rainfall', 'temp_sum', 'gdd', 'dry_days', 'rainy_days']
+OBSERVATION_FIELDS = ['date', 'rainfall', 'temp_avg', 'temp_min', 'temp_max']
+
+
+def _scaled(values, scale):
+    return np.round(np.array(values, dtype=float) * scale).astype(np.int64)
+
+
+def accumulate(observations, previous=None):
+    """
+    Running totals for a date-ordered list of one station's observations
+    
+    - observations: (date, rainfall, temp_avg, temp_min, temp_max) tuples
+    - previous: the station's accumulator row just before the first
+      observation (a dict with TOTAL_FIELDS and dry_spell), or None
+    
+    Sums are carried as integer hundredths (thousandths for GDD) so they
+    stay exact. Returns a list of field dicts, one per observation.
+    """
+    if not observations:
+        return []
+    previous = previous or {}
+    dates, rainfall, temp_avg, temp_min, temp_max = zip(*observations)
+    rainfall, temp_avg = _scaled(rainfall, 100), _scaled(temp_avg, 100)
+    # 1000 * ((max + min) / 2 - base) = 5 * (max + min in hundredths - 200 * base)
+    daily_gdd = np.maximum(5 * (_scaled(temp_max, 100) + _scaled(temp_min, 100) - 200 * GDD_BASE_TEMP), 0)
+    dry = rainfall < DRY_DAY_RAINFALL * 100
+    
+    days = previous.get('days', 0) + np.arange(1, len(dates) + 1)
+    total_rainfall = _scaled([previous.get('rainfall', 0)], 100)[0] + np.cumsum(rainfall)
+    temp_sum = _scaled([previous.get('temp_sum', 0)], 100)[0] + np.cumsum(temp_avg)
+    gdd = _scaled([previous.get('gdd', 0)], 1000)[0] + np.cumsum(daily_gdd)
+    dry_days = previous.get('dry_days', 0) + np.cumsum(dry)
+    rainy_days = previous.get('rainy_days', 0) + np.cumsum(rainfall > 0)
+    
+    # Dry days since the last wet one; a leading dry run continues the previous spell
+    counted = np.cumsum(dry)
+    spell = counted - np.maximum.accumulate(np.where(dry, 0, counted))
+    spell += np.where(np.logical_or.accumulate(~dry), 0, previous.get('dry_spell', 0))
+    
+    return [
+        {
+            'date': day,
+            'days': int(days[i]),
+            'rainfall': Decimal(int(total_rainfall[i])).scaleb(-2),
+            'temp_sum': Decimal(int(temp_sum[i])).scaleb(-2),
+            'gdd': Decimal(int(gdd[i])).scaleb(-3),
+            'dry_days': int(dry_days[i]),
+            'rainy_days': int(rainy_days[i]),
+            'dry_spell': int(spell[i]),
+        }
+        for i, day in enumerate(dates)
+    ]
+
+
+def refresh_station(latitude, longitude, first, weather=WeatherData, accumulators=ClimateAccumulator):
+    """
+    Recompute one station's accumulator rows from `first` onwards
+    
+    Totals carry forward, so every row from the first changed date to the
+    station's latest observation is rewritten; appending new days only
+    touches the new rows. weather/accumulators can be historical models
+    (migrations). Returns the number of rows written.
+    """
+    previous = (
+        accumulators.objects.filter(latitude=latitude, longitude=longitude, date__lt=first)
+        .order_by('-date')
+        .values(*TOTAL_FIELDS, 'dry_spell')
+        .first()
+    )
+    observations = list(
+        weather.objects.filter(
+            latitude=latitude,
+            longitude=longitude,
+            date__gte=first,
+            forecast_date__isnull=True,
+        ).order_by('date').values_list(*OBSERVATION_FIELDS)
+    )
+    cell = cell_id(latitude, longitude)
+    
+    with transaction.atomic():
+        accumulators.objects.filter(latitude=latitude, longitude=longitude, date__gte=first).delete()
+        accumulators.objects.bulk_create(
+            [
+                accumulators(latitude=latitude, longitude=longitude, weather_cell=cell, **row)
+                for row in accumulate(observations, previous)
+            ],
+            batch_size=2000,
+        )
+    return len(observations)
+
+
+def refresh_accumulators(spans):
+    """
+    Bring accumulators up to date after observations were written
+    
+    - spans: {(latitude, longitude): (first_date, last_date)} of the rows
+      written (see climate.ingest.upsert_weather)
+    """
+    for (latitude, longitude), (first, _) in spans.items():
+        refresh_station(latitude, longitude, first)
+
+
+def rebuild_accumulators():
+    """Rebuild every station's accumulators from scratch (initial backfill)"""
+    spans = {
+        (row['latitude'], row['longitude']): (row['first'], None)
+        for row in WeatherData.objects.filter(forecast_date__isnull=True)
+        .order_by().values('latitude', 'longitude').annotate(first=Min('date'))
+    }
+    ClimateAccumulator.objects.all().delete()
+    refresh_accumulators(spans)
+    return len(spans)
+
+
+def station_totals(station, start, end):
+    """
+    Observation totals of a resolve_station() result for start..end (inclusive)
+    
+    Two accumulator lookups: the last row on or before end, minus the last
+    row before start. Returns a dict with days, rainfall, temp_sum, gdd,
+    dry_days, rainy_days, avg_rainfall and avg_temp, or None when the
+    station has no observations in the window.
+    """
+    if station is None:
+        return None
+    _, latitude, longitude = station
+    rows = ClimateAccumulator.objects.filter(latitude=latitude, longitude=longitude).order_by('-date')
+    upper = rows.filter(date__lte=end).values(*TOTAL_FIELDS).first()
+    if upper is None:
+        return None
+    lower = rows.filter(date__lt=start).values(*TOTAL_FIELDS).first() or dict.fromkeys(TOTAL_FIELDS, 0)
+    
+    totals = {field: upper[field] - lower[field] for field in TOTAL_FIELDS}
+    if not totals['days']:
+        return None
+    totals['avg_rainfall'] = totals['rainfall'] / totals['days']
+    totals['avg_temp'] = totals['temp_sum'] / totals['days']
+    return totals
+
+
+def farm_totals(farm, start, end, fallback=False):
+    """station_totals() for the station serving a farm (fallback: see resolve_station)"""
+    station = resolve_station(farm.latitude, farm.longitude, farm.weather_cell, fallback)
+    return station_totals(station, start, end)
+
+
+def longest_dry_spell(station, start, end):
+    """
+    Most consecutive dry observed days within start..end (inclusive)
+    
+    Reads the window's dry_spell column only; a spell already running at
+    start is counted from start.
+    """
+    if station is None:
+        return 0
+    _, latitude, longitude = station
+    spells = ClimateAccumulator.objects.filter(
+        latitude=latitude,
+        longitude=longitude,
+        date__gte=start,
+        date__lte=end,
+    ).order_by('date').values_list('dry_spell', flat=True)
+    return max((min(spell, position) for position, spell in enumerate(spells, start=1)), default=0)
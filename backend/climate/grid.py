@@ -0,0 +1,44 @@
+import numpy as np
+
+# Fixed lat/lon grid of CELL_DEGREES squares. A cell id is
+# row * COLUMNS + column, counting rows north from -90 and columns east
+# from -180, so ids are stable integers that can be indexed and joined.
+CELL_DEGREES = 0.05
+CELLS_PER_DEGREE = 20
+ROWS = 180 * CELLS_PER_DEGREE
+COLUMNS = 360 * CELLS_PER_DEGREE
+
+
+def cell_ids(latitudes, longitudes):
+    """
+    Vectorized cell ids for arrays of coordinates
+    
+    Coordinates are scaled and rounded to 6 places before flooring, so a
+    Decimal on a cell edge (e.g. 0.15) lands in the same cell whether it
+    arrives as a Decimal or as a float.
+    """
+    lat = np.asarray(latitudes, dtype=float)
+    lon = np.asarray(longitudes, dtype=float)
+    rows = np.floor(np.round((lat + 90) * CELLS_PER_DEGREE, 6)).astype(np.int64)
+    columns = np.floor(np.round((lon + 180) * CELLS_PER_DEGREE, 6)).astype(np.int64)
+    return np.clip(rows, 0, ROWS - 1) * COLUMNS + columns % COLUMNS
+
+
+def cell_id(latitude, longitude):
+    """Cell id of one point, or None without coordinates"""
+    if latitude is None or longitude is None:
+        return None
+    return int(cell_ids([float(latitude)], [float(longitude)])[0])
+
+
+def cell_bounds(cell):
+    """(south, west, north, east) of a cell in degrees"""
+    row, column = divmod(int(cell), COLUMNS)
+    south = round(row / CELLS_PER_DEGREE - 90, 6)
+    west = round(column / CELLS_PER_DEGREE - 180, 6)
+    return south, west, round(south + CELL_DEGREES, 6), round(west + CELL_DEGREES, 6)
+
+
+def cell_centre(cell):
+    south, west, north, east = cell_bounds(cell)
+    return (south + north) / 2, (west + east) / 2
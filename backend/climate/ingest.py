@@ -0,0 +1,385 @@
+import re
+from datetime import date, datetime
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+
+from .accumulators import refresh_accumulators
+from .grid import cell_ids
+from .models import WeatherData
+from .station_index import station_index
+
+VALID_CONDITIONS = np.array([choice for choice, _ in WeatherData.CONDITION_CHOICES], dtype=object)
+VALID_SOURCES = np.array([choice for choice, _ in WeatherData.SOURCE_CHOICES], dtype=object)
+
+KEY_FIELDS = ['latitude', 'longitude', 'date', 'forecast_date']
+VALUE_FIELDS = [
+    'location_name', 'temp_min', 'temp_max', 'temp_avg', 'rainfall',
+    'humidity', 'wind_speed', 'condition', 'source', 'weather_cell',
+]
+
+MAX_TEMPERATURE = 100
+MAX_RAINFALL = 99999.99  # max_digits=7, decimal_places=2
+MAX_WIND_SPEED = 999.99  # max_digits=5, decimal_places=2
+DEFAULT_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 100
+
+# YYYY-MM-DD, optionally followed by an ISO time part
+ISO_DATE = re.compile(r'\d{4}-\d{2}-\d{2}(?:[T ]|$)')
+
+
+def _missing(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _is_scalar(value):
+    return isinstance(value, (str, int, float, Decimal)) and not isinstance(value, bool)
+
+
+def _to_float(value):
+    if not _is_scalar(value):
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError, OverflowError):
+        return np.nan
+
+
+def _floats(values):
+    """
+    (float array, bad mask) of a column
+    
+    Missing values become NaN; values that are present but not a finite
+    number (lists, objects, booleans, unparseable text, 'nan', 'inf')
+    become NaN and are flagged in the mask.
+    """
+    floats = None
+    if {type(value) for value in values} <= {int, float, str, type(None)}:
+        # Scalars convert in one pass (None becomes NaN); blanks and bad text fall through
+        try:
+            floats = np.asarray(values, dtype=float)
+        except (ValueError, OverflowError):
+            pass
+    if floats is None:
+        floats = np.array([_to_float(value) for value in values], dtype=float)
+    
+    bad = ~np.isfinite(floats)
+    suspects = np.flatnonzero(bad)
+    if len(suspects):
+        bad[suspects] = [not _missing(values[i]) for i in suspects.tolist()]
+    return np.where(bad, np.nan, floats), bad
+
+
+def _to_date(value):
+    """A date from a date/datetime or a strict YYYY-MM-DD string (an ISO time part is ignored)"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if not isinstance(value, str):
+        return None
+    text = value.strip()
+    if not ISO_DATE.match(text):
+        return None
+    try:
+        return date.fromisoformat(text[:10])
+    except ValueError:
+        return None
+
+
+def _dates(values):
+    """
+    datetime64[D] array of a column; missing and invalid values (numbers included) become NaT
+    
+    Every value is parsed on its own with _to_date, so a row's result never
+    depends on the rest of the batch; repeated strings are parsed once.
+    """
+    parsed = {None: np.datetime64('NaT', 'D')}
+    for value in values:
+        if isinstance(value, str) and value not in parsed:
+            parsed[value] = np.datetime64(_to_date(value), 'D')
+    return np.array(
+        [
+            parsed[value] if value is None or isinstance(value, str) else np.datetime64(_to_date(value), 'D')
+            for value in values
+        ],
+        dtype='datetime64[D]'
+    )
+
+
+def _strings(values, default):
+    """
+    (object array, bad mask) of a text column
+    
+    Missing values take the default; anything else that is not a string
+    is flagged in the mask.
+    """
+    column = np.empty(len(values), dtype=object)
+    bad = np.zeros(len(values), dtype=bool)
+    for i, value in enumerate(values):
+        if _missing(value):
+            column[i] = default
+        elif isinstance(value, str):
+            column[i] = value
+        else:
+            column[i] = default
+            bad[i] = True
+    return column, bad
+
+
+def _decimals(values, places):
+    """Decimals rounded to places, None where NaN"""
+    text = np.char.mod(f'%.{places}f', np.nan_to_num(values))
+    return [None if np.isnan(value) else Decimal(t) for value, t in zip(values, text)]
+
+
+def validate_weather_rows(rows, default_source='manual'):
+    """
+    Validate raw weather rows column-wise
+    
+    Each row is a mapping with latitude (or lat), longitude (or lon),
+    date, forecast_date (empty for observations), temp_min, temp_max and
+    optional temp_avg, rainfall, humidity, wind_speed, condition, source
+    and location_name. Returns (valid, errors) where valid is a list of
+    clean WeatherData field dicts (weather_cell included) and errors is a
+    list of {'row': index, 'error': message}.
+    """
+    n = len(rows)
+    if n == 0:
+        return [], []
+    
+    def column(*names):
+        name, *aliases = names
+        if aliases:
+            return [row.get(name, row.get(aliases[0])) for row in rows]
+        return [row.get(name) for row in rows]
+    
+    # Every column is coerced element by element to a 1-D array of length n;
+    # non-scalar values (lists, objects) are flagged rather than broadcast
+    lats, _ = _floats(column('latitude', 'lat'))
+    lons, _ = _floats(column('longitude', 'lon'))
+    raw_forecast_dates = column('forecast_date')
+    dates = _dates(column('date'))
+    forecast_dates = _dates(raw_forecast_dates)
+    is_forecast = np.array([not _missing(value) for value in raw_forecast_dates], dtype=bool)
+    
+    temp_min, bad_temp_min = _floats(column('temp_min'))
+    temp_max, bad_temp_max = _floats(column('temp_max'))
+    temp_avg, bad_temp_avg = _floats(column('temp_avg'))
+    temp_avg = np.where(np.isnan(temp_avg), (temp_min + temp_max) / 2, temp_avg)
+    rainfall, bad_rainfall = _floats(column('rainfall'))
+    rainfall = np.nan_to_num(rainfall)
+    humidity, bad_humidity = _floats(column('humidity'))
+    humidity = np.round(humidity)
+    wind_speed, bad_wind_speed = _floats(column('wind_speed'))
+    
+    conditions, bad_condition = _strings(column('condition'), 'clear')
+    sources, bad_source = _strings(column('source'), default_source)
+    raw_names = column('location_name')
+    names = [str(value or '')[:255] if _is_scalar(value) or value is None else '' for value in raw_names]
+    bad_name = np.array([not (value is None or _is_scalar(value)) for value in raw_names], dtype=bool)
+    
+    today = np.datetime64(date.today(), 'D')
+    with np.errstate(invalid='ignore'):
+        checks = [
+            ((np.abs(lats) <= 90) & np.isfinite(lats), 'invalid latitude'),
+            ((np.abs(lons) <= 180) & np.isfinite(lons), 'invalid longitude'),
+            (~np.isnat(dates), 'invalid date'),
+            (~is_forecast | ~np.isnat(forecast_dates), 'invalid forecast_date'),
+            (~bad_temp_min & ~bad_temp_max & ~bad_temp_avg, 'temperatures must be numbers'),
+            (~bad_rainfall, 'invalid rainfall'),
+            (~bad_humidity, 'humidity must be 0-100'),
+            (~bad_wind_speed, 'invalid wind_speed'),
+            (~bad_name, 'invalid location_name'),
+            (np.where(is_forecast, True, dates <= today), 'date cannot be in the future'),
+            (np.where(is_forecast, forecast_dates >= dates, True), 'forecast_date cannot be before date'),
+            (
+                np.isfinite(temp_min) & np.isfinite(temp_max) & np.isfinite(temp_avg),
+                'temp_min and temp_max are required'
+            ),
+            (
+                (np.abs(temp_min) <= MAX_TEMPERATURE) & (np.abs(temp_max) <= MAX_TEMPERATURE)
+                & (np.abs(temp_avg) <= MAX_TEMPERATURE),
+                'temperature out of range'
+            ),
+            (temp_min <= temp_max, 'temp_min cannot exceed temp_max'),
+            ((rainfall >= 0) & (rainfall <= MAX_RAINFALL), 'invalid rainfall'),
+            (np.isnan(humidity) | ((humidity >= 0) & (humidity <= 100)), 'humidity must be 0-100'),
+            (np.isnan(wind_speed) | ((wind_speed >= 0) & (wind_speed <= MAX_WIND_SPEED)), 'invalid wind_speed'),
+            (~bad_condition & np.isin(conditions, VALID_CONDITIONS), 'invalid condition'),
+            (~bad_source & np.isin(sources, VALID_SOURCES), 'invalid source'),
+        ]
+    
+    ok = np.ones(n, dtype=bool)
+    errors = []
+    for passed, message in checks:
+        if np.shape(passed) != (n,):
+            raise ValueError(f'{message}: check mask has shape {np.shape(passed)}, expected ({n},)')
+        failed = ok & ~passed
+        errors.extend({'row': int(i), 'error': message} for i in np.flatnonzero(failed))
+        ok &= passed
+    errors.sort(key=lambda error: error['row'])
+    
+    keep = np.flatnonzero(ok)
+    if not len(keep):
+        return [], errors
+    
+    lats, lons = np.round(lats[keep], 8), np.round(lons[keep], 8)
+    cells = cell_ids(lats, lons).tolist()
+    columns = {
+        'latitude': _decimals(lats, 8),
+        'longitude': _decimals(lons, 8),
+        'temp_min': _decimals(temp_min[keep], 2),
+        'temp_max': _decimals(temp_max[keep], 2),
+        'temp_avg': _decimals(temp_avg[keep], 2),
+        'rainfall': _decimals(rainfall[keep], 2),
+        'wind_speed': _decimals(wind_speed[keep], 2),
+    }
+    humidity = [None if np.isnan(value) else int(value) for value in humidity[keep].tolist()]
+    day_list = dates[keep].tolist()
+    forecast_list = [
+        day if forecast else None
+        for day, forecast in zip(forecast_dates[keep].tolist(), is_forecast[keep].tolist())
+    ]
+    
+    valid = [
+        {
+            'latitude': columns['latitude'][j],
+            'longitude': columns['longitude'][j],
+            'location_name': names[i],
+            'date': day_list[j],
+            'forecast_date': forecast_list[j],
+            'temp_min': columns['temp_min'][j],
+            'temp_max': columns['temp_max'][j],
+            'temp_avg': columns['temp_avg'][j],
+            'rainfall': columns['rainfall'][j],
+            'humidity': humidity[j],
+            'wind_speed': columns['wind_speed'][j],
+            'condition': conditions[i],
+            'source': sources[i],
+            'weather_cell': cells[j],
+        }
+        for j, i in enumerate(keep.tolist())
+    ]
+    return valid, errors
+
+
+def _key(row):
+    return row['latitude'], row['longitude'], row['date'], row['forecast_date']
+
+
+def upsert_weather(rows, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Upsert clean weather rows on (latitude, longitude, date, forecast_date)
+    
+    Duplicate keys within the input keep the last occurrence. Each batch
+    runs in its own transaction. Forecasts are written with INSERT ... ON
+    CONFLICT on that key. Observations have a NULL forecast_date, which
+    the unique constraint never treats as a conflict, so existing ones are
+    matched by key first and written with ON CONFLICT on their id.
+    
+    Returns (inserted, updated, touched) where touched maps the
+    (latitude, longitude) of each station with observations written to
+    its (first, last) date.
+    """
+    deduped = {}
+    for row in rows:
+        deduped[_key(row)] = row
+    rows = list(deduped.values())
+    
+    inserted = updated = 0
+    touched = {}
+    
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        dates = [row['date'] for row in batch]
+        
+        with transaction.atomic():
+            existing = dict(
+                ((lat, lon, day, forecast_day), pk)
+                for pk, lat, lon, day, forecast_day in WeatherData.objects.filter(
+                    weather_cell__in={row['weather_cell'] for row in batch},
+                    date__range=(min(dates), max(dates)),
+                ).order_by().values_list('id', *KEY_FIELDS)
+            )
+            
+            forecasts, observations = [], []
+            for row in batch:
+                if row['forecast_date'] is not None:
+                    forecasts.append(WeatherData(**row))
+                else:
+                    observations.append(WeatherData(id=existing.get(_key(row)), **row))
+            
+            WeatherData.objects.bulk_create(
+                forecasts,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=KEY_FIELDS,
+                update_fields=VALUE_FIELDS,
+            )
+            WeatherData.objects.bulk_create(
+                observations,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=['id'],
+                update_fields=VALUE_FIELDS,
+            )
+        
+        replaced = sum(_key(row) in existing for row in batch)
+        updated += replaced
+        inserted += len(batch) - replaced
+        for row in batch:
+            if row['forecast_date'] is None:
+                station, day = (row['latitude'], row['longitude']), row['date']
+                first, last = touched.get(station, (day, day))
+                touched[station] = (min(first, day), max(last, day))
+    
+    return inserted, updated, touched
+
+
+def merge_spans(touched, other):
+    """Widen touched[station] = (first, last) date spans with another mapping"""
+    for station, (first, last) in other.items():
+        if station in touched:
+            current_first, current_last = touched[station]
+            touched[station] = (min(first, current_first), max(last, current_last))
+        else:
+            touched[station] = (first, last)
+    return touched
+
+
+def finalize_ingest(touched):
+    """
+    Post-processing after weather was written
+    
+    - touched: {(latitude, longitude): (first_date, last_date)} of the
+      observations written
+    
+    Bulk upserts bypass WeatherData.save() and its signals, so the
+    climate accumulators are brought forward and the nearest-station
+    index is checked for new stations here, once per load.
+    """
+    refresh_accumulators(touched)
+    station_index.refresh()
+
+
+def ingest_weather(rows, default_source='manual', batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Validate, upsert and post-process a batch of raw weather rows
+    
+    Returns a summary dict with inserted/updated/rejected counts and the
+    first validation errors.
+    """
+    valid, errors = validate_weather_rows(rows, default_source=default_source)
+    inserted, updated, touched = upsert_weather(valid, batch_size=batch_size)
+    
+    finalize_ingest(touched)
+    
+    return {
+        'received': len(rows),
+        'inserted': inserted,
+        'updated': updated,
+        'rejected': len(errors),
+        'errors': errors[:MAX_REPORTED_ERRORS],
+    }
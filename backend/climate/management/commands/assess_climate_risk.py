@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from climate.risk_engine import assess_farms, HISTORY_DAYS, PERIOD_DAYS
+from farms.models import FarmProfile
+import time
+
+
+class Command(BaseCommand):
+    help = "Score climate risk for every farm and store today's ClimateRisk rows (run daily)"
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--history-days', type=int, default=HISTORY_DAYS, help='Days of weather to score')
+        parser.add_argument('--period-days', type=int, default=PERIOD_DAYS, help='Assessment period length')
+        parser.add_argument('--farms', type=int, nargs='+', help='Only these farm profile ids')
+    
+    def handle(self, *args, **options):
+        if options['history_days'] < 1 or options['period_days'] < 0:
+            raise CommandError('--history-days must be at least 1 and --period-days at least 0')
+        
+        farms = FarmProfile.objects.all()
+        if options['farms']:
+            farms = farms.filter(id__in=options['farms'])
+        
+        self.stdout.write(self.style.SUCCESS('Assessing climate risk...'))
+        
+        started = time.monotonic()
+        count = assess_farms(
+            farms,
+            history_days=options['history_days'],
+            period_days=options['period_days'],
+        )
+        elapsed = time.monotonic() - started
+        
+        self.stdout.write(self.style.SUCCESS(f'✓ Scored {count:,} farms in {elapsed:.1f}s'))
@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand, CommandError
+from climate.station_index import KDTree, StationIndex, chord_to_km, to_unit_vectors
+import numpy as np
+import time
+
+
+class Command(BaseCommand):
+    help = 'Benchmark nearest-station lookups through the KD-tree station index'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--lookups', type=int, default=1_000_000, help='Random points to resolve')
+        parser.add_argument('--k', type=int, default=1, help='Nearest stations per point')
+        parser.add_argument(
+            '--synthetic',
+            type=int,
+            default=0,
+            help='Benchmark against N random stations instead of the stations in WeatherData'
+        )
+        parser.add_argument('--single', type=int, default=1000, help='One-at-a-time lookups to time')
+        parser.add_argument('--verify', type=int, default=2000, help='Points checked against brute force')
+        parser.add_argument('--seed', type=int, default=42)
+    
+    def handle(self, *args, **options):
+        if options['lookups'] < 1 or options['k'] < 1:
+            raise CommandError('--lookups and --k must be at least 1')
+        rng = np.random.default_rng(options['seed'])
+        
+        started = time.monotonic()
+        if options['synthetic']:
+            lats = rng.uniform(-35, 15, options['synthetic'])
+            lons = rng.uniform(-20, 50, options['synthetic'])
+            tree = KDTree(to_unit_vectors(lats, lons))
+            source = f'{options["synthetic"]:,} synthetic stations'
+        else:
+            index = StationIndex()
+            stations = index.stations()
+            if not stations:
+                raise CommandError('No weather stations in the database; use --synthetic N')
+            lats = np.array([float(s[0]) for s in stations])
+            lons = np.array([float(s[1]) for s in stations])
+            tree = index.tree()
+            source = f'{len(stations):,} stations from WeatherData'
+        self.stdout.write(f'Built index over {source} in {time.monotonic() - started:.2f}s')
+        
+        # Query points spread over the stations' bounding box
+        count, k = options['lookups'], options['k']
+        query_lats = rng.uniform(lats.min() - 0.5, lats.max() + 0.5, count)
+        query_lons = rng.uniform(lons.min() - 0.5, lons.max() + 0.5, count)
+        queries = to_unit_vectors(query_lats, query_lons)
+        
+        started = time.monotonic()
+        indices, squared = tree.query(queries, k)
+        km = chord_to_km(squared)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Batch: {count:,} lookups (k={k}) in {elapsed:.2f}s '
+            f'({count / elapsed:,.0f}/s, {elapsed / count * 1e6:.2f} µs each)'
+        ))
+        self.stdout.write(f'  median distance to nearest station: {np.median(km[:, 0]):.1f} km')
+        
+        single = min(options['single'], count)
+        if single:
+            started = time.monotonic()
+            for i in range(single):
+                tree.query(queries[i:i + 1], k)
+            elapsed = time.monotonic() - started
+            self.stdout.write(f'Single: {single:,} lookups at {elapsed / single * 1e3:.3f} ms each')
+        
+        sample = min(options['verify'], count)
+        if sample:
+            points = tree.points
+            brute = ((queries[:sample, None, :] - points[None, :, :]) ** 2).sum(axis=2)
+            expected = np.sort(brute, axis=1)[:, :min(k, len(points))]
+            mismatches = int((~np.isclose(squared[:sample], expected, rtol=0, atol=1e-12)).any(axis=1).sum())
+            if mismatches:
+                self.stdout.write(self.style.ERROR(f'✗ {mismatches} of {sample:,} points differ from brute force'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'✓ {sample:,} points match brute force'))
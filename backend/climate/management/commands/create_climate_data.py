@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from climate.models import WeatherData, NDVIData, ClimateRisk, WeatherAlert
+from climate.ingest import ingest_weather
 from farms.models import FarmProfile
 from django.contrib.auth import get_user_model
 from datetime import date, timedelta, datetime
@@ -12,7 +13,7 @@ User = get_user_model()
 
 class Command(BaseCommand):
     help = 'Create dummy climate data for testing'
-
+    
     def handle(self, *args, **kwargs):
         self.stdout.write(self.style.SUCCESS('Creating dummy climate data...'))
         
@@ -29,8 +30,8 @@ class Command(BaseCommand):
         lon = farm.longitude or Decimal('36.0800')
         location = farm.location or 'Nakuru'
         
-        # Create 30 days of historical weather
-        weather_count = 0
+        # 30 days of historical weather and 7 days of forecast, upserted in one batch
+        rows = []
         for i in range(30):
             weather_date = date.today() - timedelta(days=29-i)
             
@@ -38,48 +39,44 @@ class Command(BaseCommand):
             base_temp = 22 + random.uniform(-3, 5)
             rainfall = max(0, random.gauss(5, 10))  # Avg 5mm, can spike
             
-            WeatherData.objects.get_or_create(
-                latitude=lat,
-                longitude=lon,
-                date=weather_date,
-                forecast_date=None,
-                defaults={
-                    'location_name': location,
-                    'temp_min': Decimal(str(round(base_temp - 5, 2))),
-                    'temp_max': Decimal(str(round(base_temp + 8, 2))),
-                    'temp_avg': Decimal(str(round(base_temp, 2))),
-                    'rainfall': Decimal(str(round(rainfall, 2))),
-                    'humidity': random.randint(50, 90),
-                    'wind_speed': Decimal(str(round(random.uniform(5, 25), 2))),
-                    'condition': random.choice(['clear', 'cloudy', 'rainy', 'partly_cloudy']),
-                    'source': 'manual'
-                }
-            )
-            weather_count += 1
+            rows.append({
+                'latitude': lat,
+                'longitude': lon,
+                'date': weather_date,
+                'forecast_date': None,
+                'location_name': location,
+                'temp_min': round(base_temp - 5, 2),
+                'temp_max': round(base_temp + 8, 2),
+                'temp_avg': round(base_temp, 2),
+                'rainfall': round(rainfall, 2),
+                'humidity': random.randint(50, 90),
+                'wind_speed': round(random.uniform(5, 25), 2),
+                'condition': random.choice(['clear', 'cloudy', 'rainy', 'partly_cloudy']),
+                'source': 'manual'
+            })
         
-        # Create 7 days of forecast
         for i in range(1, 8):
             forecast_date = date.today() + timedelta(days=i)
             base_temp = 23 + random.uniform(-2, 4)
             
-            WeatherData.objects.get_or_create(
-                latitude=lat,
-                longitude=lon,
-                date=date.today(),
-                forecast_date=forecast_date,
-                defaults={
-                    'location_name': location,
-                    'temp_min': Decimal(str(round(base_temp - 4, 2))),
-                    'temp_max': Decimal(str(round(base_temp + 7, 2))),
-                    'temp_avg': Decimal(str(round(base_temp, 2))),
-                    'rainfall': Decimal(str(round(max(0, random.gauss(3, 8)), 2))),
-                    'humidity': random.randint(55, 85),
-                    'wind_speed': Decimal(str(round(random.uniform(5, 20), 2))),
-                    'condition': random.choice(['clear', 'cloudy', 'rainy', 'partly_cloudy']),
-                    'source': 'manual'
-                }
-            )
-            weather_count += 1
+            rows.append({
+                'latitude': lat,
+                'longitude': lon,
+                'date': date.today(),
+                'forecast_date': forecast_date,
+                'location_name': location,
+                'temp_min': round(base_temp - 4, 2),
+                'temp_max': round(base_temp + 7, 2),
+                'temp_avg': round(base_temp, 2),
+                'rainfall': round(max(0, random.gauss(3, 8)), 2),
+                'humidity': random.randint(55, 85),
+                'wind_speed': round(random.uniform(5, 20), 2),
+                'condition': random.choice(['clear', 'cloudy', 'rainy', 'partly_cloudy']),
+                'source': 'manual'
+            })
+        
+        result = ingest_weather(rows)
+        weather_count = result['inserted'] + result['updated']
         
         self.stdout.write(self.style.SUCCESS(f'✓ Created {weather_count} weather records'))
         
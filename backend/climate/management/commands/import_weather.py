@@ -0,0 +1,120 @@
+from django.core.management.base import BaseCommand, CommandError
+from climate.ingest import validate_weather_rows, upsert_weather, merge_spans, finalize_ingest
+import csv
+import json
+import os
+import time
+
+
+class Command(BaseCommand):
+    help = 'Bulk upsert a CSV, NDJSON or JSON weather file (observations and forecasts) into WeatherData'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Path to a .csv, .ndjson/.jsonl or .json file')
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'ndjson', 'json'],
+            help='File format (default: detected from the file extension)'
+        )
+        parser.add_argument('--chunk-size', type=int, default=20000, help='Rows per transaction')
+        parser.add_argument('--source', default='manual', help='Source for rows without one')
+    
+    def handle(self, *args, **options):
+        path = options['file']
+        if not os.path.exists(path):
+            raise CommandError(f'File not found: {path}')
+        
+        file_format = options['format'] or self._detect_format(path)
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be at least 1')
+        
+        self.stdout.write(self.style.SUCCESS(f'Importing {path} ({file_format})...'))
+        totals = {'rows': 0, 'inserted': 0, 'updated': 0, 'rejected': 0}
+        touched = {}
+        started = time.monotonic()
+        
+        # Rows are upserted, so an interrupted import can simply be run again
+        for chunk in self._chunks(path, file_format, chunk_size):
+            rows = [row for row in chunk if row is not None]
+            valid, errors = validate_weather_rows(rows, default_source=options['source'])
+            inserted, updated, chunk_touched = upsert_weather(valid, batch_size=chunk_size)
+            
+            totals['rows'] += len(chunk)
+            totals['inserted'] += inserted
+            totals['updated'] += updated
+            totals['rejected'] += len(errors) + (len(chunk) - len(rows))
+            merge_spans(touched, chunk_touched)
+            
+            elapsed = time.monotonic() - started
+            rate = totals['rows'] / elapsed if elapsed > 0 else 0
+            self.stdout.write(
+                f'  {totals["rows"]:,} rows | +{totals["inserted"]:,} new, '
+                f'{totals["updated"]:,} updated, {totals["rejected"]:,} rejected | {rate:,.0f} rows/s'
+            )
+        
+        finalize_ingest(touched)
+        
+        elapsed = time.monotonic() - started
+        rate = totals['rows'] / elapsed if elapsed > 0 else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Imported {totals["rows"]:,} rows in {elapsed:.1f}s ({rate:,.0f} rows/s)'
+        ))
+        self.stdout.write(self.style.SUCCESS(
+            f'  - {totals["inserted"]:,} inserted, {totals["updated"]:,} updated, {totals["rejected"]:,} rejected'
+        ))
+    
+    def _detect_format(self, path):
+        extension = os.path.splitext(path)[1].lower()
+        if extension == '.csv':
+            return 'csv'
+        if extension in ('.ndjson', '.jsonl'):
+            return 'ndjson'
+        if extension == '.json':
+            return 'json'
+        raise CommandError(f'Cannot detect format of {path}. Use --format.')
+    
+    def _rows(self, path, file_format):
+        """Yield rows as dicts; unparseable rows are yielded as None so they are counted as rejected"""
+        if file_format == 'json':
+            with open(path, encoding='utf-8-sig') as handle:
+                try:
+                    payload = json.load(handle)
+                except ValueError as e:
+                    raise CommandError(f'Invalid JSON in {path}: {e}')
+            if isinstance(payload, dict):
+                payload = payload.get('weather')
+            if not isinstance(payload, list):
+                raise CommandError('JSON file must hold a list of rows or {"weather": [...]}')
+            for row in payload:
+                yield row if isinstance(row, dict) else None
+            return
+        
+        with open(path, encoding='utf-8-sig', newline='') as handle:
+            if file_format == 'csv':
+                reader = csv.reader(handle)
+                fieldnames = [name.strip() for name in next(reader, [])]
+                for values in reader:
+                    if not values:
+                        continue
+                    yield dict(zip(fieldnames, values)) if len(values) == len(fieldnames) else None
+                return
+            
+            for line in handle:
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                yield row if isinstance(row, dict) else None
+    
+    def _chunks(self, path, file_format, chunk_size):
+        chunk = []
+        for row in self._rows(path, file_format):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
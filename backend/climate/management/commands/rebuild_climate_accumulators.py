@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from climate.accumulators import rebuild_accumulators
+import time
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the climate accumulators (running weather totals) from daily observations'
+    
+    def handle(self, *args, **kwargs):
+        self.stdout.write(self.style.SUCCESS('Rebuilding climate accumulators...'))
+        
+        started = time.monotonic()
+        stations = rebuild_accumulators()
+        elapsed = time.monotonic() - started
+        
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt accumulators for {stations} stations in {elapsed:.1f}s'))
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:48
+
+from django.db import migrations, models
+
+from climate.grid import cell_ids
+
+
+def assign_weather_cells(apps, schema_editor):
+    """Backfill weather_cell with one UPDATE per distinct station"""
+    WeatherData = apps.get_model('climate', 'WeatherData')
+    stations = list(WeatherData.objects.order_by().values_list('latitude', 'longitude').distinct())
+    if not stations:
+        return
+    cells = cell_ids([lat for lat, _ in stations], [lon for _, lon in stations])
+    for (latitude, longitude), cell in zip(stations, cells.tolist()):
+        WeatherData.objects.filter(latitude=latitude, longitude=longitude).update(weather_cell=cell)
+
+
+class Migration(migrations.Migration):
+    
+    dependencies = [
+        ('climate', '0001_initial'),
+    ]
+    
+    operations = [
+        migrations.AddField(
+            model_name='weatherdata',
+            name='weather_cell',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='weatherdata',
+            index=models.Index(fields=['weather_cell', 'date'], name='weather_dat_weather_60b139_idx'),
+        ),
+        migrations.RunPython(assign_weather_cells, migrations.RunPython.noop),
+    ]
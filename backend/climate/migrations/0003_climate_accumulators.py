@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:14
+
+from django.db import migrations, models
+from django.db.models import Min
+
+from climate.accumulators import refresh_station
+
+
+def build_accumulators(apps, schema_editor):
+    """Backfill running totals for every station with observations"""
+    WeatherData = apps.get_model('climate', 'WeatherData')
+    ClimateAccumulator = apps.get_model('climate', 'ClimateAccumulator')
+    stations = (
+        WeatherData.objects.filter(forecast_date__isnull=True)
+        .order_by().values('latitude', 'longitude').annotate(first=Min('date'))
+    )
+    for station in stations:
+        refresh_station(
+            station['latitude'], station['longitude'], station['first'],
+            weather=WeatherData, accumulators=ClimateAccumulator,
+        )
+
+
+class Migration(migrations.Migration):
+    
+    dependencies = [
+        ('climate', '0002_weather_cells'),
+    ]
+    
+    operations = [
+        migrations.CreateModel(
+            name='ClimateAccumulator',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('latitude', models.DecimalField(decimal_places=8, max_digits=10)),
+                ('longitude', models.DecimalField(decimal_places=8, max_digits=11)),
+                ('weather_cell', models.BigIntegerField(blank=True, null=True)),
+                ('date', models.DateField()),
+                ('days', models.IntegerField(help_text='Observed days')),
+                ('rainfall', models.DecimalField(decimal_places=2, help_text='Rainfall in mm', max_digits=14)),
+                ('temp_sum', models.DecimalField(decimal_places=2, help_text='Sum of daily temp_avg', max_digits=14)),
+                ('gdd', models.DecimalField(decimal_places=3, help_text='Growing degree days', max_digits=14)),
+                ('dry_days', models.IntegerField(help_text='Days with rainfall below 1mm')),
+                ('rainy_days', models.IntegerField(help_text='Days with any rainfall')),
+                ('dry_spell', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'climate_accumulators',
+                'ordering': ['-date'],
+                'unique_together': {('latitude', 'longitude', 'date')},
+            },
+        ),
+        migrations.RunPython(build_accumulators, migrations.RunPython.noop),
+    ]
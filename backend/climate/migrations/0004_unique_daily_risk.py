@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:17
+
+from django.db import migrations
+from django.db.models import Count, Max
+
+
+def drop_duplicate_assessments(apps, schema_editor):
+    """Keep the newest ClimateRisk row per farm and day before adding the constraint"""
+    ClimateRisk = apps.get_model('climate', 'ClimateRisk')
+    duplicates = (
+        ClimateRisk.objects.order_by().values('farm_profile', 'assessment_date')
+        .annotate(rows=Count('id'), keep=Max('id')).filter(rows__gt=1)
+    )
+    for group in duplicates:
+        ClimateRisk.objects.filter(
+            farm_profile=group['farm_profile'],
+            assessment_date=group['assessment_date'],
+        ).exclude(id=group['keep']).delete()
+
+
+class Migration(migrations.Migration):
+    
+    dependencies = [
+        ('climate', '0003_climate_accumulators'),
+        ('farms', '0002_weather_cells'),
+    ]
+    
+    operations = [
+        migrations.RunPython(drop_duplicate_assessments, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='climaterisk',
+            unique_together={('farm_profile', 'assessment_date')},
+        ),
+    ]
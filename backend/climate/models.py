@@ -3,6 +3,8 @@ from django.contrib.auth import get_user_model
 from farms.models import FarmProfile
 from decimal import Decimal
 
+from .grid import cell_id
+
 User = get_user_model()
 
 
@@ -74,6 +76,9 @@ class WeatherData(models.Model):
     ]
     source = models.CharField(max_length=20, choices=SOURCE_CHOICES, default='manual')
     
+    # Grid cell of the coordinates (see climate.grid), set on save
+    weather_cell = models.BigIntegerField(null=True, blank=True, editable=False)
+    
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -84,11 +89,50 @@ class WeatherData(models.Model):
         indexes = [
             models.Index(fields=['date', 'latitude', 'longitude']),
             models.Index(fields=['forecast_date']),
+            models.Index(fields=['weather_cell', 'date']),
         ]
     
     def __str__(self):
         forecast_str = f" (forecast for {self.forecast_date})" if self.forecast_date else ""
         return f"{self.location_name or 'Location'} - {self.date}{forecast_str}"
+    
+    def save(self, *args, **kwargs):
+        """Keep the grid cell in step with the coordinates"""
+        self.weather_cell = cell_id(self.latitude, self.longitude)
+        super().save(*args, **kwargs)
+
+
+class ClimateAccumulator(models.Model):
+    """
+    Running totals of a station's daily observations (prefix sums)
+    
+    Each row holds the totals of every observation up to and including
+    its date, so any window sum or average is the difference of two rows
+    (see climate.accumulators). Maintained on weather ingest.
+    """
+    latitude = models.DecimalField(max_digits=10, decimal_places=8)
+    longitude = models.DecimalField(max_digits=11, decimal_places=8)
+    weather_cell = models.BigIntegerField(null=True, blank=True)
+    date = models.DateField()
+    
+    # Totals from the station's first observation through `date`
+    days = models.IntegerField(help_text="Observed days")
+    rainfall = models.DecimalField(max_digits=14, decimal_places=2, help_text="Rainfall in mm")
+    temp_sum = models.DecimalField(max_digits=14, decimal_places=2, help_text="Sum of daily temp_avg")
+    gdd = models.DecimalField(max_digits=14, decimal_places=3, help_text="Growing degree days")
+    dry_days = models.IntegerField(help_text="Days with rainfall below 1mm")
+    rainy_days = models.IntegerField(help_text="Days with any rainfall")
+    
+    # Consecutive dry observed days ending on `date`
+    dry_spell = models.IntegerField(default=0)
+    
+    class Meta:
+        db_table = 'climate_accumulators'
+        ordering = ['-date']
+        unique_together = ['latitude', 'longitude', 'date']
+    
+    def __str__(self):
+        return f"{self.latitude}, {self.longitude} - totals to {self.date}"
 
 
 class NDVIData(models.Model):
@@ -228,6 +272,7 @@ class ClimateRisk(models.Model):
     class Meta:
         db_table = 'climate_risks'
         ordering = ['-assessment_date']
+        unique_together = ['farm_profile', 'assessment_date']
         indexes = [
             models.Index(fields=['farm_profile', '-assessment_date']),
             models.Index(fields=['overall_risk_level']),
@@ -0,0 +1,243 @@
+from datetime import date, timedelta
+
+import numpy as np
+from django.db import transaction
+
+from farms.models import FarmProfile
+
+from .models import ClimateRisk, WeatherData
+from .station_index import station_index
+
+HISTORY_DAYS = 30
+PERIOD_DAYS = 30
+BATCH_SIZE = 2000
+# Up to this many stations, only their cells' weather is read
+NARROW_SCAN_STATIONS = 500
+
+# Scores used when the farm's station has no observations in the window
+DEFAULT_SCORES = {'drought_risk': 30, 'flood_risk': 20, 'extreme_temp_risk': 25, 'confidence': 30}
+OBSERVED_CONFIDENCE = 75
+
+RISK_FIELDS = [
+    'period_start', 'period_end', 'drought_risk', 'flood_risk', 'extreme_temp_risk',
+    'overall_risk_level', 'recommendations', 'confidence',
+]
+
+
+def drought_scores(avg_rainfall):
+    """Drought risk (0-100) from average daily rainfall over the window"""
+    rain = np.asarray(avg_rainfall, dtype=float)
+    return np.select(
+        [rain < 20, rain < 50],
+        [
+            np.minimum(100, np.trunc(80 + 10 * (30 - rain) / 30)),
+            np.trunc(40 + 40 * (50 - rain) / 30),
+        ],
+        np.maximum(0, np.trunc(40 - 40 * (rain - 50) / 50)),
+    ).astype(int)
+
+
+def flood_scores(avg_rainfall):
+    """Flood risk (0-100) from average daily rainfall over the window"""
+    rain = np.asarray(avg_rainfall, dtype=float)
+    return np.select(
+        [rain > 200, rain > 150],
+        [
+            np.minimum(100, np.trunc(70 + (rain - 200) / 10)),
+            np.trunc(40 + 30 * (rain - 150) / 50),
+        ],
+        np.maximum(0, np.trunc(40 - 40 * (150 - rain) / 150)),
+    ).astype(int)
+
+
+def extreme_temp_scores(avg_temp):
+    """Extreme temperature risk (0-100) from average daily temperature"""
+    temp = np.asarray(avg_temp, dtype=float)
+    return np.select(
+        [temp > 35, temp < 10],
+        [
+            np.minimum(100, np.trunc(60 + (temp - 35) * 5)),
+            np.minimum(100, np.trunc(60 + (10 - temp) * 5)),
+        ],
+        20,
+    ).astype(int)
+
+
+def overall_levels(drought, flood, extreme_temp):
+    """ClimateRisk.overall_risk_level for arrays of scores (bulk writes skip save())"""
+    worst = np.maximum(np.maximum(drought, flood), extreme_temp)
+    return np.select([worst >= 75, worst >= 50, worst >= 25], ['critical', 'high', 'medium'], 'low')
+
+
+def recommendations(drought, flood, extreme_temp):
+    """Mitigation advice for one farm's scores"""
+    advice = []
+    if drought > 50:
+        advice.append("Implement water conservation measures")
+        advice.append("Consider drought-resistant crop varieties")
+    if flood > 50:
+        advice.append("Ensure proper drainage systems")
+        advice.append("Prepare flood mitigation strategies")
+    if extreme_temp > 50:
+        advice.append("Provide crop shade/protection")
+        advice.append("Monitor crops frequently")
+    
+    if not advice:
+        advice.append("Continue normal farming practices")
+        advice.append("Monitor weather conditions regularly")
+    return advice
+
+
+def station_averages(stations, start, end, only=None):
+    """
+    Average daily rainfall and temp_avg per station over start..end
+    
+    - stations: list of (latitude, longitude, cell) as from StationIndex
+    - only: indices of the stations needed; the scan is narrowed to their
+      grid cells when there are few of them
+    
+    One scan of the window's observations, grouped with NumPy. Returns
+    (avg_rainfall, avg_temp, observed) arrays aligned with stations;
+    observed is False where a station has no rows in the window.
+    """
+    position = {(lat, lon): i for i, (lat, lon, _) in enumerate(stations)}
+    window = WeatherData.objects.filter(date__gte=start, date__lte=end, forecast_date__isnull=True)
+    if only is not None and len(only) <= NARROW_SCAN_STATIONS:
+        window = window.filter(weather_cell__in={stations[i][2] for i in only})
+    rows = list(window.order_by().values_list('latitude', 'longitude', 'rainfall', 'temp_avg'))
+    n = len(stations)
+    if not rows:
+        return np.zeros(n), np.zeros(n), np.zeros(n, dtype=bool)
+    
+    latitudes, longitudes, rainfall, temp_avg = zip(*rows)
+    index = np.array([position.get(key, -1) for key in zip(latitudes, longitudes)])
+    known = index >= 0
+    index = index[known]
+    counts = np.bincount(index, minlength=n)
+    rain_sum = np.bincount(index, weights=np.array(rainfall, dtype=float)[known], minlength=n)
+    temp_sum = np.bincount(index, weights=np.array(temp_avg, dtype=float)[known], minlength=n)
+    observed = counts > 0
+    divisor = np.maximum(counts, 1)
+    return rain_sum / divisor, temp_sum / divisor, observed
+
+
+def farm_stations(farms, stations):
+    """
+    Index into stations of the station serving each farm, -1 for none
+    
+    - farms: dict of 'latitude', 'longitude' (floats, NaN when unknown) and
+      'cell' arrays
+    
+    Same choice as resolve_station(..., fallback=True), vectorized: the
+    closest station in the farm's grid cell, else the nearest station
+    anywhere from the KD-tree index.
+    """
+    n = len(farms['cell'])
+    chosen = np.full(n, -1, dtype=np.int64)
+    if not stations or not n:
+        return chosen
+    
+    station_lat = np.array([float(lat) for lat, _, _ in stations])
+    station_lon = np.array([float(lon) for _, lon, _ in stations])
+    station_cell = np.array([-1 if cell is None else cell for _, _, cell in stations], dtype=np.int64)
+    order = np.argsort(station_cell, kind='stable')
+    sorted_cells = station_cell[order]
+    
+    located = ~np.isnan(farms['latitude']) & ~np.isnan(farms['longitude'])
+    cells = np.where(located, farms['cell'], -2)
+    first = np.searchsorted(sorted_cells, cells, side='left')
+    count = np.searchsorted(sorted_cells, cells, side='right') - first
+    
+    # Closest station in the cell; cells rarely hold more than a few
+    best = np.full(n, np.inf)
+    for offset in range(int(count.max(initial=0))):
+        has = count > offset
+        candidate = order[np.minimum(first + offset, len(order) - 1)]
+        distance = (station_lat[candidate] - farms['latitude']) ** 2 + (station_lon[candidate] - farms['longitude']) ** 2
+        closer = has & (distance < best)
+        best[closer] = distance[closer]
+        chosen[closer] = candidate[closer]
+    
+    outside = located & (count == 0)
+    if outside.any():
+        nearest, _ = station_index.query(farms['latitude'][outside], farms['longitude'][outside], k=1)
+        chosen[outside] = nearest[:, 0]
+    return chosen
+
+
+def assess_farms(farms=None, today=None, history_days=HISTORY_DAYS, period_days=PERIOD_DAYS):
+    """
+    Score climate risk for farms and upsert today's ClimateRisk rows
+    
+    - farms: FarmProfile queryset (default: every farm)
+    
+    Loads the last history_days of observations once, scores every
+    station at once with the same piecewise rules the risk assessment
+    has always used, and writes one row per farm for today with bulk
+    INSERT ... ON CONFLICT (farm_profile, assessment_date). Returns the
+    number of farms scored.
+    """
+    today = today or date.today()
+    farms = FarmProfile.objects.all() if farms is None else farms
+    rows = list(farms.order_by('id').values_list('id', 'latitude', 'longitude', 'weather_cell'))
+    if not rows:
+        return 0
+    
+    farm_ids, latitudes, longitudes, cells = zip(*rows)
+    farm_arrays = {
+        'latitude': np.array([np.nan if value is None else float(value) for value in latitudes]),
+        'longitude': np.array([np.nan if value is None else float(value) for value in longitudes]),
+        'cell': np.array([-1 if value is None else value for value in cells], dtype=np.int64),
+    }
+    
+    stations = station_index.stations()
+    served = farm_stations(farm_arrays, stations)
+    avg_rainfall, avg_temp, observed = station_averages(
+        stations, today - timedelta(days=history_days), today, only=np.unique(served[served >= 0]),
+    )
+    
+    # Score each station once, then fan out to its farms
+    station_scores = {
+        'drought_risk': drought_scores(avg_rainfall),
+        'flood_risk': flood_scores(avg_rainfall),
+        'extreme_temp_risk': extreme_temp_scores(avg_temp),
+    }
+    has_data = served >= 0
+    has_data[has_data] = observed[served[has_data]]
+    scores = {field: np.full(len(rows), DEFAULT_SCORES[field]) for field in station_scores}
+    for field, values in station_scores.items():
+        scores[field][has_data] = values[served[has_data]]
+    confidence = np.where(has_data, OBSERVED_CONFIDENCE, DEFAULT_SCORES['confidence'])
+    levels = overall_levels(scores['drought_risk'], scores['flood_risk'], scores['extreme_temp_risk'])
+    
+    advice = {}
+    risks = []
+    for i, farm_id in enumerate(farm_ids):
+        drought, flood, extreme_temp = (
+            int(scores['drought_risk'][i]), int(scores['flood_risk'][i]), int(scores['extreme_temp_risk'][i])
+        )
+        key = (drought > 50, flood > 50, extreme_temp > 50)
+        if key not in advice:
+            advice[key] = '\n'.join(recommendations(drought, flood, extreme_temp))
+        risks.append(ClimateRisk(
+            farm_profile_id=farm_id,
+            assessment_date=today,
+            period_start=today,
+            period_end=today + timedelta(days=period_days),
+            drought_risk=drought,
+            flood_risk=flood,
+            extreme_temp_risk=extreme_temp,
+            overall_risk_level=levels[i],
+            recommendations=advice[key],
+            confidence=int(confidence[i]),
+        ))
+    
+    for start in range(0, len(risks), BATCH_SIZE):
+        with transaction.atomic():
+            ClimateRisk.objects.bulk_create(
+                risks[start:start + BATCH_SIZE],
+                update_conflicts=True,
+                unique_fields=['farm_profile', 'assessment_date'],
+                update_fields=RISK_FIELDS,
+            )
+    return len(risks)
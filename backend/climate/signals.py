@@ -0,0 +1,21 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import WeatherData
+from .station_index import station_index
+from .accumulators import refresh_station
+
+
+@receiver(post_save, sender=WeatherData)
+def sync_station_index(sender, instance, created, **kwargs):
+    """A row from a new station makes the nearest-station tree stale"""
+    if created:
+        station_index.notice(instance.latitude, instance.longitude)
+
+
+@receiver(post_save, sender=WeatherData)
+@receiver(post_delete, sender=WeatherData)
+def sync_climate_accumulators(sender, instance, **kwargs):
+    """Running totals from this observation's date onwards are stale"""
+    if instance.forecast_date is None:
+        refresh_station(instance.latitude, instance.longitude, instance.date)
@@ -0,0 +1,309 @@
+from decimal import Decimal
+import threading
+import time
+
+import numpy as np
+from django.db.models import Max
+
+from .models import WeatherData
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Padding coordinate for short leaves: farther than any point on the unit sphere
+_FAR = 1e3
+
+
+def to_unit_vectors(latitudes, longitudes):
+    """(n, 3) points on the unit sphere; chord length orders like great-circle distance"""
+    lat = np.radians(np.asarray(latitudes, dtype=float))
+    lon = np.radians(np.asarray(longitudes, dtype=float))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def chord_to_km(squared_chord):
+    chord = np.sqrt(np.maximum(squared_chord, 0))
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chord / 2, 1.0))
+
+
+class KDTree:
+    """
+    Static KD-tree over 3-D points with batched k-nearest queries
+    
+    Nodes split on their widest axis at the median; leaves hold at most
+    leaf_size points, stored padded in one (leaves, leaf_size, 3) array,
+    and every node keeps its bounding box. A batch of queries first
+    descends to its home leaves together and takes the k-th distance over
+    enough neighbouring leaves to hold k points as a search radius, then
+    walks the tree level by level as an array of (query, node) pairs,
+    dropping every pair whose box lies outside the radius. The leaves
+    left over are ranked per query. Each step is a NumPy operation over
+    the whole batch.
+    """
+    
+    def __init__(self, points, leaf_size=16):
+        self.points = np.asarray(points, dtype=float).reshape(-1, 3)
+        self.leaf_size = leaf_size
+        self._left, self._right, self._split_dim, self._split_value = [], [], [], []
+        self._leaf_of, self._box_min, self._box_max = [], [], []
+        leaves = []
+        if len(self.points):
+            self._build(np.arange(len(self.points)), leaves)
+        
+        count = len(leaves)
+        self.leaf_index = np.full((count, leaf_size), -1, dtype=np.int64)
+        self.leaf_points = np.full((count, leaf_size, 3), _FAR)
+        for leaf, members in enumerate(leaves):
+            self.leaf_index[leaf, :len(members)] = members
+            self.leaf_points[leaf, :len(members)] = self.points[members]
+        self._left = np.array(self._left, dtype=np.int64)
+        self._right = np.array(self._right, dtype=np.int64)
+        self._split_dim = np.array(self._split_dim, dtype=np.int64)
+        self._split_value = np.array(self._split_value)
+        self._leaf_of = np.array(self._leaf_of, dtype=np.int64)
+        self._box_min = np.array(self._box_min).reshape(-1, 3)
+        self._box_max = np.array(self._box_max).reshape(-1, 3)
+    
+    def __len__(self):
+        return len(self.points)
+    
+    def _build(self, members, leaves):
+        """Append the subtree for members; returns its node id (root is 0)"""
+        subset = self.points[members]
+        node = len(self._left)
+        self._box_min.append(subset.min(axis=0))
+        self._box_max.append(subset.max(axis=0))
+        self._left.append(-1)
+        self._right.append(-1)
+        self._split_dim.append(0)
+        self._split_value.append(0.0)
+        self._leaf_of.append(-1)
+        
+        if len(members) <= self.leaf_size:
+            self._leaf_of[node] = len(leaves)
+            leaves.append(members)
+            return node
+        
+        dim = int(np.argmax(self._box_max[node] - self._box_min[node]))
+        order = members[np.argsort(subset[:, dim], kind='stable')]
+        middle = len(order) // 2
+        self._split_dim[node] = dim
+        self._split_value[node] = self.points[order[middle - 1], dim]
+        self._left[node] = self._build(order[:middle], leaves)
+        self._right[node] = self._build(order[middle:], leaves)
+        return node
+    
+    def _home_leaves(self, queries):
+        node = np.zeros(len(queries), dtype=np.int64)
+        internal = self._left[node] >= 0
+        while internal.any():
+            current = node[internal]
+            go_left = queries[internal, self._split_dim[current]] <= self._split_value[current]
+            node[internal] = np.where(go_left, self._left[current], self._right[current])
+            internal = self._left[node] >= 0
+        return self._leaf_of[node]
+    
+    def _box_distance(self, nodes, points):
+        gap = np.maximum(np.maximum(self._box_min[nodes] - points, points - self._box_max[nodes]), 0)
+        return (gap ** 2).sum(axis=1)
+    
+    def query(self, queries, k=1, chunk_size=100_000):
+        """
+        k nearest points for each query
+        
+        Returns (indices, squared_distances), both (len(queries), k) and
+        sorted nearest first. k is capped at the number of points.
+        """
+        queries = np.asarray(queries, dtype=float).reshape(-1, 3)
+        k = min(k, len(self.points))
+        if not k:
+            raise ValueError('KDTree is empty')
+        
+        indices = np.empty((len(queries), k), dtype=np.int64)
+        distances = np.empty((len(queries), k))
+        for start in range(0, len(queries), chunk_size):
+            stop = start + chunk_size
+            indices[start:stop], distances[start:stop] = self._query_chunk(queries[start:stop], k)
+        return indices, distances
+    
+    def _seed_radius(self, queries, k):
+        """
+        Squared distance to the k-th nearest point among each query's home
+        leaf and its neighbours in leaf order, an upper bound on the answer
+        
+        Median splits leave at least (leaf_size + 1) // 2 points in every
+        leaf of a tree with more than one, so that many leaves hold k points.
+        """
+        leaf_count = len(self.leaf_index)
+        min_fill = (self.leaf_size + 1) // 2 if leaf_count > 1 else len(self.points)
+        width = min(-(-k // min_fill), leaf_count)
+        first = np.clip(self._home_leaves(queries) - width // 2, 0, leaf_count - width)
+        distances = np.concatenate([
+            ((self.leaf_points[first + offset] - queries[:, None, :]) ** 2).sum(axis=2)
+            for offset in range(width)
+        ], axis=1)
+        return np.partition(distances, k - 1, axis=1)[:, k - 1]
+    
+    def _query_chunk(self, queries, k):
+        n = len(queries)
+        radius = self._seed_radius(queries, k)
+        
+        # Level-by-level walk over the (query, node) pairs within the radius
+        owners, nodes = np.arange(n), np.zeros(n, dtype=np.int64)
+        leaf_owners, leaf_ids = [], []
+        while len(nodes):
+            at_leaf = self._left[nodes] < 0
+            leaf_owners.append(owners[at_leaf])
+            leaf_ids.append(self._leaf_of[nodes[at_leaf]])
+            owners, nodes = owners[~at_leaf], nodes[~at_leaf]
+            owners = np.concatenate([owners, owners])
+            nodes = np.concatenate([self._left[nodes], self._right[nodes]])
+            near = self._box_distance(nodes, queries[owners]) <= radius[owners]
+            owners, nodes = owners[near], nodes[near]
+        owners, leaves = np.concatenate(leaf_owners), np.concatenate(leaf_ids)
+        
+        candidate_distances = ((self.leaf_points[leaves] - queries[owners, None, :]) ** 2).sum(axis=2)
+        candidate_ids = self.leaf_index[leaves]
+        if k < self.leaf_size:
+            # Only a leaf's own k nearest can make a query's overall k nearest
+            best = np.argpartition(candidate_distances, k - 1, axis=1)[:, :k]
+            candidate_distances = np.take_along_axis(candidate_distances, best, axis=1)
+            candidate_ids = np.take_along_axis(candidate_ids, best, axis=1)
+        width = candidate_ids.shape[1]
+        candidate_distances, candidate_ids = candidate_distances.ravel(), candidate_ids.ravel()
+        owners = np.repeat(owners, width)
+        real = candidate_ids >= 0
+        owners, candidate_ids, candidate_distances = owners[real], candidate_ids[real], candidate_distances[real]
+        
+        order = np.lexsort((candidate_distances, owners))
+        owners = owners[order]
+        first = np.searchsorted(owners, np.arange(n))
+        keep = np.arange(len(owners)) - first[owners] < k
+        return (
+            candidate_ids[order][keep].reshape(n, k),
+            candidate_distances[order][keep].reshape(n, k),
+        )
+
+
+class StationIndex:
+    """
+    Process-local KD-tree over the distinct WeatherData station coordinates
+    
+    Built lazily on first use. At most every refresh_seconds the newest
+    WeatherData id is compared with the one seen at build time, and only
+    if rows added since then come from unknown coordinates is the tree
+    rebuilt. Code that just wrote weather can call refresh() to check
+    straight away, or invalidate() to force a rebuild.
+    """
+    
+    def __init__(self, leaf_size=16, refresh_seconds=300):
+        self.leaf_size = leaf_size
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+        self._tree = None
+        self._stations = None
+        self._known = set()
+        self._last_id = 0
+        self._checked_at = 0.0
+    
+    def _build(self):
+        last_id = WeatherData.objects.aggregate(last=Max('id'))['last'] or 0
+        rows = list(
+            WeatherData.objects.order_by()
+            .values_list('latitude', 'longitude', 'weather_cell')
+            .distinct()
+        )
+        self._stations = rows
+        self._known = {(lat, lon) for lat, lon, _ in rows}
+        self._tree = KDTree(
+            to_unit_vectors([row[0] for row in rows], [row[1] for row in rows]).reshape(len(rows), 3),
+            leaf_size=self.leaf_size,
+        )
+        self._last_id = last_id
+        self._checked_at = time.monotonic()
+    
+    def _ensure_current(self):
+        with self._lock:
+            if self._tree is None:
+                self._build()
+            elif time.monotonic() - self._checked_at >= self.refresh_seconds:
+                self.refresh()
+            return self._tree, self._stations
+    
+    def refresh(self):
+        """Rebuild if weather rows written since the last check came from new stations"""
+        with self._lock:
+            if self._tree is None:
+                self._build()
+                return True
+            new = set(
+                WeatherData.objects.filter(id__gt=self._last_id)
+                .order_by()
+                .values_list('latitude', 'longitude')
+                .distinct()
+            )
+            self._checked_at = time.monotonic()
+            if new - self._known:
+                self._build()
+                return True
+            self._last_id = WeatherData.objects.aggregate(last=Max('id'))['last'] or self._last_id
+            return False
+    
+    def invalidate(self):
+        with self._lock:
+            self._tree = None
+    
+    def notice(self, latitude, longitude):
+        """A row was saved at these coordinates; rebuild on next use if they are new"""
+        key = (Decimal(str(latitude)), Decimal(str(longitude)))
+        with self._lock:
+            if self._tree is not None and key not in self._known:
+                self._tree = None
+    
+    def query(self, latitudes, longitudes, k=1):
+        """
+        k nearest stations for arrays of points
+        
+        Returns (indices, km), each (n, k) and nearest first: indices
+        into stations(), km the great-circle distances.
+        """
+        tree, _ = self._ensure_current()
+        if not len(tree):
+            n = np.size(latitudes)
+            return np.empty((n, 0), dtype=np.int64), np.empty((n, 0))
+        indices, squared = tree.query(to_unit_vectors(latitudes, longitudes).reshape(-1, 3), k)
+        return indices, chord_to_km(squared)
+    
+    def stations(self):
+        """Indexed (latitude, longitude, cell) tuples, in KD-tree point order"""
+        return self._ensure_current()[1]
+    
+    def tree(self):
+        return self._ensure_current()[0]
+    
+    def idw_weights(self, latitudes, longitudes, k=4, power=2):
+        """
+        Inverse-distance weights over the k nearest stations
+        
+        Returns (indices, weights), each (n, k), with rows of weights
+        summing to 1. A station within a metre takes all the weight.
+        """
+        indices, km = self.query(latitudes, longitudes, k)
+        weights = 1.0 / np.maximum(km, 1e-3) ** power
+        weights /= weights.sum(axis=1, keepdims=True)
+        return indices, weights
+    
+    def interpolate(self, latitudes, longitudes, station_values, k=4, power=2):
+        """IDW estimate at each point from one value per station (aligned with stations())"""
+        indices, weights = self.idw_weights(latitudes, longitudes, k, power)
+        return (np.asarray(station_values, dtype=float)[indices] * weights).sum(axis=1)
+    
+    def closest_station(self, latitude, longitude):
+        """(latitude, longitude, cell, km) of the nearest station, or None without stations"""
+        indices, km = self.query([float(latitude)], [float(longitude)], 1)
+        if not indices.size:
+            return None
+        return (*self._stations[indices[0, 0]], float(km[0, 0]))
+
+
+station_index = StationIndex()
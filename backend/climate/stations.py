@@ -0,0 +1,57 @@
+from .grid import cell_id
+from .models import WeatherData
+from .station_index import station_index
+
+
+def cell_stations(cell):
+    """Distinct (latitude, longitude) of the stations reporting in a grid cell"""
+    return list(
+        WeatherData.objects.filter(weather_cell=cell)
+        .order_by()
+        .values_list('latitude', 'longitude')
+        .distinct()
+    )
+
+
+def resolve_station(latitude, longitude, cell=None, fallback=False):
+    """
+    Station serving a point: the closest station in the point's grid cell
+    
+    Returns (cell, latitude, longitude) of the station, or None when the
+    cell has no weather. Pass cell when it is already known (farms). With
+    fallback, a point whose cell has no station is served by the nearest
+    station anywhere, found through the KD-tree station index.
+    """
+    if latitude is None or longitude is None:
+        return None
+    if cell is None:
+        cell = cell_id(latitude, longitude)
+    stations = cell_stations(cell)
+    if not stations:
+        if not fallback:
+            return None
+        nearest = station_index.closest_station(latitude, longitude)
+        if nearest is None:
+            return None
+        station_lat, station_lon, station_cell, _ = nearest
+        return station_cell, station_lat, station_lon
+    lat, lon = float(latitude), float(longitude)
+    station = min(stations, key=lambda s: (float(s[0]) - lat) ** 2 + (float(s[1]) - lon) ** 2)
+    return cell, station[0], station[1]
+
+
+def station_weather(station):
+    """WeatherData for a resolve_station() result (empty queryset for None)"""
+    if station is None:
+        return WeatherData.objects.none()
+    cell, latitude, longitude = station
+    return WeatherData.objects.filter(weather_cell=cell, latitude=latitude, longitude=longitude)
+
+
+def location_weather(latitude, longitude, cell=None, fallback=False):
+    return station_weather(resolve_station(latitude, longitude, cell, fallback))
+
+
+def farm_weather(farm, fallback=False):
+    """WeatherData of the station serving a farm, looked up through its grid cell"""
+    return location_weather(farm.latitude, farm.longitude, farm.weather_cell, fallback)
@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from .risk_engine import assess_farms
+
+
+@shared_task
+def assess_climate_risk():
+    """Daily fleet-wide climate risk scoring (scheduled in Agri_tech/celery.py)"""
+    return assess_farms()
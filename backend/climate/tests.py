@@ -1,3 +1,351 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import product
 
-# Create your tests here.
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from farms.models import FarmProfile
+
+from .accumulators import (
+    DRY_DAY_RAINFALL, GDD_BASE_TEMP, TOTAL_FIELDS,
+    farm_totals, longest_dry_spell, rebuild_accumulators, station_totals,
+)
+from .ingest import ingest_weather, validate_weather_rows
+from .models import ClimateAccumulator, ClimateRisk, WeatherData
+from .risk_engine import (
+    assess_farms, drought_scores, extreme_temp_scores, flood_scores,
+    overall_levels, recommendations,
+)
+from .station_index import KDTree, station_index, to_unit_vectors
+from .stations import resolve_station
+
+
+class KDTreeTests(SimpleTestCase):
+    """KDTree.query against a brute-force scan of every point"""
+    
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.points = to_unit_vectors(rng.uniform(-5, 5, 2000), rng.uniform(33, 42, 2000))
+        self.queries = to_unit_vectors(rng.uniform(-6, 6, 300), rng.uniform(32, 43, 300))
+    
+    def assert_matches_brute_force(self, tree, k):
+        indices, distances = tree.query(self.queries, k)
+        squared = ((self.queries[:, None, :] - tree.points[None, :, :]) ** 2).sum(axis=2)
+        expected = np.sort(squared, axis=1)[:, :k]
+        
+        self.assertEqual(indices.shape, (len(self.queries), k))
+        np.testing.assert_allclose(distances, expected)
+        np.testing.assert_allclose(np.take_along_axis(squared, indices, axis=1), expected)
+    
+    def test_k_within_leaf_size(self):
+        tree = KDTree(self.points, leaf_size=16)
+        for k in (1, 4, 16):
+            self.assert_matches_brute_force(tree, k)
+    
+    def test_k_above_leaf_size(self):
+        tree = KDTree(self.points, leaf_size=16)
+        for k in (17, 20, 50):
+            self.assert_matches_brute_force(tree, k)
+    
+    def test_k_above_point_count_is_capped(self):
+        tree = KDTree(self.points[:10], leaf_size=4)
+        indices, _ = tree.query(self.queries, 25)
+        self.assertEqual(indices.shape, (len(self.queries), 10))
+        self.assertTrue((np.sort(indices, axis=1) == np.arange(10)).all())
+
+
+class ValidateWeatherRowsTests(SimpleTestCase):
+    """Per-row errors from validate_weather_rows, independent of the rest of the batch"""
+    
+    base = {'latitude': -1.2, 'longitude': 36.8, 'date': '2024-01-02', 'temp_min': 10, 'temp_max': 20}
+    
+    def errors_for(self, **fields):
+        _, errors = validate_weather_rows([dict(self.base, **fields)])
+        return [error['error'] for error in errors]
+    
+    def test_valid_row(self):
+        valid, errors = validate_weather_rows([dict(self.base, rainfall='2.5', humidity='55')])
+        self.assertEqual(errors, [])
+        self.assertEqual(valid[0]['date'], date(2024, 1, 2))
+        self.assertEqual(valid[0]['rainfall'], Decimal('2.50'))
+        self.assertEqual(valid[0]['humidity'], 55)
+        self.assertEqual(valid[0]['temp_avg'], Decimal('15.00'))
+    
+    def test_non_scalar_values_are_row_errors(self):
+        self.assertEqual(self.errors_for(latitude=[1, 2], longitude=[3, 4]), ['invalid latitude'])
+        self.assertEqual(self.errors_for(condition=['x']), ['invalid condition'])
+        self.assertEqual(self.errors_for(source=['api']), ['invalid source'])
+        self.assertEqual(self.errors_for(humidity=[1]), ['humidity must be 0-100'])
+        self.assertEqual(self.errors_for(rainfall={'a': 1}), ['invalid rainfall'])
+        self.assertEqual(self.errors_for(location_name=['x']), ['invalid location_name'])
+        self.assertEqual(self.errors_for(forecast_date=[1]), ['invalid forecast_date'])
+        self.assertEqual(self.errors_for(temp_avg=True), ['temperatures must be numbers'])
+    
+    def test_non_finite_numbers_are_rejected(self):
+        self.assertEqual(self.errors_for(rainfall='nan'), ['invalid rainfall'])
+        self.assertEqual(self.errors_for(temp_min='nan'), ['temperatures must be numbers'])
+        self.assertEqual(self.errors_for(temp_max=float('inf')), ['temperatures must be numbers'])
+        self.assertEqual(self.errors_for(wind_speed='-inf'), ['invalid wind_speed'])
+        self.assertEqual(self.errors_for(temp_min=10 ** 400), ['temperatures must be numbers'])
+    
+    def test_missing_optional_values_are_not_errors(self):
+        valid, errors = validate_weather_rows([dict(self.base, humidity=None, wind_speed='', rainfall=None)])
+        self.assertEqual(errors, [])
+        self.assertIsNone(valid[0]['humidity'])
+        self.assertIsNone(valid[0]['wind_speed'])
+        self.assertEqual(valid[0]['rainfall'], Decimal('0.00'))
+    
+    def test_dates_must_be_full_iso_dates(self):
+        for value in (5, '2024', '2024-03', 'today', '20240102', 'NaT'):
+            self.assertEqual(self.errors_for(date=value), ['invalid date'], value)
+        self.assertEqual(self.errors_for(date=date(2024, 1, 3)), [])
+        self.assertEqual(self.errors_for(date='2024-01-03T06:00:00'), [])
+    
+    def test_date_result_does_not_depend_on_the_batch(self):
+        partial = [dict(self.base, date='2024'), dict(self.base, date='2024-03')]
+        for batch in (partial, partial + [dict(self.base, date='')]):
+            _, errors = validate_weather_rows(batch)
+            self.assertEqual([error['row'] for error in errors if error['error'] == 'invalid date'], list(range(len(batch))))
+
+
+class ClimateAccumulatorTests(TestCase):
+    """station_totals/longest_dry_spell against a raw scan of WeatherData"""
+    
+    lat, lon = -1.2, 36.8
+    
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        days = [date(2024, 1, 1) + timedelta(days=int(i)) for i in np.flatnonzero(rng.random(120) < 0.85)]
+        self.rows = [
+            {
+                'latitude': self.lat,
+                'longitude': self.lon,
+                'date': day.isoformat(),
+                'temp_min': round(float(rng.uniform(2, 16)), 2),
+                'temp_max': round(float(rng.uniform(16, 32)), 2),
+                'rainfall': round(float(rng.choice([0, 0, 0.5, rng.uniform(0, 40)])), 2),
+            }
+            for day in days
+        ]
+        self.start, self.end = days[0], days[-1]
+        self.rng = rng
+    
+    def station(self):
+        return resolve_station(self.lat, self.lon)
+    
+    def raw_totals(self, start, end):
+        rows = WeatherData.objects.filter(
+            latitude=self.station()[1],
+            longitude=self.station()[2],
+            forecast_date__isnull=True,
+            date__range=(start, end),
+        ).order_by('date')
+        if not rows:
+            return None, 0
+        totals = {
+            'days': len(rows),
+            'rainfall': sum(row.rainfall for row in rows),
+            'temp_sum': sum(row.temp_avg for row in rows),
+            'gdd': sum(max((row.temp_min + row.temp_max) / 2 - GDD_BASE_TEMP, 0) for row in rows),
+            'dry_days': sum(row.rainfall < DRY_DAY_RAINFALL for row in rows),
+            'rainy_days': sum(row.rainfall > 0 for row in rows),
+        }
+        longest = spell = 0
+        for row in rows:
+            spell = spell + 1 if row.rainfall < DRY_DAY_RAINFALL else 0
+            longest = max(longest, spell)
+        return totals, longest
+    
+    def assert_matches_raw_scan(self, windows=40):
+        span = (self.end - self.start).days
+        for _ in range(windows):
+            first, length = self.rng.integers(-5, span + 5), self.rng.integers(0, 40)
+            start = self.start + timedelta(days=int(first))
+            end = start + timedelta(days=int(length))
+            expected, longest = self.raw_totals(start, end)
+            totals = station_totals(self.station(), start, end)
+            if expected is None:
+                self.assertIsNone(totals, (start, end))
+            else:
+                self.assertEqual({field: totals[field] for field in TOTAL_FIELDS}, expected, (start, end))
+            self.assertEqual(longest_dry_spell(self.station(), start, end), longest, (start, end))
+    
+    def test_out_of_order_ingest(self):
+        middle = len(self.rows) // 2
+        ingest_weather(self.rows[middle:])
+        ingest_weather(self.rows[:middle])
+        self.assert_matches_raw_scan()
+    
+    def test_corrections_saves_and_deletes(self):
+        ingest_weather(self.rows)
+        corrected = [dict(row, rainfall=0) for row in self.rows[10:30]]
+        ingest_weather(corrected)
+        
+        # Single-row writes go through the post_save/post_delete signals
+        observation = WeatherData.objects.filter(forecast_date__isnull=True).order_by('date')[50]
+        observation.rainfall = Decimal('12.50')
+        observation.save()
+        WeatherData.objects.filter(forecast_date__isnull=True).order_by('date')[70].delete()
+        self.assert_matches_raw_scan()
+    
+    def test_forecasts_and_other_stations_are_ignored(self):
+        ingest_weather(self.rows)
+        ingest_weather([
+            dict(self.rows[5], forecast_date=self.rows[6]['date'], rainfall=80),
+            dict(self.rows[5], latitude=-0.5, longitude=35.3, rainfall=60),
+        ])
+        self.assert_matches_raw_scan()
+    
+    def test_rebuild_matches_incremental(self):
+        ingest_weather(self.rows[40:])
+        ingest_weather(self.rows[:40])
+        incremental = list(ClimateAccumulator.objects.order_by('latitude', 'longitude', 'date').values(*TOTAL_FIELDS, 'dry_spell'))
+        rebuild_accumulators()
+        rebuilt = list(ClimateAccumulator.objects.order_by('latitude', 'longitude', 'date').values(*TOTAL_FIELDS, 'dry_spell'))
+        self.assertEqual(rebuilt, incremental)
+
+
+def legacy_scores(avg_rainfall, avg_temp):
+    """Per-farm piecewise rules of the original risk-assessment view"""
+    if avg_rainfall < 20:
+        drought = min(100, int(80 + (10 * (30 - avg_rainfall) / 30)))
+    elif avg_rainfall < 50:
+        drought = int(40 + (40 * (50 - avg_rainfall) / 30))
+    else:
+        drought = max(0, int(40 - (40 * (avg_rainfall - 50) / 50)))
+    
+    if avg_rainfall > 200:
+        flood = min(100, int(70 + (avg_rainfall - 200) / 10))
+    elif avg_rainfall > 150:
+        flood = int(40 + (30 * (avg_rainfall - 150) / 50))
+    else:
+        flood = max(0, int(40 - (40 * (150 - avg_rainfall) / 150)))
+    
+    if avg_temp > 35:
+        extreme_temp = min(100, int(60 + (avg_temp - 35) * 5))
+    elif avg_temp < 10:
+        extreme_temp = min(100, int(60 + (10 - avg_temp) * 5))
+    else:
+        extreme_temp = 20
+    return drought, flood, extreme_temp
+
+
+class RiskScoreTests(SimpleTestCase):
+    """Vectorized risk scores against the per-farm rules, branch edges included"""
+    
+    def test_rainfall_scores(self):
+        rain = np.concatenate([np.linspace(0, 400, 4001), [19.999, 20.001, 49.999, 150.001, 199.999, 200.001, 1e4]])
+        expected = np.array([legacy_scores(value, 20)[:2] for value in rain.tolist()])
+        np.testing.assert_array_equal(drought_scores(rain), expected[:, 0])
+        np.testing.assert_array_equal(flood_scores(rain), expected[:, 1])
+    
+    def test_temperature_scores(self):
+        temp = np.concatenate([np.linspace(-30, 60, 9001), [9.999, 10.001, 34.999, 35.001]])
+        expected = np.array([legacy_scores(0, value)[2] for value in temp.tolist()])
+        np.testing.assert_array_equal(extreme_temp_scores(temp), expected)
+
+
+class RiskEngineTests(TestCase):
+    """assess_farms against ClimateRisk.save() and the per-farm assessment"""
+    
+    today = date(2024, 6, 30)
+    
+    def setUp(self):
+        station_index.invalidate()
+        self.users = iter(range(1000))
+    
+    def tearDown(self):
+        station_index.invalidate()
+    
+    def farm(self, latitude=None, longitude=None):
+        n = next(self.users)
+        user = get_user_model().objects.create(username=f'farmer{n}', email=f'farmer{n}@example.com')
+        return FarmProfile.objects.create(
+            user=user, county='other', location='Test', size_acres=2, latitude=latitude, longitude=longitude,
+        )
+    
+    def weather(self, latitude, longitude, rainfall, temp, days=30, last=None):
+        last = last or self.today
+        ingest_weather([
+            {
+                'latitude': latitude,
+                'longitude': longitude,
+                'date': (last - timedelta(days=i)).isoformat(),
+                'temp_min': temp - 3 - i % 3,
+                'temp_max': temp + 3 + i % 3,
+                'rainfall': rainfall * (i % 3),
+            }
+            for i in range(days)
+        ])
+    
+    def test_levels_match_model_save(self):
+        farm = self.farm()
+        edges = [0, 24, 25, 49, 50, 74, 75, 100]
+        triples = list(product(edges, repeat=3))
+        saved = []
+        for i, (drought, flood, extreme_temp) in enumerate(triples):
+            risk = ClimateRisk(
+                farm_profile=farm,
+                assessment_date=self.today - timedelta(days=i),
+                period_start=self.today,
+                period_end=self.today,
+                drought_risk=drought,
+                flood_risk=flood,
+                extreme_temp_risk=extreme_temp,
+            )
+            risk.save()
+            saved.append(risk.overall_risk_level)
+        
+        drought, flood, extreme_temp = (np.array(column) for column in zip(*triples))
+        self.assertEqual(list(overall_levels(drought, flood, extreme_temp)), saved)
+    
+    def test_farms_match_per_farm_assessment(self):
+        self.weather(-1.21, 36.81, rainfall=5, temp=22)
+        self.weather(-0.31, 36.07, rainfall=120, temp=38)
+        self.weather(0.52, 35.27, rainfall=300, temp=6)
+        # Only observations from before the window
+        self.weather(-0.09, 34.77, rainfall=2, temp=20, last=self.today - timedelta(days=60))
+        farms = [
+            self.farm(-1.212, 36.812),
+            self.farm(-0.305, 36.071),
+            self.farm(0.521, 35.268),
+            self.farm(-0.091, 34.771),
+            self.farm(-1.6, 37.3),  # no station in its cell: nearest one anywhere
+            self.farm(),  # no coordinates
+        ]
+        
+        self.assertEqual(assess_farms(today=self.today, period_days=14), len(farms))
+        
+        for farm in farms:
+            risk = ClimateRisk.objects.get(farm_profile=farm)
+            totals = farm_totals(farm, self.today - timedelta(days=30), self.today, fallback=True)
+            if totals is None:
+                expected = (30, 20, 25, 30)
+            else:
+                expected = (*legacy_scores(totals['avg_rainfall'], totals['avg_temp']), 75)
+            self.assertEqual(
+                (risk.drought_risk, risk.flood_risk, risk.extreme_temp_risk, risk.confidence), expected, farm.pk,
+            )
+            self.assertEqual(risk.recommendations, '\n'.join(recommendations(*expected[:3])))
+            self.assertEqual(risk.period_end, self.today + timedelta(days=14))
+            
+            level = risk.overall_risk_level
+            risk.save()
+            self.assertEqual(risk.overall_risk_level, level, farm.pk)
+        
+        levels = set(ClimateRisk.objects.values_list('overall_risk_level', flat=True))
+        self.assertEqual(levels, {'critical', 'medium'})
+    
+    def test_rerun_updates_todays_row(self):
+        self.weather(-1.21, 36.81, rainfall=5, temp=22)
+        farm = self.farm(-1.212, 36.812)
+        assess_farms(today=self.today)
+        self.assertEqual(ClimateRisk.objects.get(farm_profile=farm).overall_risk_level, 'critical')
+        
+        self.weather(-1.21, 36.81, rainfall=60, temp=22)
+        assess_farms(today=self.today)
+        risk = ClimateRisk.objects.get(farm_profile=farm)
+        self.assertEqual((risk.drought_risk, risk.flood_risk), legacy_scores(60, 22)[:2])
+        self.assertEqual(risk.overall_risk_level, 'medium')
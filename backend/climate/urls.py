@@ -2,6 +2,7 @@ from django.urls import path
 from .views import (
     WeatherDataView,
     WeatherForecastView,
+    WeatherBulkIngestView,
     NDVIDataListCreateView,
     NDVIDataDetailView,
     ClimateRiskAssessmentView,
@@ -16,6 +17,7 @@ urlpatterns = [
     # Weather
     path('weather/', WeatherDataView.as_view(), name='weather_data'),
     path('weather/forecast/', WeatherForecastView.as_view(), name='weather_forecast'),
+    path('weather/bulk/', WeatherBulkIngestView.as_view(), name='weather_bulk_ingest'),
     
     # NDVI (Crop Health)
     path('ndvi/', NDVIDataListCreateView.as_view(), name='ndvi_list'),
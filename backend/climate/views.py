@@ -1,12 +1,21 @@
 from rest_framework import status, generics, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.db.models import Avg, Sum, Count
+from rest_framework.parsers import JSONParser
+from django.db.models import Avg, Count
 from datetime import date, timedelta
 from decimal import Decimal
 import statistics
 
-from .models import WeatherData, NDVIData, ClimateRisk, WeatherAlert
+from core.columnar import columnar_renderers, is_columnar, to_columns
+from core.parsers import CSVRowsParser, NDJSONParser
+from farms.models import FarmProfile
+
+from .models import NDVIData, ClimateRisk, WeatherAlert
+from .ingest import ingest_weather
+from .accumulators import farm_totals
+from .risk_engine import assess_farms
+from .stations import resolve_station, station_weather
 from .serializers import (
     WeatherDataSerializer,
     NDVIDataSerializer,
@@ -27,8 +36,17 @@ class WeatherDataView(APIView):
     - lon: Longitude (required)
     - days_back: Historical days (default: 7)
     - days_ahead: Forecast days (default: 0)
+    - format: 'columnar' for parallel arrays instead of a list of objects
+    
+    Served by the closest station in the point's 0.05° weather cell, or
+    by the nearest station anywhere when that cell has none.
     """
     permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = columnar_renderers()
+    columnar_fields = [
+        'date', 'forecast_date', 'temp_min', 'temp_max', 'temp_avg',
+        'rainfall', 'humidity', 'wind_speed', 'condition', 'source'
+    ]
     
     def get(self, request):
         lat = request.query_params.get('lat')
@@ -42,25 +60,39 @@ class WeatherDataView(APIView):
         days_back = int(request.query_params.get('days_back', 7))
         days_ahead = int(request.query_params.get('days_ahead', 0))
         
+        station = resolve_station(Decimal(lat), Decimal(lon), fallback=True)
+        weather = station_weather(station)
+        station_location = {'latitude': str(station[1]), 'longitude': str(station[2])} if station else None
+        
         # Get historical data
         date_from = date.today() - timedelta(days=days_back)
-        historical = WeatherData.objects.filter(
-            latitude=Decimal(lat),
-            longitude=Decimal(lon),
+        historical = weather.filter(
             date__gte=date_from,
             forecast_date__isnull=True
         ).order_by('date')
         
         # Get forecast data
-        forecasts = WeatherData.objects.filter(
-            latitude=Decimal(lat),
-            longitude=Decimal(lon),
+        forecasts = weather.filter(
             forecast_date__isnull=False,
             forecast_date__lte=date.today() + timedelta(days=days_ahead)
         ).order_by('forecast_date')
         
+        if is_columnar(request):
+            date_fields = ['date', 'forecast_date']
+            return Response({
+                'location': {'latitude': lat, 'longitude': lon},
+                'station': station_location,
+                'historical': to_columns(
+                    list(historical.values_list(*self.columnar_fields)), self.columnar_fields, date_fields
+                ),
+                'forecasts': to_columns(
+                    list(forecasts.values_list(*self.columnar_fields)), self.columnar_fields, date_fields
+                ),
+            }, status=status.HTTP_200_OK)
+        
         return Response({
             'location': {'latitude': lat, 'longitude': lon},
+            'station': station_location,
             'historical': WeatherDataSerializer(historical, many=True).data,
             'forecasts': WeatherDataSerializer(forecasts, many=True).data
         }, status=status.HTTP_200_OK)
@@ -77,10 +109,12 @@ class WeatherForecastView(APIView):
     
     def get(self, request):
         # Try to get coordinates from farm profile
+        cell = None
         try:
             farm = request.user.farm_profile
             lat = farm.latitude
             lon = farm.longitude
+            cell = farm.weather_cell
             location_name = farm.location
         except:
             lat = request.query_params.get('lat')
@@ -95,9 +129,8 @@ class WeatherForecastView(APIView):
         days = min(int(request.query_params.get('days', 7)), 14)
         
         # Get forecast data
-        forecasts = WeatherData.objects.filter(
-            latitude=lat,
-            longitude=lon,
+        station = resolve_station(lat, lon, cell, fallback=True)
+        forecasts = station_weather(station).filter(
             forecast_date__isnull=False,
             forecast_date__gte=date.today(),
             forecast_date__lte=date.today() + timedelta(days=days)
@@ -112,6 +145,55 @@ class WeatherForecastView(APIView):
         }, status=status.HTTP_200_OK)
 
 
+class WeatherBulkIngestView(APIView):
+    """
+    POST /api/v1/climate/weather/bulk/
+    Upsert many weather observations and forecasts in one request
+    
+    Body (JSON): list of rows, or {"weather": [...], "source": "openweather"}
+    Body (text/csv or application/x-ndjson): one row per line
+    Each row: latitude (or lat), longitude (or lon), date, forecast_date
+    (empty for observations), temp_min, temp_max, and optional temp_avg,
+    rainfall, humidity, wind_speed, condition, source, location_name
+    
+    Query params:
+    - source: default source for rows without one (CSV/NDJSON bodies)
+    
+    Rows are upserted on (latitude, longitude, date, forecast_date).
+    Invalid rows are skipped and reported; valid rows are still loaded.
+    Use the import_weather command for nightly gridded drops.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    parser_classes = [JSONParser, CSVRowsParser, NDJSONParser]
+    max_rows = 100000
+    
+    def post(self, request):
+        payload = request.data
+        default_source = request.query_params.get('source') or 'manual'
+        if isinstance(payload, dict):
+            default_source = payload.get('source') or default_source
+            payload = payload.get('weather')
+        
+        if not isinstance(payload, list) or not payload:
+            return Response({
+                'error': 'Provide a non-empty list of weather rows'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if len(payload) > self.max_rows:
+            return Response({
+                'error': f'Too many rows. Maximum is {self.max_rows} per request.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not all(isinstance(row, dict) for row in payload):
+            return Response({
+                'error': 'Each weather row must be an object'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        result = ingest_weather(payload, default_source=default_source)
+        
+        return Response(result, status=status.HTTP_200_OK)
+
+
 class NDVIDataListCreateView(generics.ListCreateAPIView):
     """
     GET /api/v1/climate/ndvi/
@@ -153,10 +235,14 @@ class NDVIDataDetailView(generics.RetrieveUpdateDestroyAPIView):
 class ClimateRiskAssessmentView(APIView):
     """
     GET /api/v1/climate/risk-assessment/
-    Generate climate risk assessment for user's farm
+    Climate risk assessment for user's farm
     
     Query params:
-    - days_ahead: Assessment period (default: 30)
+    - days_ahead: Assessment period when today's assessment is made here (default: 30)
+    
+    Returns today's ClimateRisk row, written for every farm by the daily
+    assess_climate_risk job (climate.risk_engine). A farm the job has not
+    scored yet today is scored on the spot with the same engine.
     """
     permission_classes = [permissions.IsAuthenticated]
     
@@ -168,85 +254,11 @@ class ClimateRiskAssessmentView(APIView):
                 'error': 'Farm profile not found'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        days_ahead = int(request.query_params.get('days_ahead', 30))
-        period_start = date.today()
-        period_end = period_start + timedelta(days=days_ahead)
-        
-        # Get historical weather for the location
-        historical = WeatherData.objects.filter(
-            latitude=farm.latitude,
-            longitude=farm.longitude,
-            date__gte=date.today() - timedelta(days=30),
-            forecast_date__isnull=True
-        )
-        
-        # Calculate drought risk (low rainfall + high temps)
-        if historical.exists():
-            avg_rainfall = historical.aggregate(Avg('rainfall'))['rainfall__avg'] or 0
-            avg_temp = historical.aggregate(Avg('temp_avg'))['temp_avg__avg'] or 0
-            
-            # Drought risk logic
-            if avg_rainfall < 20:  # Less than 20mm in 30 days
-                drought_risk = min(100, int(80 + (10 * (30 - avg_rainfall) / 30)))
-            elif avg_rainfall < 50:
-                drought_risk = int(40 + (40 * (50 - avg_rainfall) / 30))
-            else:
-                drought_risk = max(0, int(40 - (40 * (avg_rainfall - 50) / 50)))
-            
-            # Flood risk (excessive rainfall)
-            if avg_rainfall > 200:
-                flood_risk = min(100, int(70 + (avg_rainfall - 200) / 10))
-            elif avg_rainfall > 150:
-                flood_risk = int(40 + (30 * (avg_rainfall - 150) / 50))
-            else:
-                flood_risk = max(0, int(40 - (40 * (150 - avg_rainfall) / 150)))
-            
-            # Extreme temperature risk
-            if avg_temp > 35:
-                extreme_temp_risk = min(100, int(60 + (avg_temp - 35) * 5))
-            elif avg_temp < 10:
-                extreme_temp_risk = min(100, int(60 + (10 - avg_temp) * 5))
-            else:
-                extreme_temp_risk = 20  # Normal range
-            
-            confidence = 75
-        else:
-            # No historical data - default moderate risk
-            drought_risk = 30
-            flood_risk = 20
-            extreme_temp_risk = 25
-            confidence = 30
-        
-        # Generate recommendations
-        recommendations = []
-        if drought_risk > 50:
-            recommendations.append("Implement water conservation measures")
-            recommendations.append("Consider drought-resistant crop varieties")
-        if flood_risk > 50:
-            recommendations.append("Ensure proper drainage systems")
-            recommendations.append("Prepare flood mitigation strategies")
-        if extreme_temp_risk > 50:
-            recommendations.append("Provide crop shade/protection")
-            recommendations.append("Monitor crops frequently")
-        
-        if not recommendations:
-            recommendations.append("Continue normal farming practices")
-            recommendations.append("Monitor weather conditions regularly")
-        
-        # Create or update risk assessment
-        risk, created = ClimateRisk.objects.update_or_create(
-            farm_profile=farm,
-            assessment_date=date.today(),
-            defaults={
-                'period_start': period_start,
-                'period_end': period_end,
-                'drought_risk': drought_risk,
-                'flood_risk': flood_risk,
-                'extreme_temp_risk': extreme_temp_risk,
-                'recommendations': '\n'.join(recommendations),
-                'confidence': confidence
-            }
-        )
+        risk = ClimateRisk.objects.filter(farm_profile=farm, assessment_date=date.today()).first()
+        if risk is None:
+            days_ahead = int(request.query_params.get('days_ahead', 30))
+            assess_farms(FarmProfile.objects.filter(pk=farm.pk), period_days=days_ahead)
+            risk = ClimateRisk.objects.get(farm_profile=farm, assessment_date=date.today())
         
         return Response(ClimateRiskSerializer(risk).data, status=status.HTTP_200_OK)
 
@@ -315,19 +327,13 @@ class ClimateAnalyticsView(APIView):
         period_start = date.today() - timedelta(days=days)
         period_end = date.today()
         
-        # Weather stats
-        weather = WeatherData.objects.filter(
-            latitude=farm.latitude,
-            longitude=farm.longitude,
-            date__gte=period_start,
-            date__lte=period_end,
-            forecast_date__isnull=True
-        )
+        # Weather stats from the climate accumulators
+        weather = farm_totals(farm, period_start, period_end)
         
-        if weather.exists():
-            avg_temp = weather.aggregate(Avg('temp_avg'))['temp_avg__avg'] or 0
-            total_rainfall = weather.aggregate(Sum('rainfall'))['rainfall__sum'] or 0
-            rainy_days = weather.filter(rainfall__gt=0).count()
+        if weather:
+            avg_temp = weather['avg_temp']
+            total_rainfall = weather['rainfall']
+            rainy_days = weather['rainy_days']
         else:
             avg_temp = 0
             total_rainfall = 0
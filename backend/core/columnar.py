@@ -0,0 +1,55 @@
+from datetime import date
+from decimal import Decimal
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """
+    JSON renderer selected with ?format=columnar
+    
+    Views that list it check is_columnar(request) and answer with parallel
+    arrays (see to_columns) instead of a list of objects.
+    """
+    format = 'columnar'
+
+
+def columnar_renderers():
+    """renderer_classes for a view that supports ?format=columnar"""
+    return [*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarJSONRenderer]
+
+
+def is_columnar(request):
+    renderer = getattr(request, 'accepted_renderer', None)
+    return renderer is not None and renderer.format == 'columnar'
+
+
+def to_columns(rows, fields, date_fields=()):
+    """
+    Parallel arrays from values_list() tuples
+    
+    - rows: sequence of tuples in `fields` order
+    - date_fields: fields sent as integer day offsets from 'origin'
+    
+    Decimals become floats. Returns
+    {'origin': 'YYYY-MM-DD' or None, 'length': n, 'columns': {field: [...]}}
+    """
+    columns = {field: [] for field in fields}
+    if rows:
+        columns = dict(zip(fields, (list(column) for column in zip(*rows))))
+    
+    days = [value for field in date_fields for value in columns[field] if value is not None]
+    origin = min(days) if days else None
+    
+    for field, values in columns.items():
+        if field in date_fields:
+            columns[field] = [None if value is None else (value - origin).days for value in values]
+        elif values and any(isinstance(value, Decimal) for value in values):
+            columns[field] = [None if value is None else float(value) for value in values]
+    
+    return {
+        'origin': origin.isoformat() if isinstance(origin, date) else None,
+        'length': len(rows),
+        'columns': columns,
+    }
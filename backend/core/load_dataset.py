@@ -0,0 +1,746 @@
+import csv
+import io
+import json
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from climate.accumulators import refresh_station
+from climate.grid import cell_centre, cell_ids
+from climate.models import ClimateAccumulator, NDVIData, WeatherData
+from communication.models import Notification
+from farms.models import ExpenseRecord, FarmProfile, HarvestRecord
+from insurance.models import InsuranceClaim, InsurancePolicy, PolicyTrigger, PremiumPayment
+from market.ingest import finalize_ingest, merge_spans, upsert_prices
+from market.models import MarketPrice
+
+User = get_user_model()
+
+# Every generated account gets this password (hashed once, not per user)
+LOAD_PASSWORD = 'loadtest123'
+
+# county: (latitude, longitude, mean temp C, annual rain mm, share of farms, towns)
+COUNTIES = {
+    'nairobi': (-1.29, 36.82, 19.0, 900, 0.03, ['Karen', 'Kasarani', 'Embakasi', 'Dagoretti']),
+    'nakuru': (-0.30, 36.07, 18.0, 950, 0.14, ['Njoro', 'Molo', 'Naivasha', 'Rongai']),
+    'kiambu': (-1.03, 36.83, 18.0, 1000, 0.12, ['Limuru', 'Githunguri', 'Gatundu', 'Ruiru']),
+    'meru': (0.05, 37.65, 17.0, 1300, 0.12, ['Timau', 'Nkubu', 'Maua', 'Mitunguu']),
+    'kisumu': (-0.09, 34.77, 24.0, 1350, 0.08, ['Ahero', 'Maseno', 'Kombewa', 'Muhoroni']),
+    'uasin_gishu': (0.52, 35.27, 16.0, 1100, 0.12, ['Turbo', 'Moiben', 'Burnt Forest', 'Ziwa']),
+    'trans_nzoia': (1.02, 35.00, 18.0, 1250, 0.12, ['Kitale', 'Endebess', 'Kiminini', 'Saboti']),
+    'bungoma': (0.56, 34.56, 22.0, 1600, 0.10, ['Webuye', 'Kimilili', 'Chwele', 'Sirisia']),
+    'kakamega': (0.28, 34.75, 21.0, 1900, 0.10, ['Mumias', 'Malava', 'Butere', 'Lurambi']),
+    'other': (-0.42, 36.95, 19.0, 1000, 0.07, ['Nyeri', 'Embu', 'Kerugoya', 'Othaya']),
+}
+
+# Share of the annual rain falling in each month (long rains Mar-May, short rains Oct-Dec)
+MONTHLY_RAIN_SHARE = np.array([0.03, 0.04, 0.10, 0.17, 0.14, 0.06, 0.05, 0.06, 0.05, 0.10, 0.13, 0.07])
+
+# crop: (base price KES/kg, yield kg/acre/year, volatility, share of farms growing it)
+CROPS = {
+    'Maize': (45, 1200, 0.15, 0.70),
+    'Beans': (85, 500, 0.20, 0.45),
+    'Potatoes': (60, 4000, 0.18, 0.25),
+    'Tomatoes': (70, 8000, 0.25, 0.15),
+    'Cabbage': (55, 10000, 0.12, 0.12),
+    'Kale': (40, 6000, 0.10, 0.20),
+    'Wheat': (50, 1000, 0.10, 0.06),
+    'Rice': (120, 2000, 0.08, 0.03),
+    'Coffee': (300, 300, 0.12, 0.08),
+    'Tea': (250, 2500, 0.08, 0.08),
+    'Sugarcane': (5, 25000, 0.06, 0.05),
+    'Bananas': (35, 6000, 0.15, 0.15),
+    'Onions': (65, 6000, 0.22, 0.0),
+    'Carrots': (58, 7000, 0.15, 0.0),
+}
+
+MARKET_MODIFIERS = {
+    'national': 1.0,
+    'nairobi': 1.15,
+    'nakuru': 0.95,
+    'mombasa': 1.10,
+    'kisumu': 0.90,
+    'eldoret': 0.92,
+    'thika': 1.05,
+    'meru': 0.97,
+}
+
+FIRST_NAMES = [
+    'Wanjiku', 'Kamau', 'Achieng', 'Otieno', 'Njeri', 'Mwangi', 'Chebet', 'Kiprono',
+    'Wafula', 'Nafula', 'Muthoni', 'Kariuki', 'Akinyi', 'Ochieng', 'Jepchirchir', 'Kipchoge',
+    'Wambui', 'Njoroge', 'Atieno', 'Barasa', 'Nekesa', 'Mutua', 'Kawira', 'Gitonga',
+]
+LAST_NAMES = [
+    'Kamau', 'Mwangi', 'Otieno', 'Odhiambo', 'Kiptoo', 'Wanyama', 'Njoroge', 'Kariuki',
+    'Mutai', 'Korir', 'Wekesa', 'Simiyu', 'Omondi', 'Onyango', 'Kimani', 'Macharia',
+    'Rotich', 'Cheruiyot', 'Muriuki', 'Kirimi', 'Juma', 'Wambua', 'Ndirangu', 'Kibet',
+]
+
+LANGUAGES = (['en', 'sw', 'ki', 'lu', 'ka'], [0.5, 0.3, 0.08, 0.06, 0.06])
+FARMING_TYPES = (['subsistence', 'mixed', 'commercial'], [0.55, 0.30, 0.15])
+
+# category: (typical KES per acre, share of expenses)
+EXPENSES = {
+    'seeds': (1500, 0.15),
+    'fertilizer': (2500, 0.20),
+    'pesticides': (1200, 0.12),
+    'labor': (2000, 0.20),
+    'equipment': (5000, 0.05),
+    'transport': (800, 0.12),
+    'irrigation': (1500, 0.04),
+    'rent': (3000, 0.04),
+    'other': (700, 0.08),
+}
+EXPENSES_PER_MONTH = 1.5
+
+NDVI_REVISIT_DAYS = 16
+NOTIFICATIONS_PER_MONTH = 1.0
+INSURED_SHARE = 0.3
+
+POLICY_TYPES = (['drought', 'multi_peril', 'flood', 'excess_rain', 'temperature'], [0.4, 0.3, 0.1, 0.1, 0.1])
+PAYMENT_FREQUENCIES = {'annually': (1, 0.4), 'quarterly': (4, 0.3), 'monthly': (12, 0.3)}
+PAYMENT_METHODS = (['mpesa', 'mobile_money', 'bank', 'cash'], [0.7, 0.1, 0.1, 0.1])
+
+# policy type: [(trigger type, threshold, measurement days, payout %)]
+POLICY_TRIGGERS = {
+    'drought': [('rainfall_deficit', 50, 30, 50), ('consecutive_dry_days', 21, 30, 25)],
+    'multi_peril': [('rainfall_deficit', 50, 30, 50), ('rainfall_excess', 200, 7, 60)],
+    'flood': [('rainfall_excess', 200, 7, 60)],
+    'excess_rain': [('rainfall_excess', 150, 14, 40)],
+    'temperature': [('temperature_high', 35, 7, 30)],
+}
+TRIGGER_PROBABILITY = 0.08
+
+# notification type: (share, priority, module, title, message); {crop}/{county}/{change} are filled in
+NOTIFICATIONS = {
+    'weather_alert': (0.30, 'high', 'climate', 'Heavy rain expected', 'Heavy rainfall is forecast in {county} over the next 3 days.'),
+    'price_alert': (0.25, 'medium', 'market', '{crop} price alert', '{crop} prices moved {change}% in {county} this week.'),
+    'harvest_reminder': (0.15, 'medium', 'farms', 'Harvest reminder', 'Your {crop} should be ready for harvest soon.'),
+    'payment_due': (0.10, 'high', 'insurance', 'Premium payment due', 'Your insurance premium is due in 7 days.'),
+    'insurance_claim': (0.05, 'urgent', 'insurance', 'Claim update', 'Your insurance claim has been reviewed.'),
+    'general': (0.15, 'low', 'farms', 'Farming tip', 'Rotate {crop} with legumes to improve soil fertility.'),
+}
+
+
+def _choice(rng, options, size):
+    values, weights = options
+    return np.array(values, dtype=object)[rng.choice(len(values), size=size, p=weights)]
+
+
+def _date_range(start, end):
+    return np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1)
+
+
+def _as_dates(days):
+    return days.astype('datetime64[D]').tolist()
+
+
+def _as_datetimes(days, seconds=None):
+    """Aware UTC datetimes from datetime64[D] days plus optional seconds"""
+    stamps = days.astype('datetime64[s]')
+    if seconds is not None:
+        stamps = stamps + seconds.astype('timedelta64[s]')
+    return [stamp.replace(tzinfo=dt_timezone.utc) for stamp in stamps.tolist()]
+
+
+def _rounded(values, places=2):
+    return np.round(values, places).tolist()
+
+
+@contextmanager
+def _explicit_timestamps(model, names):
+    """Let bulk_create keep supplied auto_now/auto_now_add values"""
+    switched = [
+        (field, field.auto_now, field.auto_now_add)
+        for field in model._meta.concrete_fields
+        if field.attname in names and (getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False))
+    ]
+    for field, _, _ in switched:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in switched:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class RowWriter:
+    """
+    Writes column-oriented rows for a model
+    
+    Uses bulk_create in batch_size batches, or COPY FROM STDIN on Postgres
+    with use_copy=True. Columns not supplied get their model default
+    (auto_now fields: the load time). Keeps per-table row counts.
+    """
+    
+    def __init__(self, batch_size=5000, use_copy=False):
+        if use_copy and connection.vendor != 'postgresql':
+            raise ValueError('COPY is only available on PostgreSQL')
+        self.batch_size = batch_size
+        self.use_copy = use_copy
+        self.counts = {}
+    
+    def write(self, model, columns):
+        names = list(columns)
+        rows = list(zip(*columns.values()))
+        if not rows:
+            return 0
+        if self.use_copy:
+            self._copy(model, names, rows)
+        else:
+            with _explicit_timestamps(model, names):
+                model.objects.bulk_create(
+                    [model(**dict(zip(names, row))) for row in rows],
+                    batch_size=self.batch_size,
+                )
+        table = model._meta.db_table
+        self.counts[table] = self.counts.get(table, 0) + len(rows)
+        return len(rows)
+    
+    def _copy(self, model, names, rows):
+        now = timezone.now()
+        filled = []
+        for field in model._meta.concrete_fields:
+            if field.attname in names:
+                continue
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                value = now if isinstance(field, models.DateTimeField) else now.date()
+            else:
+                value = field.get_default()
+            filled.append((field.column, self._copy_value(value)))
+        
+        fields = {field.attname: field for field in model._meta.concrete_fields}
+        columns = [fields[name].column for name in names] + [column for column, _ in filled]
+        tail = [value for _, value in filled]
+        sql = (
+            f'COPY {model._meta.db_table} ({", ".join(columns)}) '
+            f"FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        )
+        
+        for start in range(0, len(rows), self.batch_size):
+            buffer = io.StringIO()
+            out = csv.writer(buffer)
+            for row in rows[start:start + self.batch_size]:
+                out.writerow([self._copy_value(value) for value in row] + tail)
+            buffer.seek(0)
+            with connection.cursor() as cursor:
+                raw = cursor.cursor
+                if hasattr(raw, 'copy_expert'):
+                    raw.copy_expert(sql, buffer)
+                else:
+                    with raw.copy(sql) as copy:
+                        copy.write(buffer.getvalue())
+    
+    @staticmethod
+    def _copy_value(value):
+        if value is None:
+            return '\\N'
+        if isinstance(value, bool):
+            return 't' if value else 'f'
+        if isinstance(value, (list, dict)):
+            return json.dumps(value)
+        if isinstance(value, (date, datetime)):
+            return value.isoformat()
+        return value
+
+
+class LoadDatasetGenerator:
+    """
+    Builds a reproducible, production-sized dataset for performance tests
+    
+    All randomness comes from numpy generators seeded with (seed, part),
+    so the same arguments always produce the same rows. Farms are written
+    in chunks of farm_chunk (one transaction each) together with their
+    users, harvests, expenses, NDVI readings, policies and notifications.
+    Primary keys are assigned here so child rows need no read-back.
+    """
+    
+    def __init__(self, writer, farms, years, seed=42, end=None, farm_chunk=2000):
+        self.writer = writer
+        self.farms = farms
+        self.seed = seed
+        self.end = end or date.today()
+        self.start = self.end - timedelta(days=round(365.25 * years) - 1)
+        self.days = _date_range(self.start, self.end)
+        self.farm_chunk = farm_chunk
+        self.crops = list(CROPS)
+        self.farm_crops = [crop for crop in self.crops if CROPS[crop][3] > 0]
+        self._next_ids = {}
+        self._password = make_password(LOAD_PASSWORD)
+        self._national = None
+        self._farms = None
+    
+    def rng(self, *part):
+        return np.random.default_rng([self.seed, *part])
+    
+    def take_ids(self, model, count):
+        if model not in self._next_ids:
+            self._next_ids[model] = (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+        first = self._next_ids[model]
+        self._next_ids[model] = first + count
+        return np.arange(first, first + count)
+    
+    def reset_sequences(self):
+        """Move Postgres id sequences past the explicitly assigned keys"""
+        if connection.vendor != 'postgresql' or not self._next_ids:
+            return
+        statements = connection.ops.sequence_reset_sql(no_style(), list(self._next_ids))
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+    
+    # Farm attributes are drawn up front (a few arrays) so weather stations
+    # can be placed where the farms are before any farm chunk is written
+    
+    def farm_attributes(self):
+        if self._farms is not None:
+            return self._farms
+        rng = self.rng(1)
+        n = self.farms
+        names = list(COUNTIES)
+        shares = np.array([COUNTIES[name][4] for name in names])
+        county = rng.choice(len(names), size=n, p=shares / shares.sum())
+        centre = np.array([COUNTIES[name][:2] for name in names])
+        offset = np.clip(rng.normal(0, 0.12, size=(n, 2)), -0.3, 0.3)
+        latitude = np.round(centre[county, 0] + offset[:, 0], 6)
+        longitude = np.round(centre[county, 1] + offset[:, 1], 6)
+        
+        farming_type = _choice(rng, FARMING_TYPES, n)
+        size = rng.lognormal(np.log(2.0), 0.8, size=n) * np.where(farming_type == 'commercial', 5.0, 1.0)
+        
+        self._farms = {
+            'county': np.array(names, dtype=object)[county],
+            'latitude': latitude,
+            'longitude': longitude,
+            'cell': cell_ids(latitude, longitude),
+            'farming_type': farming_type,
+            'size': np.round(np.clip(size, 0.1, 5000), 2),
+        }
+        return self._farms
+    
+    def national_prices(self):
+        """crops x days matrix of national prices (also used to value harvests)"""
+        if self._national is not None:
+            return self._national
+        rng = self.rng(2)
+        n_days = len(self.days)
+        day_of_year = (self.days - self.days.astype('datetime64[Y]')).astype(int)
+        
+        prices = np.empty((len(self.crops), n_days))
+        for i, crop in enumerate(self.crops):
+            base, _, volatility, _ = CROPS[crop]
+            # Mean-reverting log deviation plus lows after the Aug/Jan harvests
+            shocks = rng.normal(0, volatility / 6, size=n_days)
+            deviation = np.empty(n_days)
+            level = 0.0
+            for t in range(n_days):
+                level = 0.97 * level + shocks[t]
+                deviation[t] = level
+            seasonal = 0.08 * np.cos(2 * np.pi * (day_of_year - 120) / 182.6)
+            trend = rng.normal(0, 0.05) * np.arange(n_days) / 365.25
+            prices[i] = base * np.exp(deviation + seasonal + trend)
+        self._national = prices
+        return prices
+    
+    def generate_market_prices(self):
+        """Daily prices per crop and market, loaded through the ingest path"""
+        rng = self.rng(3)
+        national = self.national_prices()
+        dates = _as_dates(self.days)
+        rows = []
+        for market, modifier in MARKET_MODIFIERS.items():
+            noise = 1.0 if market == 'national' else np.exp(rng.normal(0, 0.03, size=national.shape))
+            values = _rounded(np.maximum(national * modifier * noise, 0.5))
+            for i, crop in enumerate(self.crops):
+                rows.extend(
+                    {'crop': crop, 'market': market, 'date': day, 'price_per_kg': price, 'source': 'kace'}
+                    for day, price in zip(dates, values[i])
+                )
+        
+        touched = {}
+        for start in range(0, len(rows), self.writer.batch_size):
+            batch = rows[start:start + self.writer.batch_size]
+            _, _, batch_touched = upsert_prices(batch, batch_size=self.writer.batch_size)
+            merge_spans(touched, batch_touched)
+        finalize_ingest(touched)
+        self.writer.counts[MarketPrice._meta.db_table] = len(rows)
+        return len(rows)
+    
+    def generate_weather(self):
+        """
+        Daily observations for one station (at the centre) per weather grid
+        cell with farms, plus the stations' climate accumulators
+        """
+        farms = self.farm_attributes()
+        cells, first = np.unique(farms['cell'], return_index=True)
+        rng = self.rng(4)
+        n_days = len(self.days)
+        months = self.days.astype('datetime64[M]').astype(int) % 12
+        day_of_year = (self.days - self.days.astype('datetime64[Y]')).astype(int)
+        share = MONTHLY_RAIN_SHARE[months]
+        dates = _as_dates(self.days)
+        forecast_dates = _as_dates(self.days[-1] + np.arange(1, 8))
+        
+        written = accumulated = 0
+        for station, (cell, farm) in enumerate(zip(cells, first)):
+            county = farms['county'][farm]
+            _, _, mean_temp, annual_rain, _, towns = COUNTIES[county]
+            latitude, longitude = (round(value, 6) for value in cell_centre(cell))
+            
+            wet_probability = np.clip(0.1 + 3 * share, 0, 0.8)
+            wet = rng.random(n_days) < wet_probability
+            rainfall = np.where(wet, rng.exponential(annual_rain * share / 30.4 / wet_probability), 0.0)
+            temp_avg = (
+                mean_temp
+                + 1.5 * np.cos(2 * np.pi * (day_of_year - 50) / 365.25)
+                + rng.normal(0, 1.2, n_days)
+                - 0.03 * np.minimum(rainfall, 60)
+            )
+            temp_max = temp_avg + 5 + rng.gamma(4, 0.5, n_days)
+            temp_min = temp_avg - 5 - rng.gamma(4, 0.4, n_days)
+            humidity = np.clip(55 + 25 * wet + rng.normal(0, 8, n_days), 20, 100).astype(int)
+            wind = np.clip(rng.gamma(4, 3, n_days), 0, 80)
+            condition = np.where(
+                rainfall > 5, 'rainy',
+                np.where(wet, 'cloudy', np.where(rng.random(n_days) < 0.35, 'partly_cloudy', 'clear'))
+            )
+            
+            # Past observations plus a 7-day forecast issued on the last day
+            count = n_days + len(forecast_dates)
+            forecast_index = rng.integers(n_days - 30, n_days, size=len(forecast_dates))
+            pick = np.concatenate([np.arange(n_days), forecast_index])
+            written += self.writer.write(WeatherData, {
+                'latitude': [latitude] * count,
+                'longitude': [longitude] * count,
+                'location_name': [f'{towns[station % len(towns)]} station'] * count,
+                'date': dates + [dates[-1]] * len(forecast_dates),
+                'forecast_date': [None] * n_days + forecast_dates,
+                'temp_min': _rounded(temp_min[pick]),
+                'temp_max': _rounded(temp_max[pick]),
+                'temp_avg': _rounded(temp_avg[pick]),
+                'rainfall': _rounded(rainfall[pick]),
+                'humidity': humidity[pick].tolist(),
+                'wind_speed': _rounded(wind[pick]),
+                'condition': condition[pick].tolist(),
+                'source': ['sensor'] * n_days + ['openweather'] * len(forecast_dates),
+                'weather_cell': [int(cell)] * count,
+            })
+            accumulated += refresh_station(str(latitude), str(longitude), dates[0])
+        self.writer.counts[ClimateAccumulator._meta.db_table] = accumulated
+        return len(cells), written
+    
+    def farm_chunks(self):
+        """Write farms chunk by chunk; yields the number of farms written so far"""
+        for index, first in enumerate(range(0, self.farms, self.farm_chunk)):
+            last = min(first + self.farm_chunk, self.farms)
+            with transaction.atomic():
+                self._write_farm_chunk(index, first, last)
+            yield last
+    
+    def _write_farm_chunk(self, index, first, last):
+        rng = self.rng(5, index)
+        attributes = self.farm_attributes()
+        farms = {key: values[first:last] for key, values in attributes.items()}
+        n = last - first
+        
+        user_ids = self.take_ids(User, n)
+        farm_ids = self.take_ids(FarmProfile, n)
+        first_names = np.array(FIRST_NAMES, dtype=object)[rng.integers(len(FIRST_NAMES), size=n)]
+        last_names = np.array(LAST_NAMES, dtype=object)[rng.integers(len(LAST_NAMES), size=n)]
+        usernames = [f'{a}.{b}{i}'.lower() for a, b, i in zip(first_names, last_names, user_ids)]
+        
+        # Accounts were opened up to a year before the data window
+        joined_days = np.datetime64(self.start, 'D') - rng.integers(0, 365, size=n)
+        joined = _as_datetimes(joined_days, rng.integers(0, 86400, size=n))
+        
+        self.writer.write(User, {
+            'id': user_ids.tolist(),
+            'password': [self._password] * n,
+            'username': usernames,
+            'email': [f'{username}@example.com' for username in usernames],
+            'first_name': first_names.tolist(),
+            'last_name': last_names.tolist(),
+            'phone': [f'+2547{i:08d}' for i in user_ids],
+            'language': _choice(rng, LANGUAGES, n).tolist(),
+            'date_joined': joined,
+            'created_at': joined,
+            'updated_at': joined,
+        })
+        
+        crops = self._pick_crops(rng, n)
+        towns = [COUNTIES[county][5] for county in farms['county']]
+        self.writer.write(FarmProfile, {
+            'id': farm_ids.tolist(),
+            'user_id': user_ids.tolist(),
+            'farm_name': [f'{name} Farm' for name in last_names],
+            'county': farms['county'].tolist(),
+            'location': [options[i] for options, i in zip(towns, rng.integers(0, 4, size=n))],
+            'latitude': farms['latitude'].tolist(),
+            'longitude': farms['longitude'].tolist(),
+            'weather_cell': farms['cell'].tolist(),
+            'size_acres': farms['size'].tolist(),
+            'crops': crops,
+            'farming_type': farms['farming_type'].tolist(),
+            'created_at': joined,
+            'updated_at': joined,
+        })
+        
+        self._write_harvests(rng, farm_ids, farms['size'], crops)
+        self._write_expenses(rng, farm_ids, farms['size'])
+        self._write_ndvi(rng, farm_ids)
+        self._write_policies(rng, farm_ids, farms['size'])
+        self._write_notifications(rng, user_ids, farms['county'], crops)
+    
+    def _pick_crops(self, rng, n):
+        shares = np.array([CROPS[crop][3] for crop in self.farm_crops])
+        counts = 1 + rng.binomial(3, 0.4, size=n)
+        return [
+            [self.farm_crops[i] for i in sorted(rng.choice(len(shares), size=k, replace=False, p=shares / shares.sum()))]
+            for k in counts
+        ]
+    
+    def _write_harvests(self, rng, farm_ids, sizes, crops):
+        # Long rains harvest around 1 Aug, short rains around 20 Jan
+        seasons = [
+            np.datetime64(date(year, month, day), 'D')
+            for year in range(self.start.year, self.end.year + 1)
+            for month, day in ((1, 20), (8, 1))
+        ]
+        seasons = np.array([day for day in seasons if self.days[0] <= day <= self.days[-1]], dtype='datetime64[D]')
+        crop_counts = np.array([len(farm_crops) for farm_crops in crops])
+        pair_farm = np.repeat(np.arange(len(farm_ids)), crop_counts)
+        pair_crop = np.array([self.crops.index(crop) for farm_crops in crops for crop in farm_crops], dtype=int)
+        pair_area = sizes[pair_farm] / crop_counts[pair_farm]
+        
+        farm = np.repeat(pair_farm, len(seasons))
+        crop = np.repeat(pair_crop, len(seasons))
+        area = np.repeat(pair_area, len(seasons))
+        day = np.tile(seasons, len(pair_farm)) + rng.integers(-21, 22, size=len(farm))
+        keep = (rng.random(len(farm)) < 0.85) & (day <= self.days[-1]) & (day >= self.days[0])
+        farm, crop, area, day = farm[keep], crop[keep], area[keep], day[keep]
+        
+        yields = np.array([CROPS[name][1] for name in self.crops])
+        quantity = np.round(np.maximum(area * yields[crop] / 2 * rng.lognormal(0, 0.35, size=len(farm)), 1), 2)
+        day_index = (day - self.days[0]).astype(int)
+        price = np.round(self.national_prices()[crop, day_index] * rng.uniform(0.7, 0.95, size=len(farm)), 2)
+        created = _as_datetimes(day + rng.integers(0, 4, size=len(farm)), rng.integers(0, 86400, size=len(farm)))
+        
+        self.writer.write(HarvestRecord, {
+            'farm_profile_id': farm_ids[farm].tolist(),
+            'crop': np.array(self.crops, dtype=object)[crop].tolist(),
+            'quantity_kg': quantity.tolist(),
+            'harvest_date': _as_dates(day),
+            'price_per_kg': price.tolist(),
+            'estimated_value': _rounded(quantity * price),
+            'created_at': created,
+            'updated_at': created,
+        })
+    
+    def _write_expenses(self, rng, farm_ids, sizes):
+        months = np.arange(
+            np.datetime64(self.start, 'M'), np.datetime64(self.end, 'M') + 1
+        ).astype('datetime64[D]')
+        counts = rng.poisson(EXPENSES_PER_MONTH, size=(len(farm_ids), len(months))).ravel()
+        farm = np.repeat(np.repeat(np.arange(len(farm_ids)), len(months)), counts)
+        month = np.repeat(np.tile(np.arange(len(months)), len(farm_ids)), counts)
+        day = months[month] + rng.integers(0, 28, size=len(farm))
+        keep = (day >= self.days[0]) & (day <= self.days[-1])
+        farm, day = farm[keep], day[keep]
+        
+        categories = list(EXPENSES)
+        category = rng.choice(len(categories), size=len(farm), p=[EXPENSES[name][1] for name in categories])
+        typical = np.array([EXPENSES[name][0] for name in categories])
+        amount = np.clip(typical[category] * sizes[farm] ** 0.8 * rng.lognormal(0, 0.5, size=len(farm)), 50, 9e7)
+        created = _as_datetimes(day, rng.integers(6 * 3600, 20 * 3600, size=len(farm)))
+        
+        self.writer.write(ExpenseRecord, {
+            'farm_profile_id': farm_ids[farm].tolist(),
+            'category': np.array(categories, dtype=object)[category].tolist(),
+            'amount': _rounded(amount),
+            'date': _as_dates(day),
+            'created_at': created,
+            'updated_at': created,
+        })
+    
+    def _write_ndvi(self, rng, farm_ids):
+        n = len(farm_ids)
+        per_farm = len(self.days) // NDVI_REVISIT_DAYS
+        phase = rng.integers(0, NDVI_REVISIT_DAYS, size=n)
+        farm = np.repeat(np.arange(n), per_farm)
+        day = self.days[0] + np.repeat(phase, per_farm) + np.tile(np.arange(per_farm) * NDVI_REVISIT_DAYS, n)
+        
+        # Greenness follows the rain about a month later
+        months = ((day - 30).astype('datetime64[M]').astype(int)) % 12
+        greenness = MONTHLY_RAIN_SHARE[months] / MONTHLY_RAIN_SHARE.max()
+        value = np.round(np.clip(0.2 + 0.5 * greenness + rng.normal(0, 0.07, size=len(farm)), -0.1, 0.95), 3)
+        health = np.select([value < 0.2, value < 0.4, value < 0.6], ['poor', 'fair', 'good'], 'excellent')
+        created = _as_datetimes(day + 2)
+        
+        self.writer.write(NDVIData, {
+            'farm_profile_id': farm_ids[farm].tolist(),
+            'ndvi_value': value.tolist(),
+            'image_date': _as_dates(day),
+            'health_status': health.tolist(),
+            'source': np.where(rng.random(len(farm)) < 0.8, 'sentinel', 'landsat').tolist(),
+            'cloud_cover_percent': np.clip(rng.gamma(2, 12, size=len(farm)), 0, 100).astype(int).tolist(),
+            'created_at': created,
+        })
+    
+    def _write_policies(self, rng, farm_ids, sizes):
+        """Yearly policies for the insured farms, with triggers, premiums and claims"""
+        insured = np.flatnonzero(rng.random(len(farm_ids)) < INSURED_SHARE)
+        # Policies run from the start of the long rains (1 Mar) for a year
+        starts = [
+            date(year, 3, 1) for year in range(self.start.year - 1, self.end.year + 1)
+            if date(year + 1, 2, 28) >= self.start and date(year, 3, 1) <= self.end
+        ]
+        
+        policies = {key: [] for key in (
+            'id', 'farm_profile_id', 'policy_number', 'policy_type', 'coverage_amount', 'premium_amount',
+            'payment_frequency', 'start_date', 'end_date', 'status', 'is_paid', 'payment_date',
+            'created_at', 'updated_at',
+        )}
+        triggers = {key: [] for key in (
+            'id', 'policy_id', 'trigger_type', 'threshold_value', 'measurement_period_days',
+            'payout_percentage', 'is_triggered', 'trigger_date', 'created_at',
+        )}
+        payments = {key: [] for key in (
+            'policy_id', 'amount', 'payment_date', 'transaction_ref', 'is_confirmed', 'created_at',
+        )}
+        claims = {key: [] for key in (
+            'policy_id', 'claim_number', 'claim_type', 'trigger_id', 'claim_amount', 'description',
+            'status', 'processed_date', 'payout_date', 'created_at', 'updated_at',
+        )}
+        
+        count = len(insured) * len(starts)
+        policy_ids = iter(self.take_ids(InsurancePolicy, count).tolist())
+        policy_types = iter(_choice(rng, POLICY_TYPES, count).tolist())
+        frequencies = list(PAYMENT_FREQUENCIES)
+        frequency_picks = iter(rng.choice(
+            len(frequencies), size=count, p=[PAYMENT_FREQUENCIES[name][1] for name in frequencies]
+        ).tolist())
+        
+        for farm in insured:
+            for start in starts:
+                policy_id = next(policy_ids)
+                policy_type = next(policy_types)
+                frequency = frequencies[next(frequency_picks)]
+                end = start + timedelta(days=364)
+                coverage = max(1000, round(float(sizes[farm]) * 30000, -2))
+                premium = max(100, round(coverage * float(rng.uniform(0.05, 0.1)), 2))
+                created = datetime.combine(start - timedelta(days=14), datetime.min.time(), dt_timezone.utc)
+                
+                policies['id'].append(policy_id)
+                policies['farm_profile_id'].append(int(farm_ids[farm]))
+                policies['policy_number'].append(f'LT{policy_id:09d}')
+                policies['policy_type'].append(policy_type)
+                policies['coverage_amount'].append(coverage)
+                policies['premium_amount'].append(premium)
+                policies['payment_frequency'].append(frequency)
+                policies['start_date'].append(start)
+                policies['end_date'].append(end)
+                policies['status'].append('expired' if end < self.end else 'active')
+                policies['is_paid'].append(True)
+                policies['payment_date'].append(start)
+                policies['created_at'].append(created)
+                policies['updated_at'].append(created)
+                
+                instalments, _ = PAYMENT_FREQUENCIES[frequency]
+                for k in range(instalments):
+                    paid_on = start + timedelta(days=round(k * 365 / instalments))
+                    if paid_on > self.end:
+                        break
+                    payments['policy_id'].append(policy_id)
+                    payments['amount'].append(round(premium / instalments, 2))
+                    payments['payment_date'].append(paid_on)
+                    payments['transaction_ref'].append(f'LT{policy_id:09d}-{k + 1:02d}')
+                    payments['is_confirmed'].append(True)
+                    payments['created_at'].append(datetime.combine(paid_on, datetime.min.time(), dt_timezone.utc))
+                
+                for trigger_type, threshold, period, payout in POLICY_TRIGGERS[policy_type]:
+                    trigger_id = int(self.take_ids(PolicyTrigger, 1)[0])
+                    fired = bool(end < self.end and rng.random() < TRIGGER_PROBABILITY)
+                    fired_on = start + timedelta(days=int(rng.integers(30, 330))) if fired else None
+                    triggers['id'].append(trigger_id)
+                    triggers['policy_id'].append(policy_id)
+                    triggers['trigger_type'].append(trigger_type)
+                    triggers['threshold_value'].append(threshold)
+                    triggers['measurement_period_days'].append(period)
+                    triggers['payout_percentage'].append(payout)
+                    triggers['is_triggered'].append(fired)
+                    triggers['trigger_date'].append(fired_on)
+                    triggers['created_at'].append(created)
+                    if not fired:
+                        continue
+                    
+                    claim_id = int(self.take_ids(InsuranceClaim, 1)[0])
+                    filed = datetime.combine(fired_on, datetime.min.time(), dt_timezone.utc)
+                    claims['policy_id'].append(policy_id)
+                    claims['claim_number'].append(f'LTC{claim_id:09d}')
+                    claims['claim_type'].append('automatic')
+                    claims['trigger_id'].append(trigger_id)
+                    claims['claim_amount'].append(round(coverage * payout / 100, 2))
+                    claims['description'].append(f'{trigger_type.replace("_", " ").capitalize()} threshold reached')
+                    claims['status'].append('paid')
+                    claims['processed_date'].append(fired_on + timedelta(days=3))
+                    claims['payout_date'].append(fired_on + timedelta(days=7))
+                    claims['created_at'].append(filed)
+                    claims['updated_at'].append(filed)
+        
+        payments['payment_method'] = _choice(rng, PAYMENT_METHODS, len(payments['policy_id'])).tolist()
+        self.writer.write(InsurancePolicy, policies)
+        self.writer.write(PolicyTrigger, triggers)
+        self.writer.write(PremiumPayment, payments)
+        self.writer.write(InsuranceClaim, claims)
+    
+    def _write_notifications(self, rng, user_ids, counties, crops):
+        n = len(user_ids)
+        n_days = len(self.days)
+        counts = rng.poisson(NOTIFICATIONS_PER_MONTH * n_days / 30.4, size=n)
+        user = np.repeat(np.arange(n), counts)
+        day = self.days[0] + rng.integers(0, n_days, size=len(user))
+        
+        kinds = list(NOTIFICATIONS)
+        kind = rng.choice(len(kinds), size=len(user), p=[NOTIFICATIONS[name][0] for name in kinds])
+        changes = rng.integers(-15, 16, size=len(user))
+        crop_picks = rng.random(len(user))
+        
+        titles, messages = [], []
+        for i, k in enumerate(kind):
+            _, _, _, title, message = NOTIFICATIONS[kinds[k]]
+            farm_crops = crops[user[i]]
+            values = {
+                'crop': farm_crops[int(crop_picks[i] * len(farm_crops))],
+                'county': counties[user[i]].replace('_', ' ').title(),
+                'change': f'{changes[i]:+d}',
+            }
+            titles.append(title.format(**values))
+            messages.append(message.format(**values))
+        
+        # Old notifications have mostly been read
+        age = (self.days[-1] - day).astype(int)
+        read = rng.random(len(user)) < np.where(age > 14, 0.85, 0.3)
+        seconds = rng.integers(6 * 3600, 21 * 3600, size=len(user))
+        created = _as_datetimes(day, seconds)
+        read_at = _as_datetimes(day, seconds + rng.integers(60, 2 * 86400, size=len(user)))
+        
+        self.writer.write(Notification, {
+            'user_id': user_ids[user].tolist(),
+            'notification_type': np.array(kinds, dtype=object)[kind].tolist(),
+            'title': titles,
+            'message': messages,
+            'priority': [NOTIFICATIONS[kinds[k]][1] for k in kind],
+            'is_read': read.tolist(),
+            'read_at': [stamp if flag else None for stamp, flag in zip(read_at, read)],
+            'sent_via_push': [True] * len(user),
+            'sent_via_sms': (rng.random(len(user)) < 0.3).tolist(),
+            'related_module': [NOTIFICATIONS[kinds[k]][2] for k in kind],
+            'created_at': created,
+        })
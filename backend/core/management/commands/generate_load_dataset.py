@@ -0,0 +1,90 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.load_dataset import LOAD_PASSWORD, LoadDatasetGenerator, RowWriter
+from datetime import date
+import time
+
+
+class Command(BaseCommand):
+    help = 'Generate a reproducible production-scale dataset for performance tests'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--farms', type=int, default=1000, help='Farmers (user + farm profile) to create')
+        parser.add_argument('--years', type=int, default=1, help='Years of history ending at --end-date')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (same arguments = same data)')
+        parser.add_argument(
+            '--end-date',
+            type=date.fromisoformat,
+            help='Last day of generated history, YYYY-MM-DD (default: today)'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT/COPY batch')
+        parser.add_argument('--farm-chunk', type=int, default=2000, help='Farms per transaction')
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help='Load rows with COPY FROM STDIN instead of bulk_create (PostgreSQL only)'
+        )
+        parser.add_argument(
+            '--skip',
+            nargs='+',
+            default=[],
+            choices=['market', 'weather', 'farms'],
+            help='Parts to leave out, e.g. when adding farms to an existing load dataset'
+        )
+    
+    def handle(self, *args, **options):
+        if options['farms'] < 1 or options['years'] < 1:
+            raise CommandError('--farms and --years must be at least 1')
+        if options['batch_size'] < 1 or options['farm_chunk'] < 1:
+            raise CommandError('--batch-size and --farm-chunk must be at least 1')
+        
+        try:
+            writer = RowWriter(batch_size=options['batch_size'], use_copy=options['copy'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        
+        generator = LoadDatasetGenerator(
+            writer,
+            farms=options['farms'],
+            years=options['years'],
+            seed=options['seed'],
+            end=options['end_date'],
+            farm_chunk=options['farm_chunk'],
+        )
+        skip = set(options['skip'])
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'Generating {options["farms"]:,} farms, {generator.start} to {generator.end} '
+            f'(seed {options["seed"]}, {"COPY" if options["copy"] else "bulk_create"})...'
+        ))
+        started = time.monotonic()
+        
+        if 'market' not in skip:
+            step = time.monotonic()
+            rows = generator.generate_market_prices()
+            self.stdout.write(f'  market prices: {rows:,} rows in {time.monotonic() - step:.1f}s')
+        
+        if 'weather' not in skip:
+            step = time.monotonic()
+            stations, rows = generator.generate_weather()
+            self.stdout.write(f'  weather: {rows:,} rows for {stations:,} stations in {time.monotonic() - step:.1f}s')
+        
+        if 'farms' not in skip:
+            for done in generator.farm_chunks():
+                written = sum(writer.counts.values())
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f'  farms: {done:,}/{options["farms"]:,} | {written:,} rows total | '
+                    f'{written / elapsed if elapsed > 0 else 0:,.0f} rows/s'
+                )
+        
+        generator.reset_sequences()
+        
+        elapsed = time.monotonic() - started
+        total = sum(writer.counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Wrote {total:,} rows in {elapsed:.1f}s ({total / elapsed if elapsed > 0 else 0:,.0f} rows/s)'
+        ))
+        for table, count in sorted(writer.counts.items()):
+            self.stdout.write(f'  - {table}: {count:,}')
+        if 'farms' not in skip:
+            self.stdout.write(f'  Every generated user can log in with password "{LOAD_PASSWORD}"')
@@ -0,0 +1,43 @@
+import csv
+import io
+import json
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class CSVRowsParser(BaseParser):
+    """text/csv body as a list of {header: value} dicts (values stay strings)"""
+    media_type = 'text/csv'
+    
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        try:
+            text = stream.read().decode(encoding).lstrip('\ufeff')
+        except UnicodeDecodeError as e:
+            raise ParseError(f'CSV parse error - {e}')
+        reader = csv.DictReader(io.StringIO(text))
+        if reader.fieldnames:
+            reader.fieldnames = [name.strip() for name in reader.fieldnames]
+        return list(reader)
+
+
+class NDJSONParser(BaseParser):
+    """application/x-ndjson body (one JSON object per line) as a list"""
+    media_type = 'application/x-ndjson'
+    
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        try:
+            text = stream.read().decode(encoding)
+        except UnicodeDecodeError as e:
+            raise ParseError(f'NDJSON parse error - {e}')
+        rows = []
+        for number, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError as e:
+                raise ParseError(f'NDJSON parse error on line {number} - {e}')
+        return rows
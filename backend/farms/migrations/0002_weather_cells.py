@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:48
+
+from django.db import migrations, models
+
+from climate.grid import cell_ids
+
+
+def assign_weather_cells(apps, schema_editor):
+    FarmProfile = apps.get_model('farms', 'FarmProfile')
+    farms = list(FarmProfile.objects.filter(latitude__isnull=False, longitude__isnull=False).only('id', 'latitude', 'longitude'))
+    if not farms:
+        return
+    cells = cell_ids([farm.latitude for farm in farms], [farm.longitude for farm in farms])
+    for farm, cell in zip(farms, cells.tolist()):
+        farm.weather_cell = cell
+    FarmProfile.objects.bulk_update(farms, ['weather_cell'], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+    
+    dependencies = [
+        ('farms', '0001_initial'),
+    ]
+    
+    operations = [
+        migrations.AddField(
+            model_name='farmprofile',
+            name='weather_cell',
+            field=models.BigIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(assign_weather_cells, migrations.RunPython.noop),
+    ]
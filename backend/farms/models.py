@@ -3,6 +3,8 @@ from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 
+from climate.grid import cell_id
+
 User = get_user_model()
 
 
@@ -33,6 +35,9 @@ class FarmProfile(models.Model):
     latitude = models.DecimalField(max_digits=10, decimal_places=8, null=True, blank=True)
     longitude = models.DecimalField(max_digits=11, decimal_places=8, null=True, blank=True)
     
+    # Weather grid cell of the coordinates (see climate.grid), set on save
+    weather_cell = models.BigIntegerField(null=True, blank=True, editable=False, db_index=True)
+    
     # Farm details
     size_acres = models.DecimalField(
         max_digits=8, 
@@ -66,6 +71,11 @@ class FarmProfile(models.Model):
     def __str__(self):
         return f"{self.user.email} - {self.farm_name or self.location}"
     
+    def save(self, *args, **kwargs):
+        """Assign the weather grid cell from the coordinates"""
+        self.weather_cell = cell_id(self.latitude, self.longitude)
+        super().save(*args, **kwargs)
+    
     @property
     def total_harvests(self):
         """Total number of harvest records"""
@@ -6,7 +6,9 @@ from datetime import date, timedelta
 from decimal import Decimal
 
 from .models import InsurancePolicy, PolicyTrigger, InsuranceClaim, PremiumPayment, PolicyRecommendation
-from climate.models import WeatherData, ClimateRisk
+from climate.models import ClimateRisk
+from climate.accumulators import station_totals, longest_dry_spell
+from climate.stations import resolve_station
 from .serializers import (
     InsurancePolicySerializer,
     PolicyCreateSerializer,
@@ -78,67 +80,51 @@ class EvaluateTriggersView(APIView):
                 'error': 'Policy is not active or has expired'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Get weather data for farm location
+        # Station serving the farm; window totals come from its climate accumulators
+        station = resolve_station(farm.latitude, farm.longitude, farm.weather_cell)
         triggers_activated = []
         
         for trigger in policy.triggers.filter(is_triggered=False):
             is_activated = False
             trigger_value = None
             
-            # Get weather data for measurement period
+            # Observation totals for the measurement period
             period_start = date.today() - timedelta(days=trigger.measurement_period_days)
-            weather_data = WeatherData.objects.filter(
-                latitude=farm.latitude,
-                longitude=farm.longitude,
-                date__gte=period_start,
-                date__lte=date.today(),
-                forecast_date__isnull=True
-            )
+            totals = station_totals(station, period_start, date.today())
             
-            if weather_data.exists():
+            if totals:
                 if trigger.trigger_type == 'rainfall_deficit':
                     # Sum total rainfall
-                    total_rainfall = weather_data.aggregate(Sum('rainfall'))['rainfall__sum'] or 0
+                    total_rainfall = totals['rainfall']
                     trigger_value = float(total_rainfall)
                     
                     if total_rainfall < trigger.threshold_value:
                         is_activated = True
                 
                 elif trigger.trigger_type == 'rainfall_excess':
-                    total_rainfall = weather_data.aggregate(Sum('rainfall'))['rainfall__sum'] or 0
+                    total_rainfall = totals['rainfall']
                     trigger_value = float(total_rainfall)
                     
                     if total_rainfall > trigger.threshold_value:
                         is_activated = True
                 
                 elif trigger.trigger_type == 'temperature_high':
-                    from django.db.models import Avg
-                    avg_temp = weather_data.aggregate(Avg('temp_avg'))['temp_avg__avg'] or 0
+                    avg_temp = totals['avg_temp']
                     trigger_value = float(avg_temp)
                     
                     if avg_temp > trigger.threshold_value:
                         is_activated = True
                 
                 elif trigger.trigger_type == 'temperature_low':
-                    from django.db.models import Avg
-                    avg_temp = weather_data.aggregate(Avg('temp_avg'))['temp_avg__avg'] or 0
+                    avg_temp = totals['avg_temp']
                     trigger_value = float(avg_temp)
                     
                     if avg_temp < trigger.threshold_value:
                         is_activated = True
                 
                 elif trigger.trigger_type == 'consecutive_dry_days':
-                    # Count consecutive days with rainfall < 1mm
-                    dry_days = 0
-                    max_dry_days = 0
-                    
-                    for day in weather_data.order_by('date'):
-                        if day.rainfall < 1:
-                            dry_days += 1
-                            max_dry_days = max(max_dry_days, dry_days)
-                        else:
-                            dry_days = 0
-                    
+                    # Longest run of days with rainfall < 1mm
+                    max_dry_days = longest_dry_spell(station, period_start, date.today())
                     trigger_value = max_dry_days
                     
                     if max_dry_days >= trigger.threshold_value:
@@ -1,5 +1,15 @@
 from django.contrib import admin
-from .models import MarketPrice, PriceAlert, PriceForecast
+from django.utils import timezone
+
+from .ingest import ingest_prices
+from .models import (
+    MarketPrice,
+    MarketPriceLatest,
+    MarketPriceStats,
+    QuarantinedPrice,
+    PriceAlert,
+    PriceForecast,
+)
 
 
 @admin.register(MarketPrice)
@@ -18,6 +28,62 @@ class MarketPriceAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at', 'updated_at']
 
 
+@admin.register(MarketPriceLatest)
+class MarketPriceLatestAdmin(admin.ModelAdmin):
+    list_display = ['crop', 'market', 'price_per_kg', 'date', 'source', 'updated_at']
+    list_filter = ['crop', 'market', 'source']
+    search_fields = ['crop', 'market']
+    ordering = ['crop', 'market']
+    readonly_fields = ['crop', 'market', 'market_price', 'price_per_kg', 'date', 'source', 'updated_at']
+    
+    actions = ['refresh_latest_prices']
+    
+    def refresh_latest_prices(self, request, queryset):
+        MarketPriceLatest.objects.refresh()
+    refresh_latest_prices.short_description = "Rebuild latest prices from market data"
+
+
+@admin.register(MarketPriceStats)
+class MarketPriceStatsAdmin(admin.ModelAdmin):
+    list_display = ['crop', 'market', 'mean', 'count', 'updated_at']
+    list_filter = ['crop', 'market']
+    ordering = ['crop', 'market']
+    readonly_fields = ['crop', 'market', 'count', 'mean', 'm2', 'updated_at']
+
+
+@admin.register(QuarantinedPrice)
+class QuarantinedPriceAdmin(admin.ModelAdmin):
+    list_display = ['crop', 'market', 'price_per_kg', 'date', 'z_score', 'rolling_mean', 'source', 'status', 'created_at']
+    list_filter = ['status', 'crop', 'market', 'source']
+    search_fields = ['crop', 'market']
+    date_hierarchy = 'created_at'
+    readonly_fields = ['z_score', 'rolling_mean', 'rolling_std', 'reviewed_at', 'created_at']
+    
+    actions = ['approve_prices', 'reject_prices']
+    
+    def approve_prices(self, request, queryset):
+        pending = queryset.filter(status='pending')
+        ingest_prices(
+            [
+                {
+                    'crop': price.crop,
+                    'market': price.market,
+                    'date': price.date,
+                    'price_per_kg': price.price_per_kg,
+                    'source': price.source,
+                }
+                for price in pending
+            ],
+            screen=False
+        )
+        pending.update(status='approved', reviewed_at=timezone.now())
+    approve_prices.short_description = "Approve and load selected prices"
+    
+    def reject_prices(self, request, queryset):
+        queryset.filter(status='pending').update(status='rejected', reviewed_at=timezone.now())
+    reject_prices.short_description = "Reject selected prices"
+
+
 @admin.register(PriceAlert)
 class PriceAlertAdmin(admin.ModelAdmin):
     list_display = ['user', 'crop', 'target_price', 'market', 'is_active', 'triggered_at', 'created_at']
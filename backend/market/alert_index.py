@@ -0,0 +1,158 @@
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+import threading
+import time
+
+from django.db.models import Max
+
+from .models import PriceAlert
+
+# Refreshes re-read this far behind the watermark, so alerts committed late
+# by a slow transaction (with an earlier updated_at) are still picked up
+REFRESH_OVERLAP = timedelta(seconds=30)
+
+
+class PriceAlertIndex:
+    """
+    Process-local index of active price alert thresholds
+    
+    Alerts are grouped by (crop, market) into target prices kept sorted,
+    with a parallel list of alert ids. Finding every alert with
+    target_price <= price is a bisect plus a slice: O(log n + k).
+    
+    Loaded lazily from the database on first use and kept in sync by the
+    PriceAlert signals in market.signals. Alerts edited by other processes
+    are picked up from their updated_at by refresh(), which alert matching
+    calls before every lookup (an indexed delta query); other lookups
+    refresh at most every refresh_seconds. Bulk writes that bypass
+    signals should call invalidate().
+    """
+    
+    def __init__(self, refresh_seconds=60):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._targets = {}
+        self._ids = {}
+        self._entries = {}
+        self._watermark = None
+        self._checked_at = 0.0
+    
+    @property
+    def loaded(self):
+        return self._loaded
+    
+    def _load(self):
+        watermark = PriceAlert.objects.aggregate(last=Max('updated_at'))['last']
+        alerts = PriceAlert.objects.filter(
+            is_active=True,
+            triggered_at__isnull=True
+        ).order_by('crop', 'market', 'target_price', 'id').values_list(
+            'id', 'crop', 'market', 'target_price'
+        )
+        
+        self._targets, self._ids, self._entries = {}, {}, {}
+        for alert_id, crop, market, target in alerts.iterator(chunk_size=10000):
+            key = (crop, market)
+            self._targets.setdefault(key, []).append(target)
+            self._ids.setdefault(key, []).append(alert_id)
+            self._entries[alert_id] = (key, target)
+        self._watermark = watermark
+        self._checked_at = time.monotonic()
+        self._loaded = True
+    
+    def _refresh(self):
+        """Apply alerts changed since the last load or refresh"""
+        changed = PriceAlert.objects.order_by('updated_at').values_list(
+            'id', 'crop', 'market', 'target_price', 'is_active', 'triggered_at', 'updated_at'
+        )
+        if self._watermark is not None:
+            # Overlapping so late commits and writes sharing the watermark are not missed;
+            # re-applying a row is harmless
+            changed = changed.filter(updated_at__gte=self._watermark - REFRESH_OVERLAP)
+        for alert_id, crop, market, target, is_active, triggered_at, updated_at in changed:
+            self._remove(alert_id)
+            if is_active and triggered_at is None:
+                self._insert(alert_id, (crop, market), target)
+            self._watermark = updated_at
+        self._checked_at = time.monotonic()
+    
+    def _ensure_loaded(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._load()
+        elif time.monotonic() - self._checked_at >= self.refresh_seconds:
+            with self._lock:
+                self._refresh()
+    
+    def warm(self):
+        """Load the index now (e.g. after a cold-start match went through SQL)"""
+        self._ensure_loaded()
+    
+    def refresh(self):
+        """Load the index, or apply alerts changed by any process since the last refresh"""
+        with self._lock:
+            if self._loaded:
+                self._refresh()
+            else:
+                self._load()
+    
+    def invalidate(self):
+        """Drop the index so it is rebuilt on next use"""
+        with self._lock:
+            self._loaded = False
+            self._targets, self._ids, self._entries = {}, {}, {}
+    
+    def _remove(self, alert_id):
+        entry = self._entries.pop(alert_id, None)
+        if entry is None:
+            return
+        key, target = entry
+        targets, ids = self._targets[key], self._ids[key]
+        position = bisect_left(targets, target)
+        while ids[position] != alert_id:
+            position += 1
+        del targets[position]
+        del ids[position]
+    
+    def _insert(self, alert_id, key, target):
+        targets = self._targets.setdefault(key, [])
+        ids = self._ids.setdefault(key, [])
+        position = bisect_right(targets, target)
+        targets.insert(position, target)
+        ids.insert(position, alert_id)
+        self._entries[alert_id] = (key, target)
+    
+    def update(self, alert):
+        """Add, move or drop one alert depending on its current state"""
+        if not self._loaded:
+            return
+        with self._lock:
+            self._remove(alert.pk)
+            if alert.is_active and alert.triggered_at is None:
+                self._insert(alert.pk, (alert.crop, alert.market), alert.target_price)
+    
+    def discard(self, alert_ids):
+        """Remove alerts (e.g. after they were triggered by a bulk UPDATE)"""
+        if not self._loaded:
+            return
+        with self._lock:
+            for alert_id in alert_ids:
+                self._remove(alert_id)
+    
+    def matching(self, crop, market, price):
+        """Ids of active alerts for crop/market with target_price <= price"""
+        self._ensure_loaded()
+        with self._lock:
+            targets = self._targets.get((crop, market))
+            if not targets:
+                return []
+            return self._ids[(crop, market)][:bisect_right(targets, price)]
+    
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._entries)
+
+
+price_alert_index = PriceAlertIndex()
@@ -0,0 +1,152 @@
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+
+from communication.models import Notification, NotificationPreference
+
+from .models import MarketPriceLatest, PriceAlert
+from .alert_index import price_alert_index
+
+UPDATE_BATCH_SIZE = 5000
+
+
+def _index_hits(pairs):
+    """
+    Alerts met by the latest prices, found through the in-memory index
+    
+    The index is refreshed first so alerts created or edited by other
+    processes are matched. It only proposes ids; they are re-checked
+    against the database so alerts deleted or triggered elsewhere are
+    never fired.
+    """
+    price_alert_index.refresh()
+    latest = {
+        (crop, market): price
+        for crop, market, price in MarketPriceLatest.objects.filter(
+            crop__in={crop for crop, _ in pairs},
+            market__in={market for _, market in pairs},
+        ).values_list('crop', 'market', 'price_per_kg')
+        if (crop, market) in pairs
+    }
+    candidates = [
+        alert_id
+        for (crop, market), price in latest.items()
+        for alert_id in price_alert_index.matching(crop, market, price)
+    ]
+    
+    hits = []
+    for start in range(0, len(candidates), UPDATE_BATCH_SIZE):
+        hits.extend(
+            (alert_id, user_id, crop, market, target, latest[(crop, market)])
+            for alert_id, user_id, crop, market, target in PriceAlert.objects.filter(
+                pk__in=candidates[start:start + UPDATE_BATCH_SIZE],
+                is_active=True,
+                triggered_at__isnull=True,
+            ).values_list('id', 'user_id', 'crop', 'market', 'target_price')
+            if target <= latest[(crop, market)]
+        )
+    return hits
+
+
+def _sql_hits(pairs, latest_price):
+    """Alerts met by the latest prices, matched in one query (index not loaded yet)"""
+    hits = list(
+        PriceAlert.objects.filter(
+            crop__in={crop for crop, _ in pairs},
+            market__in={market for _, market in pairs},
+            is_active=True,
+            triggered_at__isnull=True,
+        ).annotate(
+            latest_price=latest_price
+        ).filter(
+            target_price__lte=F('latest_price')
+        ).values_list('id', 'user_id', 'crop', 'market', 'target_price', 'latest_price')
+    )
+    return [hit for hit in hits if (hit[2], hit[3]) in pairs]
+
+
+def match_price_alerts(pairs):
+    """
+    Trigger every active alert whose target is met by the latest price
+    
+    - pairs: (crop, market) pairs whose prices just changed
+    
+    Candidates come from the in-memory threshold index (a bisect per pair),
+    refreshed from PriceAlert.updated_at before each match. On a cold
+    start, before the index is loaded, they are matched against
+    MarketPriceLatest in one query instead and the index is loaded
+    afterwards. Alerts are claimed with SELECT ... FOR UPDATE SKIP LOCKED,
+    marked with one UPDATE per batch and notified with bulk_create; only
+    the alerts this call claimed are notified. Returns the number of
+    alerts triggered.
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return 0
+    
+    latest_price = Subquery(
+        MarketPriceLatest.objects.filter(
+            crop=OuterRef('crop'),
+            market=OuterRef('market'),
+        ).values('price_per_kg')[:1]
+    )
+    
+    cold = not price_alert_index.loaded
+    hits = _sql_hits(pairs, latest_price) if cold else _index_hits(pairs)
+    if not hits:
+        if cold:
+            price_alert_index.warm()
+        return 0
+    
+    now = timezone.now()
+    muted_users = set(
+        NotificationPreference.objects.filter(
+            user_id__in={hit[1] for hit in hits},
+            price_alerts=False,
+        ).values_list('user_id', flat=True)
+    )
+    
+    with transaction.atomic():
+        # Claim the alerts first: rows locked or already triggered by a
+        # concurrent match are skipped, so each alert is notified once
+        claimed = set()
+        for start in range(0, len(hits), UPDATE_BATCH_SIZE):
+            batch_ids = list(
+                PriceAlert.objects.select_for_update(skip_locked=True).filter(
+                    pk__in=[hit[0] for hit in hits[start:start + UPDATE_BATCH_SIZE]],
+                    is_active=True,
+                    triggered_at__isnull=True,
+                ).values_list('id', flat=True)
+            )
+            if batch_ids:
+                PriceAlert.objects.filter(pk__in=batch_ids).update(
+                    triggered_at=now,
+                    triggered_price=latest_price,
+                    updated_at=now,
+                )
+            claimed.update(batch_ids)
+        
+        Notification.objects.bulk_create(
+            [
+                Notification(
+                    user_id=user_id,
+                    notification_type='price_alert',
+                    title=f'{crop} price alert',
+                    message=(
+                        f'{crop} in {market} is now KES {price:.2f}/kg, '
+                        f'at or above your target of KES {target:.2f}/kg.'
+                    ),
+                    priority='high',
+                    related_module='market',
+                    related_object_id=alert_id,
+                )
+                for alert_id, user_id, crop, market, target, price in hits
+                if alert_id in claimed and user_id not in muted_users
+            ],
+            batch_size=UPDATE_BATCH_SIZE,
+        )
+    
+    price_alert_index.discard(hit[0] for hit in hits)
+    if cold:
+        price_alert_index.warm()
+    return len(claimed)
@@ -0,0 +1,347 @@
+from collections import OrderedDict
+import pickle
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import F
+
+from .models import AnalyticsVersion
+
+DEFAULTS = {
+    'BACKEND': 'local',
+    'LOCATION': 'redis://localhost:6379/1',
+    'KEY_PREFIX': 'market-analytics',
+    'MAX_ENTRIES': 2048,
+    'TIMEOUT': 60 * 60 * 24,
+    # Local backend only: how often to read the shared version counters for
+    # writes made by other processes
+    'VERSION_POLL_SECONDS': 5,
+}
+
+_MISSING = object()
+
+# Scope of entries that depend on every crop/market (e.g. spreads across all crops)
+ALL_SCOPE = '*:*'
+
+# Shared counter standing for the global version (every entry)
+GLOBAL_SCOPE = '*'
+
+
+def scope_of(crop, market):
+    """Version scope of an entry: 'crop:market', 'crop:*' for every market, or ALL_SCOPE"""
+    crop = '*' if crop in (None, 'all') else crop
+    return f"{crop}:{market or '*'}"
+
+
+def scopes_for(pairs):
+    """Scopes whose entries go stale when prices or forecasts of these (crop, market) pairs change"""
+    scopes = {ALL_SCOPE}
+    for crop, market in pairs:
+        scopes.add(f'{crop}:{market}')
+        scopes.add(f'{crop}:*')
+    return scopes
+
+
+def shared_versions():
+    """{scope: version} of the shared AnalyticsVersion counters (one small row per scope)"""
+    return dict(AnalyticsVersion.objects.values_list('scope', 'version'))
+
+
+def record_bump(scopes):
+    """Increment the shared counters of these scopes; returns their new {scope: version}"""
+    scopes = sorted(scopes)
+    with transaction.atomic():
+        AnalyticsVersion.objects.bulk_create(
+            [AnalyticsVersion(scope=scope) for scope in scopes],
+            ignore_conflicts=True,
+        )
+        AnalyticsVersion.objects.filter(scope__in=scopes).update(version=F('version') + 1)
+        return dict(AnalyticsVersion.objects.filter(scope__in=scopes).values_list('scope', 'version'))
+
+
+class LocalBackend:
+    """
+    Bounded in-process LRU store
+    
+    Holds at most max_entries values; the least recently read entry is
+    evicted first, including entries left behind by a version bump.
+    Versions and counters live in this process only.
+    """
+    shared = False
+    
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._version = 1
+        self._scopes = {}
+        self._counters = {}
+    
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is not _MISSING:
+                self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters['evictions'] = self._counters.get('evictions', 0) + 1
+    
+    def version(self, scope):
+        """(global version, scope version)"""
+        with self._lock:
+            return self._version, self._scopes.get(scope, 0)
+    
+    def bump_version(self, scopes=None):
+        """
+        Bump the given scopes' versions, or the global one when scopes is None
+        
+        Entries under older versions are never read again and age out of
+        the LRU; nothing is cleared here.
+        """
+        with self._lock:
+            if scopes is None:
+                self._version += 1
+                return
+            for scope in scopes:
+                self._scopes[scope] = self._scopes.get(scope, 0) + 1
+    
+    def count(self, *names):
+        with self._lock:
+            for name in names:
+                self._counters[name] = self._counters.get(name, 0) + 1
+    
+    def counters(self):
+        with self._lock:
+            return dict(self._counters)
+    
+    def size(self):
+        return len(self._entries)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters = {}
+
+
+class RedisBackend:
+    """
+    Store shared by every process through Redis
+    
+    - client: any redis-py compatible client (e.g. fakeredis.FakeRedis()
+      in tests); built from location when omitted
+    
+    Values are pickled and expire after timeout seconds; the versions
+    (one hash field per scope) and the counters are Redis keys, so they
+    are fleet-wide.
+    """
+    shared = True
+    
+    def __init__(self, location=DEFAULTS['LOCATION'], prefix=DEFAULTS['KEY_PREFIX'],
+                 timeout=DEFAULTS['TIMEOUT'], client=None):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise ImproperlyConfigured("MARKET_ANALYTICS_CACHE BACKEND 'redis' requires the redis package")
+            client = redis.Redis.from_url(location)
+        self.client = client
+        self.prefix = prefix
+        self.timeout = timeout
+        self._versions_key = f'{prefix}:versions'
+        self._counters_key = f'{prefix}:counters'
+    
+    def get(self, key):
+        value = self.client.get(f'{self.prefix}:{key}')
+        return _MISSING if value is None else pickle.loads(value)
+    
+    def set(self, key, value):
+        self.client.set(f'{self.prefix}:{key}', pickle.dumps(value), ex=self.timeout)
+    
+    def version(self, scope):
+        """(global version, scope version), one round trip"""
+        version, scope_version = self.client.hmget(self._versions_key, ['', scope])
+        return int(version or 0), int(scope_version or 0)
+    
+    def bump_version(self, scopes=None):
+        # Old entries are left to expire; no reader asks for them any more
+        pipeline = self.client.pipeline(transaction=False)
+        for scope in ([''] if scopes is None else scopes):
+            pipeline.hincrby(self._versions_key, scope, 1)
+        pipeline.execute()
+    
+    def count(self, *names):
+        pipeline = self.client.pipeline(transaction=False)
+        for name in names:
+            pipeline.hincrby(self._counters_key, name, 1)
+        pipeline.execute()
+    
+    def counters(self):
+        return {
+            (name.decode() if isinstance(name, bytes) else name): int(value)
+            for name, value in self.client.hgetall(self._counters_key).items()
+        }
+    
+    def size(self):
+        return None
+    
+    def clear(self):
+        self.client.delete(self._counters_key)
+
+
+class AnalyticsCache:
+    """
+    Cache for market computations keyed by
+    (endpoint, crop, market, window, data_version)
+    
+    data_version is the global version plus the version of the entry's
+    scope (its crop/market, see scope_of). Writes bump only the scopes of
+    the pairs they touched (see bump_data_version), so entries never need
+    explicit invalidation and other crops' entries stay valid. With the
+    local backend every bump is also counted in the AnalyticsVersion table,
+    and each process reads those counters every VERSION_POLL_SECONDS to
+    notice writes made by other processes; the table has one row per
+    scope, so the poll costs the same however much data is stored.
+    """
+    
+    def __init__(self, backend, poll_seconds=DEFAULTS['VERSION_POLL_SECONDS']):
+        self.backend = backend
+        self.poll_seconds = poll_seconds
+        self._versions = None
+        self._polled_at = 0.0
+        self._poll_lock = threading.Lock()
+    
+    def data_version(self, crop=None, market=None):
+        if not self.backend.shared:
+            self._poll()
+        version, scope_version = self.backend.version(scope_of(crop, market))
+        return f'{version}.{scope_version}'
+    
+    def _poll(self):
+        now = time.monotonic()
+        if now - self._polled_at < self.poll_seconds:
+            return
+        with self._poll_lock:
+            if now - self._polled_at < self.poll_seconds:
+                return
+            versions = shared_versions()
+            if self._versions is not None:
+                changed = {
+                    scope for scope in versions.keys() | self._versions.keys()
+                    if versions.get(scope) != self._versions.get(scope)
+                }
+                if GLOBAL_SCOPE in changed:
+                    self.backend.bump_version()
+                elif changed:
+                    self.backend.bump_version(changed)
+            self._versions = versions
+            self._polled_at = now
+    
+    def bump(self, pairs=None):
+        """Invalidate entries for these (crop, market) pairs, or every entry when None"""
+        scopes = None if pairs is None else scopes_for(pairs)
+        self.backend.bump_version(scopes)
+        if not self.backend.shared:
+            seen = record_bump([GLOBAL_SCOPE] if scopes is None else scopes)
+            # Already applied here, so the next poll does not bump them again
+            with self._poll_lock:
+                if self._versions is not None:
+                    self._versions.update(seen)
+    
+    def get_or_compute(self, endpoint, crop, market, window, compute):
+        """
+        Cached compute() for one endpoint call
+        
+        - window: hashable tuple of the remaining parameters that shape the
+          answer (days, model, today's date, ...)
+        
+        None results are cached as well.
+        """
+        key = f'{endpoint}:{crop}:{market}:{window!r}:v{self.data_version(crop, market)}'
+        value = self.backend.get(key)
+        if value is not _MISSING:
+            self.backend.count('hits', f'hits:{endpoint}')
+            return value
+        
+        self.backend.count('misses', f'misses:{endpoint}')
+        value = compute()
+        self.backend.set(key, value)
+        return value
+    
+    def stats(self):
+        counters = self.backend.counters()
+        endpoints = {}
+        for name, value in counters.items():
+            kind, _, endpoint = name.partition(':')
+            if endpoint:
+                endpoints.setdefault(endpoint, {'hits': 0, 'misses': 0})[kind] = value
+        hits, misses = counters.get('hits', 0), counters.get('misses', 0)
+        return {
+            'backend': 'redis' if self.backend.shared else 'local',
+            'data_version': self.data_version(),
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None,
+            'evictions': counters.get('evictions', 0),
+            'entries': self.backend.size(),
+            'max_entries': getattr(self.backend, 'max_entries', None),
+            'endpoints': endpoints,
+        }
+
+
+def build_cache(config=None, client=None):
+    """AnalyticsCache from a MARKET_ANALYTICS_CACHE-style dict (client: Redis stand-in)"""
+    config = {**DEFAULTS, **(config or {})}
+    if config['BACKEND'] == 'local':
+        backend = LocalBackend(max_entries=config['MAX_ENTRIES'])
+    elif config['BACKEND'] == 'redis':
+        backend = RedisBackend(
+            location=config['LOCATION'],
+            prefix=config['KEY_PREFIX'],
+            timeout=config['TIMEOUT'],
+            client=client,
+        )
+    else:
+        raise ImproperlyConfigured(
+            f"MARKET_ANALYTICS_CACHE BACKEND must be 'local' or 'redis', not {config['BACKEND']!r}"
+        )
+    return AnalyticsCache(backend, poll_seconds=config['VERSION_POLL_SECONDS'])
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def analytics_cache():
+    """The process-wide AnalyticsCache built from settings.MARKET_ANALYTICS_CACHE"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = build_cache(getattr(settings, 'MARKET_ANALYTICS_CACHE', None))
+    return _cache
+
+
+def cached(endpoint, crop, market, window, compute):
+    return analytics_cache().get_or_compute(endpoint, crop, market, window, compute)
+
+
+def bump_data_version(pairs=None):
+    """
+    Invalidate cached analytics once the current transaction (if any) commits
+    
+    - pairs: (crop, market) pairs whose prices or forecasts changed;
+      None invalidates everything
+    """
+    pairs = None if pairs is None else set(pairs)
+    if pairs is not None and not pairs:
+        return
+    transaction.on_commit(lambda: analytics_cache().bump(pairs))
@@ -0,0 +1,220 @@
+from itertools import groupby
+
+import numpy as np
+from django.db import transaction
+
+from .models import MarketPrice, MarketPriceStats, QuarantinedPrice
+
+# Past WINDOW prices the statistics become exponentially weighted
+# (alpha = 1/WINDOW), so they follow the recent price level
+WINDOW = 60
+
+# Prices are only screened once a crop/market has this much history
+MIN_HISTORY = 10
+
+Z_THRESHOLD = 4.0
+
+# Floor on the std as a fraction of the mean, so flat price runs don't
+# turn every small move into an outlier
+MIN_RELATIVE_STD = 0.05
+
+
+def welford_update(count, mean, m2, value):
+    """
+    One O(1) update of the (count, mean, m2) state with a new value
+    
+    Plain Welford until WINDOW values have been seen; after that the
+    count stays at WINDOW and mean/variance decay exponentially.
+    """
+    delta = value - mean
+    if count < WINDOW:
+        count += 1
+        mean += delta / count
+        m2 += delta * (value - mean)
+        return count, mean, m2
+    
+    alpha = 1.0 / WINDOW
+    mean += alpha * delta
+    variance = (1 - alpha) * (m2 / (count - 1) + alpha * delta * delta)
+    return count, mean, variance * (count - 1)
+
+
+def welford_replace(count, mean, m2, old, new):
+    """
+    Swap one value already folded into the state for a corrected one
+    
+    The sliding-window form of Welford's update: exact while the state is
+    a plain running mean, and the same correction applied to the
+    exponentially weighted state once WINDOW values have been seen.
+    """
+    if count == 0:
+        return welford_update(count, mean, m2, new)
+    new_mean = mean + (new - old) / count
+    m2 += (new - old) * (new - new_mean + old - mean)
+    return count, new_mean, max(m2, 0.0)
+
+
+def _load_states(pairs, lock=False):
+    """{(crop, market): MarketPriceStats} for the given pairs, one query"""
+    stats = MarketPriceStats.objects.filter(
+        crop__in={crop for crop, _ in pairs},
+        market__in={market for _, market in pairs},
+    )
+    if lock:
+        stats = stats.select_for_update()
+    return {
+        (row.crop, row.market): row
+        for row in stats
+        if (row.crop, row.market) in pairs
+    }
+
+
+def _write_states(states):
+    """Upsert {(crop, market): (count, mean, m2)} in one statement"""
+    MarketPriceStats.objects.bulk_create(
+        [
+            MarketPriceStats(crop=crop, market=market, count=count, mean=mean, m2=m2)
+            for (crop, market), (count, mean, m2) in states.items()
+        ],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['crop', 'market'],
+        update_fields=['count', 'mean', 'm2', 'updated_at'],
+    )
+
+
+def update_price_stats(inserted, replaced=()):
+    """
+    Fold written prices into the rolling statistics
+    
+    - inserted: (crop, market, date, price) of rows that were new
+    - replaced: (crop, market, old_price, new_price) of existing rows
+      whose price changed
+    
+    Call after the write succeeded, inside its transaction, so reloading
+    or resuming a load never counts a price twice. New values are applied
+    in date order per crop/market; the states are written with one bulk
+    upsert.
+    """
+    inserted = sorted(inserted, key=lambda row: (row[0], row[1], row[2]))
+    replaced = list(replaced)
+    if not inserted and not replaced:
+        return
+    pairs = {(crop, market) for crop, market, _, _ in inserted + replaced}
+    
+    with transaction.atomic():
+        states = _load_states(pairs, lock=True)
+        current = {
+            pair: (state.count, state.mean, state.m2)
+            for pair, state in states.items()
+        }
+        for crop, market, old, new in replaced:
+            count, mean, m2 = current.get((crop, market), (0, 0.0, 0.0))
+            current[(crop, market)] = welford_replace(count, mean, m2, float(old), float(new))
+        for crop, market, _, price in inserted:
+            count, mean, m2 = current.get((crop, market), (0, 0.0, 0.0))
+            current[(crop, market)] = welford_update(count, mean, m2, float(price))
+        _write_states(current)
+
+
+def score_prices(keys, values):
+    """
+    z-scores of prices against their crop/market's current rolling stats
+    
+    - keys: (crop, market) per price
+    - values: float prices
+    
+    Returns (z, mean, std, outlier) arrays; only series with MIN_HISTORY
+    prices can produce outliers.
+    """
+    states = _load_states(set(keys))
+    
+    empty = (0, 0.0, 0.0)
+    state = np.array([
+        (states[key].count, states[key].mean, states[key].m2) if key in states else empty
+        for key in keys
+    ], dtype=float).reshape(-1, 3)
+    count, mean, m2 = state[:, 0], state[:, 1], state[:, 2]
+    values = np.asarray(values, dtype=float)
+    
+    variance = np.divide(m2, count - 1, out=np.zeros(len(keys)), where=count > 1)
+    std = np.maximum(np.sqrt(variance), np.abs(mean) * MIN_RELATIVE_STD)
+    z = np.divide(values - mean, std, out=np.zeros(len(keys)), where=std > 0)
+    outlier = (count >= MIN_HISTORY) & (np.abs(z) > Z_THRESHOLD)
+    return z, mean, std, outlier
+
+
+def quarantine(row, z, mean, std):
+    """Unsaved QuarantinedPrice for a clean price row and its score"""
+    return QuarantinedPrice(
+        crop=row['crop'],
+        market=row['market'],
+        date=row['date'],
+        price_per_kg=row['price_per_kg'],
+        source=row['source'],
+        z_score=round(float(z), 3),
+        rolling_mean=float(mean),
+        rolling_std=float(std),
+    )
+
+
+def screen_prices(rows):
+    """
+    Split clean price rows into accepted rows and quarantined outliers
+    
+    - rows: validated dicts with crop, market, date, price_per_kg, source
+    
+    Every row is z-scored at once against its crop/market's rolling stats
+    as they stood before the batch. Rows with |z| > Z_THRESHOLD are
+    written to QuarantinedPrice (unless the same price is already pending
+    review) instead of being returned. The stats are not touched here;
+    upsert_prices folds in what it actually writes.
+    Returns (accepted, quarantined_count).
+    """
+    if not rows:
+        return [], 0
+    
+    z, mean, std, outlier = score_prices(
+        [(row['crop'], row['market']) for row in rows],
+        [float(row['price_per_kg']) for row in rows],
+    )
+    
+    if outlier.any():
+        flagged = np.flatnonzero(outlier)
+        # A re-run of the same rows (e.g. a resumed import) does not queue them twice
+        pending = set(QuarantinedPrice.objects.filter(
+            status='pending',
+            crop__in={rows[i]['crop'] for i in flagged},
+            market__in={rows[i]['market'] for i in flagged},
+            date__range=(min(rows[i]['date'] for i in flagged), max(rows[i]['date'] for i in flagged)),
+        ).values_list('crop', 'market', 'date', 'price_per_kg'))
+        QuarantinedPrice.objects.bulk_create(
+            [
+                quarantine(rows[i], z[i], mean[i], std[i])
+                for i in flagged
+                if (rows[i]['crop'], rows[i]['market'], rows[i]['date'], rows[i]['price_per_kg']) not in pending
+            ],
+            batch_size=1000,
+        )
+    
+    accepted = [rows[i] for i in np.flatnonzero(~outlier)]
+    return accepted, int(outlier.sum())
+
+
+def rebuild_price_stats():
+    """Recompute every crop/market's rolling stats from MarketPrice (initial backfill)"""
+    prices = MarketPrice.objects.order_by('crop', 'market', 'date').values_list(
+        'crop', 'market', 'price_per_kg'
+    )
+    states = {}
+    # Ordered by SQL, so each series streams through once without loading the table
+    for pair, series in groupby(prices.iterator(chunk_size=10000), key=lambda row: row[:2]):
+        count, mean, m2 = 0, 0.0, 0.0
+        for _, _, price in series:
+            count, mean, m2 = welford_update(count, mean, m2, float(price))
+        states[pair] = (count, mean, m2)
+    
+    with transaction.atomic():
+        MarketPriceStats.objects.all().delete()
+        _write_states(states)
+    return len(states)
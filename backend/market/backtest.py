@@ -0,0 +1,175 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+import time
+import tracemalloc
+
+import django
+import numpy as np
+from django.db import connections
+
+from .forecasting import MIN_OBSERVATIONS, MODEL_FUNCTIONS
+
+# Reference model scored alongside the real ones: tomorrow = last price
+BASELINE = 'naive'
+
+
+def forecast_naive(matrix, horizon):
+    """Last observed price carried forward (baseline for the backtest)"""
+    observed = ~np.isnan(matrix)
+    last_index = matrix.shape[1] - 1 - np.argmax(observed[:, ::-1], axis=1)
+    last = matrix[np.arange(matrix.shape[0]), last_index]
+    return np.broadcast_to(last[:, None], (matrix.shape[0], horizon)), None
+
+
+def backtest_functions(models):
+    functions = {model: MODEL_FUNCTIONS[model] for model in models}
+    functions[BASELINE] = forecast_naive
+    return functions
+
+
+def score_origins(matrix, origins, models, history_days, horizon):
+    """
+    Replay forecasts from each origin column of `matrix` and score them
+    
+    Runs inside a worker process. For every origin o the models see the
+    history_days columns ending at o and predict o+1 .. o+horizon.
+    Returns {model: totals} with per-step error sums and counts, total
+    fit+predict seconds and the peak traced memory of one call.
+    
+    Fits are timed with tracemalloc off, since tracing slows allocation
+    and would skew the comparison between models. Peak memory is measured
+    in a separate traced pass: one call per model on the chunk's largest
+    window (the most series with enough history).
+    """
+    functions = backtest_functions(models)
+    totals = {
+        model: {
+            'abs_error': np.zeros(horizon),
+            'abs_pct_error': np.zeros(horizon),
+            'points': np.zeros(horizon),
+            'pct_points': np.zeros(horizon),
+            'seconds': 0.0,
+            'peak_bytes': 0,
+            'fits': 0,
+        }
+        for model in functions
+    }
+    
+    largest = None
+    for origin in origins:
+        window = matrix[:, origin - history_days + 1:origin + 1]
+        enough = np.sum(~np.isnan(window), axis=1) >= MIN_OBSERVATIONS
+        if not enough.any():
+            continue
+        window = window[enough]
+        actual = matrix[enough, origin + 1:origin + 1 + horizon]
+        if largest is None or len(window) > len(largest):
+            largest = window
+        
+        observed = ~np.isnan(actual)
+        positive = observed & (np.nan_to_num(actual) > 0)
+        
+        for model, function in functions.items():
+            started = time.perf_counter()
+            predicted, _ = function(window, horizon)
+            elapsed = time.perf_counter() - started
+            
+            error = np.abs(np.where(observed, predicted - actual, 0.0))
+            pct_error = np.divide(error, actual, out=np.zeros_like(error), where=positive)
+            
+            model_totals = totals[model]
+            model_totals['abs_error'] += error.sum(axis=0)
+            model_totals['abs_pct_error'] += pct_error.sum(axis=0)
+            model_totals['points'] += observed.sum(axis=0)
+            model_totals['pct_points'] += positive.sum(axis=0)
+            model_totals['seconds'] += elapsed
+            model_totals['fits'] += 1
+    
+    if largest is not None:
+        tracemalloc.start()
+        try:
+            for model, function in functions.items():
+                before = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                function(largest, horizon)
+                totals[model]['peak_bytes'] = tracemalloc.get_traced_memory()[1] - before
+        finally:
+            tracemalloc.stop()
+    return totals
+
+
+def _merge(totals, part):
+    for model, values in part.items():
+        if model not in totals:
+            totals[model] = values
+            continue
+        current = totals[model]
+        for key in ('abs_error', 'abs_pct_error', 'points', 'pct_points', 'seconds', 'fits'):
+            current[key] = current[key] + values[key]
+        current['peak_bytes'] = max(current['peak_bytes'], values['peak_bytes'])
+
+
+def summarize(totals, report_steps=(1, 7, 14, 30)):
+    """Turn merged totals into MAE/MAPE (overall and at some horizons) per model"""
+    summary = {}
+    for model, values in totals.items():
+        points = values['points'].sum()
+        pct_points = values['pct_points'].sum()
+        by_step = {}
+        for step in report_steps:
+            if step <= len(values['points']) and values['points'][step - 1]:
+                i = step - 1
+                by_step[step] = {
+                    'mae': round(float(values['abs_error'][i] / values['points'][i]), 4),
+                    'mape': round(float(100 * values['abs_pct_error'][i] / max(values['pct_points'][i], 1)), 2),
+                }
+        summary[model] = {
+            'mae': round(float(values['abs_error'].sum() / points), 4) if points else None,
+            'mape': round(float(100 * values['abs_pct_error'].sum() / pct_points), 2) if pct_points else None,
+            'by_horizon': by_step,
+            'points': int(points),
+            'fits': int(values['fits']),
+            'seconds': round(values['seconds'], 4),
+            'ms_per_fit': round(1000 * values['seconds'] / values['fits'], 3) if values['fits'] else None,
+            'peak_memory_mb': round(values['peak_bytes'] / 2 ** 20, 3),
+        }
+    return summary
+
+
+def run_backtest(matrix, origins, models, history_days, horizon, workers=None, chunks_per_worker=4):
+    """
+    Score every model over all origins, split across a process pool
+    
+    Each task gets only the columns its origins need. Workers run
+    django.setup() so this also works with the 'spawn' start method.
+    """
+    workers = workers or os.cpu_count() or 1
+    origins = list(origins)
+    if not origins:
+        return {}
+    
+    chunk_count = max(1, min(len(origins), workers * chunks_per_worker))
+    chunks = [chunk for chunk in np.array_split(np.array(origins), chunk_count) if len(chunk)]
+    
+    def task(chunk):
+        first = int(chunk[0]) - history_days + 1
+        last = int(chunk[-1]) + horizon + 1
+        return matrix[:, first:last], [int(origin) - first for origin in chunk]
+    
+    totals = {}
+    if workers == 1:
+        for chunk in chunks:
+            columns, local_origins = task(chunk)
+            _merge(totals, score_origins(columns, local_origins, models, history_days, horizon))
+        return totals
+    
+    # Don't share open database sockets with forked workers
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+        futures = []
+        for chunk in chunks:
+            columns, local_origins = task(chunk)
+            futures.append(pool.submit(score_origins, columns, local_origins, models, history_days, horizon))
+        for future in futures:
+            _merge(totals, future.result())
+    return totals
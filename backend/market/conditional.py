@@ -0,0 +1,57 @@
+from datetime import datetime, time
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+from .models import MarketPriceLatest
+
+
+def price_version(crop=None, market=None):
+    """
+    (last_modified, etag) for the prices of a crop/market, from one small query
+    
+    MarketPriceLatest.updated_at is bumped on every price write for its
+    crop/market, so its max (plus the row count, which catches deletes)
+    changes whenever any price in scope does. Last-Modified never goes
+    below today's midnight because default date ranges move with the day.
+    """
+    latest = MarketPriceLatest.objects.all()
+    if crop:
+        latest = latest.filter(crop=crop)
+    if market:
+        latest = latest.filter(market=market)
+    stats = latest.aggregate(updated=Max('updated_at'), rows=Count('id'))
+    
+    today = timezone.localdate()
+    midnight = timezone.make_aware(datetime.combine(today, time.min))
+    last_modified = max(stats['updated'], midnight) if stats['updated'] else midnight
+    
+    version = f"{crop}:{market}:{stats['updated']}:{stats['rows']}:{today}"
+    return last_modified, hashlib.md5(version.encode()).hexdigest()
+
+
+def conditional_on_prices(default_market=None):
+    """
+    Answer If-None-Match / If-Modified-Since with 304 before the view runs
+    
+    Scope comes from the crop and market query params; market=all (or no
+    market and no default_market) covers every market. Applied to get()
+    as a class decorator, so authentication and permissions still run first.
+    """
+    def get_version(request, *args, **kwargs):
+        if not hasattr(request, '_price_version'):
+            market = request.GET.get('market', default_market)
+            request._price_version = price_version(
+                crop=request.GET.get('crop'),
+                market=None if market == 'all' else market,
+            )
+        return request._price_version
+    
+    decorator = condition(
+        etag_func=lambda request, *args, **kwargs: get_version(request)[1],
+        last_modified_func=lambda request, *args, **kwargs: get_version(request)[0],
+    )
+    return method_decorator(decorator, name='get')
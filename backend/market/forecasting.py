@@ -0,0 +1,258 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import MarketPrice, PriceForecast
+from .analytics_cache import bump_data_version
+
+HISTORY_DAYS = 30
+HORIZON_DAYS = 30
+MIN_OBSERVATIONS = 3
+SMOOTHING_ALPHA = 0.3
+
+FORECAST_MODELS = ['average', 'linear', 'exp_smoothing']
+
+# Names the forecast API has always reported; stored rows use the model keys
+API_MODEL_NAMES = {'average': 'moving_average'}
+
+
+def load_price_matrix(end_date=None, days=HISTORY_DAYS, pairs=None):
+    """
+    Load every crop x market series as one (series x days) matrix
+    
+    Missing days are NaN. Returns (keys, dates, matrix) where keys[i] is
+    the (crop, market) of row i and dates[j] the date of column j.
+    """
+    end_date = end_date or date.today()
+    start_date = end_date - timedelta(days=days)
+    
+    queryset = MarketPrice.objects.filter(date__gte=start_date, date__lte=end_date)
+    if pairs is not None:
+        pairs = set(pairs)
+        queryset = queryset.filter(
+            crop__in={crop for crop, _ in pairs},
+            market__in={market for _, market in pairs},
+        )
+    
+    rows = list(queryset.order_by().values_list('crop', 'market', 'date', 'price_per_kg'))
+    if pairs is not None:
+        rows = [row for row in rows if (row[0], row[1]) in pairs]
+    
+    dates = np.arange(np.datetime64(start_date, 'D'), np.datetime64(end_date, 'D') + 1)
+    if not rows:
+        return [], dates, np.empty((0, len(dates)))
+    
+    keys = sorted({(crop, market) for crop, market, _, _ in rows})
+    key_index = {key: i for i, key in enumerate(keys)}
+    
+    row_idx = np.array([key_index[(crop, market)] for crop, market, _, _ in rows])
+    col_idx = (np.array([row[2] for row in rows], dtype='datetime64[D]') - dates[0]).astype(int)
+    values = np.array([float(row[3]) for row in rows])
+    
+    matrix = np.full((len(keys), len(dates)), np.nan)
+    matrix[row_idx, col_idx] = values
+    return keys, dates, matrix
+
+
+def _compact(matrix):
+    """Shift each row's observations to the right, keeping their order"""
+    order = np.argsort(~np.isnan(matrix), axis=1, kind='stable')
+    return np.take_along_axis(matrix, order, axis=1)
+
+
+def forecast_average(matrix, horizon):
+    """
+    Moving average with a recent-trend factor (the original view's model)
+    
+    predicted = mean * trend_factor ** (0.9 ** day), where trend_factor is
+    the mean of the last 7 observations over the overall mean.
+    """
+    counts = np.sum(~np.isnan(matrix), axis=1)
+    mean = np.nanmean(matrix, axis=1)
+    
+    recent = _compact(matrix)[:, -7:]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        trend_factor = np.where(
+            (counts >= 7) & (mean > 0),
+            np.nanmean(recent, axis=1) / mean,
+            1.0
+        )
+    
+    steps = np.arange(1, horizon + 1)
+    predicted = mean[:, None] * trend_factor[:, None] ** (0.9 ** steps)[None, :]
+    confidence = np.broadcast_to(np.maximum(100 - steps * 3, 50), predicted.shape)
+    return predicted, confidence
+
+
+def forecast_linear(matrix, horizon):
+    """
+    Least-squares linear trend per series, ignoring missing days
+    
+    Confidence scales with the fit's R^2 and decays with the horizon.
+    """
+    n_days = matrix.shape[1]
+    x = np.broadcast_to(np.arange(n_days, dtype=float), matrix.shape)
+    observed = ~np.isnan(matrix)
+    weights = observed.astype(float)
+    y = np.where(observed, matrix, 0.0)
+    
+    counts = weights.sum(axis=1)
+    x_mean = (x * weights).sum(axis=1) / counts
+    y_mean = y.sum(axis=1) / counts
+    dx = (x - x_mean[:, None]) * weights
+    dy = (y - y_mean[:, None]) * weights
+    
+    sxx = (dx * dx).sum(axis=1)
+    sxy = (dx * dy).sum(axis=1)
+    syy = (dy * dy).sum(axis=1)
+    slope = np.divide(sxy, sxx, out=np.zeros_like(sxy), where=sxx > 0)
+    intercept = y_mean - slope * x_mean
+    r_squared = np.divide(sxy * sxy, sxx * syy, out=np.zeros_like(sxy), where=(sxx > 0) & (syy > 0))
+    
+    steps = np.arange(1, horizon + 1)
+    future_x = (n_days - 1) + steps
+    predicted = intercept[:, None] + slope[:, None] * future_x[None, :]
+    confidence = np.clip((50 + 45 * r_squared)[:, None] - steps[None, :], 10, 99)
+    return predicted, confidence
+
+
+def forecast_exp_smoothing(matrix, horizon, alpha=SMOOTHING_ALPHA):
+    """
+    Simple exponential smoothing over each series' observations
+    
+    Flat forecast at the final level. Confidence comes from the in-sample
+    one-step-ahead percentage error and decays with the horizon.
+    """
+    compact = _compact(matrix)
+    n_series, n_days = compact.shape
+    
+    level = np.full(n_series, np.nan)
+    abs_pct_error = np.zeros(n_series)
+    error_count = np.zeros(n_series)
+    
+    for t in range(n_days):
+        value = compact[:, t]
+        observed = ~np.isnan(value)
+        has_level = ~np.isnan(level)
+        
+        scored = observed & has_level & (value > 0)
+        abs_pct_error[scored] += np.abs(value[scored] - level[scored]) / value[scored]
+        error_count[scored] += 1
+        
+        start = observed & ~has_level
+        level[start] = value[start]
+        update = observed & has_level
+        level[update] = alpha * value[update] + (1 - alpha) * level[update]
+    
+    mape = np.divide(abs_pct_error, error_count, out=np.ones(n_series), where=error_count > 0)
+    
+    steps = np.arange(1, horizon + 1)
+    predicted = np.broadcast_to(level[:, None], (n_series, horizon))
+    confidence = np.clip((100 - 100 * mape)[:, None] - steps[None, :], 10, 99)
+    return predicted, confidence
+
+
+MODEL_FUNCTIONS = {
+    'average': forecast_average,
+    'linear': forecast_linear,
+    'exp_smoothing': forecast_exp_smoothing,
+}
+
+
+def fit_model(model, matrix, horizon):
+    """(predicted, confidence) for every series, rounded as stored in PriceForecast"""
+    predicted, confidence = MODEL_FUNCTIONS[model](matrix, horizon)
+    return np.round(np.maximum(predicted, 0.01), 2), np.round(confidence, 2)
+
+
+def forecast_series(crop, market, model, horizon, history_days=HISTORY_DAYS, end_date=None):
+    """
+    Forecast one series in memory, without storing anything
+    
+    Returns a list of (forecast_date, predicted_price, confidence) for the
+    next horizon days, or None when the series has fewer than
+    MIN_OBSERVATIONS prices in the window.
+    """
+    end_date = end_date or date.today()
+    keys, _, matrix = load_price_matrix(end_date=end_date, days=history_days, pairs=[(crop, market)])
+    if not keys or np.sum(~np.isnan(matrix[0])) < MIN_OBSERVATIONS:
+        return None
+    
+    predicted, confidence = fit_model(model, matrix, horizon)
+    return [
+        (end_date + timedelta(days=step), float(predicted[0, step - 1]), float(confidence[0, step - 1]))
+        for step in range(1, horizon + 1)
+    ]
+
+
+def forecasts_current(forecasts, crop, market, days_ahead, today=None, history_days=HISTORY_DAYS):
+    """
+    Whether stored PriceForecast rows can still be served for today
+    
+    They must cover every day of the horizon, have been generated today,
+    and be newer than the last change to the prices they were fitted on.
+    """
+    today = today or date.today()
+    if not forecasts or len(forecasts) < days_ahead:
+        return False
+    oldest = min(forecast.generated_at for forecast in forecasts)
+    if timezone.localtime(oldest).date() < today:
+        return False
+    last_change = MarketPrice.objects.filter(
+        crop=crop,
+        market=market,
+        date__gte=today - timedelta(days=history_days),
+        date__lte=today,
+    ).aggregate(last=Max('updated_at'))['last']
+    return last_change is None or oldest >= last_change
+
+
+def generate_forecasts(pairs=None, models=None, history_days=HISTORY_DAYS,
+                       horizon=HORIZON_DAYS, end_date=None):
+    """
+    Fit every model for every crop x market series and store PriceForecast rows
+    
+    Series with fewer than MIN_OBSERVATIONS prices in the window are
+    skipped. Returns the number of forecast rows written.
+    """
+    end_date = end_date or date.today()
+    models = models or FORECAST_MODELS
+    
+    keys, _, matrix = load_price_matrix(end_date=end_date, days=history_days, pairs=pairs)
+    enough = np.sum(~np.isnan(matrix), axis=1) >= MIN_OBSERVATIONS
+    keys = [key for key, ok in zip(keys, enough) if ok]
+    matrix = matrix[enough]
+    if not keys:
+        return 0
+    
+    forecast_dates = [end_date + timedelta(days=step) for step in range(1, horizon + 1)]
+    
+    forecasts = []
+    for model in models:
+        predicted, confidence = fit_model(model, matrix, horizon)
+        
+        for i, (crop, market) in enumerate(keys):
+            for j, forecast_date in enumerate(forecast_dates):
+                forecasts.append(PriceForecast(
+                    crop=crop,
+                    market=market,
+                    forecast_date=forecast_date,
+                    predicted_price=Decimal(f'{predicted[i, j]:.2f}'),
+                    confidence=Decimal(f'{confidence[i, j]:.2f}'),
+                    model_used=model,
+                ))
+    
+    with transaction.atomic():
+        PriceForecast.objects.bulk_create(
+            forecasts,
+            batch_size=2000,
+            update_conflicts=True,
+            unique_fields=['crop', 'market', 'forecast_date', 'model_used'],
+            update_fields=['predicted_price', 'confidence', 'generated_at'],
+        )
+        bump_data_version(keys)
+    return len(forecasts)
@@ -0,0 +1,230 @@
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+import numpy as np
+from django.db import transaction
+
+from .models import MarketPrice, MarketPriceLatest
+from .alerts import match_price_alerts
+from .anomalies import screen_prices, update_price_stats
+from .rollups import refresh_rollups
+from .analytics_cache import bump_data_version
+
+VALID_CROPS = np.array([choice for choice, _ in MarketPrice.CROP_CHOICES], dtype=object)
+VALID_MARKETS = np.array([choice for choice, _ in MarketPrice.MARKET_CHOICES], dtype=object)
+VALID_SOURCES = np.array([choice for choice, _ in MarketPrice.SOURCE_CHOICES], dtype=object)
+
+MAX_PRICE = Decimal('99999999.99')  # max_digits=10, decimal_places=2
+DEFAULT_BATCH_SIZE = 2000
+MAX_REPORTED_ERRORS = 100
+
+
+def _to_decimal(value):
+    if not isinstance(value, (str, int, float, Decimal)) or isinstance(value, bool):
+        return None
+    try:
+        price = Decimal(str(value).strip())
+        if not price.is_finite():
+            return None
+        if abs(price) > MAX_PRICE:
+            # Left unrounded (quantize would overflow); rejected as too large
+            return price
+        return price.quantize(Decimal('0.01'))
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+
+
+def _text(value):
+    """Strings pass through; anything else (lists, objects, numbers) becomes None"""
+    return value if isinstance(value, str) else None
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if not isinstance(value, str):
+        return None
+    try:
+        return date.fromisoformat(value.strip()[:10])
+    except (TypeError, ValueError):
+        return None
+
+
+def validate_price_rows(rows, default_source='api'):
+    """
+    Validate raw price rows column-wise
+    
+    Each row is a mapping with crop, market, date, price_per_kg (or price)
+    and optional source. Returns (valid, errors) where valid is a list of
+    clean dicts and errors is a list of {'row': index, 'error': message}.
+    """
+    n = len(rows)
+    if n == 0:
+        return [], []
+    
+    # Non-scalar values become None here and fail their check as per-row errors
+    crops = np.array([_text(row.get('crop')) for row in rows], dtype=object)
+    markets = np.array([_text(row.get('market') or 'national') for row in rows], dtype=object)
+    sources = np.array([_text(row.get('source') or default_source) for row in rows], dtype=object)
+    prices = np.array(
+        [_to_decimal(row.get('price_per_kg', row.get('price'))) for row in rows],
+        dtype=object
+    )
+    dates = np.array([_to_date(row.get('date')) for row in rows], dtype='datetime64[D]')
+    
+    price_values = np.array([float(p) if p is not None else np.nan for p in prices])
+    today = np.datetime64(date.today(), 'D')
+    
+    checks = [
+        (np.isin(crops, VALID_CROPS), 'invalid crop'),
+        (np.isin(markets, VALID_MARKETS), 'invalid market'),
+        (np.isin(sources, VALID_SOURCES), 'invalid source'),
+        (~np.isnan(price_values), 'invalid price'),
+        (np.nan_to_num(price_values) > 0, 'price must be greater than 0'),
+        (np.nan_to_num(price_values) <= float(MAX_PRICE), 'price too large'),
+        (~np.isnat(dates), 'invalid date'),
+        (np.where(np.isnat(dates), True, dates <= today), 'date cannot be in the future'),
+    ]
+    
+    ok = np.ones(n, dtype=bool)
+    errors = []
+    for passed, message in checks:
+        failed = ok & ~passed
+        errors.extend({'row': int(i), 'error': message} for i in np.flatnonzero(failed))
+        ok &= passed
+    errors.sort(key=lambda error: error['row'])
+    
+    valid = [
+        {
+            'crop': crops[i],
+            'market': markets[i],
+            'date': dates[i].item(),
+            'price_per_kg': prices[i],
+            'source': sources[i],
+        }
+        for i in np.flatnonzero(ok)
+    ]
+    return valid, errors
+
+
+def upsert_prices(rows, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Upsert clean price rows on (crop, market, date)
+    
+    Duplicate keys within the input keep the last occurrence. Each batch
+    runs in its own transaction, which also folds the rows it inserted
+    (and the new price of rows it changed) into the rolling statistics.
+    Returns (inserted, updated, touched) where touched maps each
+    (crop, market) written to its (first, last) date.
+    """
+    deduped = {}
+    for row in rows:
+        deduped[(row['crop'], row['market'], row['date'])] = row
+    rows = list(deduped.values())
+    
+    inserted = updated = 0
+    touched = {}
+    
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        keys = {(row['crop'], row['market'], row['date']) for row in batch}
+        dates = [row['date'] for row in batch]
+        
+        with transaction.atomic():
+            existing = {
+                (crop, market, day): price
+                for crop, market, day, price in MarketPrice.objects.filter(
+                    crop__in={row['crop'] for row in batch},
+                    market__in={row['market'] for row in batch},
+                    date__range=(min(dates), max(dates)),
+                ).values_list('crop', 'market', 'date', 'price_per_kg')
+                if (crop, market, day) in keys
+            }
+            
+            MarketPrice.objects.bulk_create(
+                [MarketPrice(**row) for row in batch],
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=['crop', 'market', 'date'],
+                update_fields=['price_per_kg', 'source', 'updated_at'],
+            )
+            
+            new_prices, replaced = [], []
+            for row in batch:
+                key = (row['crop'], row['market'], row['date'])
+                if key not in existing:
+                    new_prices.append((*key, row['price_per_kg']))
+                elif existing[key] != row['price_per_kg']:
+                    replaced.append((row['crop'], row['market'], existing[key], row['price_per_kg']))
+            update_price_stats(new_prices, replaced)
+        
+        updated += len(existing)
+        inserted += len(batch) - len(existing)
+        for row in batch:
+            pair = (row['crop'], row['market'])
+            first, last = touched.get(pair, (row['date'], row['date']))
+            touched[pair] = (min(first, row['date']), max(last, row['date']))
+    
+    return inserted, updated, touched
+
+
+def merge_spans(touched, other):
+    """Widen touched[(crop, market)] = (first, last) date spans with another mapping"""
+    for pair, (first, last) in other.items():
+        if pair in touched:
+            current_first, current_last = touched[pair]
+            touched[pair] = (min(first, current_first), max(last, current_last))
+        else:
+            touched[pair] = (first, last)
+    return touched
+
+
+def finalize_ingest(touched):
+    """
+    Post-processing after prices were written
+    
+    - touched: {(crop, market): (first_date, last_date)} of the rows written
+    
+    Bulk upserts bypass MarketPrice.save(), so derived tables are
+    refreshed (and cached analytics invalidated) here once per load
+    rather than per row.
+    """
+    if not touched:
+        return
+    pairs = set(touched)
+    MarketPriceLatest.objects.refresh(pairs)
+    refresh_rollups(touched)
+    match_price_alerts(pairs)
+    bump_data_version(pairs)
+
+
+def ingest_prices(rows, default_source='api', batch_size=DEFAULT_BATCH_SIZE, screen=True):
+    """
+    Validate, screen, upsert and post-process a batch of raw price rows
+    
+    With screen=True, outliers against the rolling statistics are moved to
+    QuarantinedPrice instead of being loaded (see market.anomalies);
+    screen=False loads every valid row. Either way the statistics take in
+    what the upsert writes.
+    
+    Returns a summary dict with inserted/updated/rejected/quarantined
+    counts and the first validation errors.
+    """
+    valid, errors = validate_price_rows(rows, default_source=default_source)
+    quarantined = 0
+    if screen:
+        valid, quarantined = screen_prices(valid)
+    inserted, updated, touched = upsert_prices(valid, batch_size=batch_size)
+    
+    finalize_ingest(touched)
+    
+    return {
+        'received': len(rows),
+        'inserted': inserted,
+        'updated': updated,
+        'rejected': len(errors),
+        'quarantined': quarantined,
+        'errors': errors[:MAX_REPORTED_ERRORS],
+    }
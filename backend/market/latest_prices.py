@@ -0,0 +1,47 @@
+from django.db import connection
+from django.db.models import F, OuterRef, Subquery, Window
+from django.db.models.functions import RowNumber
+
+from .models import MarketPrice, MarketPriceLatest
+
+
+def latest_prices(market=None, crops=None):
+    """
+    Newest MarketPrice row per (crop, market) in a single query
+    
+    - market: restrict to one market (None = all markets)
+    - crops: optional iterable of crops to restrict to
+    
+    Uses DISTINCT ON where the backend supports it (PostgreSQL/Supabase)
+    and a ROW_NUMBER() window otherwise (SQLite).
+    """
+    queryset = MarketPrice.objects.all()
+    if market:
+        queryset = queryset.filter(market=market)
+    if crops is not None:
+        queryset = queryset.filter(crop__in=list(crops))
+    
+    if connection.features.can_distinct_on_fields:
+        return queryset.order_by('crop', 'market', '-date').distinct('crop', 'market')
+    
+    return queryset.annotate(
+        row_number=Window(
+            expression=RowNumber(),
+            partition_by=[F('crop'), F('market')],
+            order_by=F('date').desc(),
+        )
+    ).filter(row_number=1).order_by('crop', 'market')
+
+
+def with_current_price(queryset):
+    """
+    Annotate a PriceAlert queryset with its crop/market latest price
+    
+    Reads MarketPriceLatest through a correlated subquery so a list of
+    alerts costs one query instead of one per alert.
+    """
+    latest = MarketPriceLatest.objects.filter(crop=OuterRef('crop'), market=OuterRef('market'))
+    return queryset.annotate(
+        current_price_value=Subquery(latest.values('price_per_kg')[:1]),
+        current_price_date=Subquery(latest.values('date')[:1]),
+    )
@@ -0,0 +1,98 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from market.backtest import BASELINE, run_backtest, summarize
+from market.forecasting import HISTORY_DAYS, HORIZON_DAYS, MODEL_FUNCTIONS, load_price_matrix
+from market.models import MarketPrice, PriceForecast
+from datetime import date
+import json
+import os
+import time
+
+
+class Command(BaseCommand):
+    help = 'Backtest the price forecast models with rolling origins over every crop x market series'
+    
+    def add_arguments(self, parser):
+        model_choices = [choice for choice, _ in PriceForecast.MODEL_CHOICES]
+        parser.add_argument(
+            '--models',
+            nargs='+',
+            choices=model_choices,
+            default=model_choices,
+            help='Models to score (default: every PriceForecast model choice)'
+        )
+        parser.add_argument('--history-days', type=int, default=HISTORY_DAYS, help='Days each fit sees')
+        parser.add_argument('--horizon', type=int, default=HORIZON_DAYS, help='Days ahead to score')
+        parser.add_argument('--step', type=int, default=7, help='Days between forecast origins')
+        parser.add_argument('--start', type=date.fromisoformat, help='First history date (default: earliest price)')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last date scored (default: latest price)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes')
+        parser.add_argument('--output', default='forecast_backtest.json', help='Where to write the JSON report')
+    
+    def handle(self, *args, **options):
+        history_days, horizon, step = options['history_days'], options['horizon'], options['step']
+        if min(history_days, horizon, step, options['workers']) < 1:
+            raise CommandError('--history-days, --horizon, --step and --workers must be at least 1')
+        
+        models = [model for model in options['models'] if model in MODEL_FUNCTIONS]
+        skipped = [model for model in options['models'] if model not in MODEL_FUNCTIONS]
+        
+        bounds = MarketPrice.objects.aggregate(first=Min('date'), last=Max('date'))
+        if bounds['first'] is None:
+            raise CommandError('No market prices to backtest against.')
+        start = max(options['start'] or bounds['first'], bounds['first'])
+        end = min(options['end'] or bounds['last'], bounds['last'])
+        
+        started = time.monotonic()
+        keys, dates, matrix = load_price_matrix(end_date=end, days=(end - start).days)
+        load_seconds = time.monotonic() - started
+        
+        origins = range(history_days - 1, len(dates) - horizon, step)
+        if not keys or not len(origins):
+            raise CommandError(
+                f'Not enough history between {start} and {end} for '
+                f'{history_days} days of history plus a {horizon}-day horizon.'
+            )
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'Backtesting {", ".join(models)} (+{BASELINE} baseline) on {len(keys)} series, '
+            f'{len(origins)} origins, {options["workers"]} workers...'
+        ))
+        if skipped:
+            self.stdout.write(self.style.WARNING(f'  Not implemented, skipped: {", ".join(skipped)}'))
+        
+        started = time.monotonic()
+        totals = run_backtest(matrix, origins, models, history_days, horizon, workers=options['workers'])
+        backtest_seconds = time.monotonic() - started
+        summary = summarize(totals)
+        
+        report = {
+            'generated_at': date.today().isoformat(),
+            'date_from': start.isoformat(),
+            'date_to': end.isoformat(),
+            'series': len(keys),
+            'origins': len(origins),
+            'history_days': history_days,
+            'horizon': horizon,
+            'step': step,
+            'workers': options['workers'],
+            'load_seconds': round(load_seconds, 3),
+            'backtest_seconds': round(backtest_seconds, 3),
+            'skipped_models': skipped,
+            'models': summary,
+        }
+        with open(options['output'], 'w') as handle:
+            json.dump(report, handle, indent=2)
+        
+        self.stdout.write(f'\n  {"model":<15} {"MAE":>9} {"MAPE %":>8} {"ms/fit":>9} {"peak MB":>9} {"points":>12}')
+        for model, result in sorted(summary.items(), key=lambda item: item[1]['mape'] if item[1]['mape'] is not None else float('inf')):
+            self.stdout.write(
+                f'  {model:<15} {result["mae"] if result["mae"] is not None else "-":>9} '
+                f'{result["mape"] if result["mape"] is not None else "-":>8} '
+                f'{result["ms_per_fit"] or 0:>9.3f} {result["peak_memory_mb"]:>9.3f} {result["points"]:>12,}'
+            )
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✓ Backtest finished in {backtest_seconds:.1f}s (data load {load_seconds:.1f}s); '
+            f'report written to {options["output"]}'
+        ))
@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand
+from market.models import PriceAlert
+from market.alert_index import PriceAlertIndex
+from decimal import Decimal
+import random
+import time
+
+
+class Command(BaseCommand):
+    help = 'Compare the in-memory price alert index against the SQL scan'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=1000, help='Price lookups to time')
+        parser.add_argument('--seed', type=int, default=42)
+    
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        
+        pairs = list(
+            PriceAlert.objects.filter(is_active=True, triggered_at__isnull=True)
+            .order_by().values_list('crop', 'market').distinct()
+        )
+        if not pairs:
+            self.stdout.write(self.style.WARNING('No active price alerts. Seed some alerts first.'))
+            return
+        
+        lookups = [
+            (*rng.choice(pairs), Decimal(str(round(rng.uniform(10, 150), 2))))
+            for _ in range(options['queries'])
+        ]
+        
+        index = PriceAlertIndex()
+        started = time.perf_counter()
+        size = len(index)
+        build_time = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        index_results = [index.matching(crop, market, price) for crop, market, price in lookups]
+        index_time = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        sql_results = [
+            list(
+                PriceAlert.objects.filter(
+                    crop=crop,
+                    market=market,
+                    is_active=True,
+                    triggered_at__isnull=True,
+                    target_price__lte=price
+                ).values_list('id', flat=True)
+            )
+            for crop, market, price in lookups
+        ]
+        sql_time = time.perf_counter() - started
+        
+        mismatches = sum(
+            set(index_ids) != set(sql_ids)
+            for index_ids, sql_ids in zip(index_results, sql_results)
+        )
+        matched = sum(len(ids) for ids in index_results)
+        queries = len(lookups)
+        
+        self.stdout.write(self.style.SUCCESS(f'Price alert index benchmark ({size:,} active alerts, {len(pairs)} crop/market keys)'))
+        self.stdout.write(f'  Index build:  {build_time * 1000:.1f} ms')
+        self.stdout.write(f'  Index lookup: {index_time / queries * 1e6:,.1f} µs/query')
+        self.stdout.write(f'  SQL scan:     {sql_time / queries * 1e6:,.1f} µs/query')
+        self.stdout.write(f'  Speed-up:     {sql_time / index_time if index_time else 0:,.0f}x')
+        self.stdout.write(f'  Alerts matched: {matched:,} across {queries:,} lookups')
+        
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f'✗ {mismatches} lookups disagreed with SQL'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✓ Index results match SQL'))
@@ -0,0 +1,90 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Avg, Max, Min
+from market.models import MarketPrice
+from datetime import timedelta
+import numpy as np
+import random
+import time
+
+
+class Command(BaseCommand):
+    help = 'Time typical date-filtered market price queries (p50/p95) and show partition pruning'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=200, help='Runs per query type')
+        parser.add_argument('--seed', type=int, default=42)
+    
+    def handle(self, *args, **options):
+        bounds = MarketPrice.objects.aggregate(first=Min('date'), last=Max('date'))
+        if bounds['first'] is None:
+            raise CommandError('No market prices. Load a dataset first (e.g. generate_load_dataset).')
+        
+        rng = random.Random(options['seed'])
+        pairs = list(MarketPrice.objects.order_by().values_list('crop', 'market').distinct()[:500])
+        span = (bounds['last'] - bounds['first']).days
+        
+        def random_end(window):
+            return bounds['first'] + timedelta(days=rng.randint(min(window, span), span))
+        
+        def trend_30d():
+            crop, market = rng.choice(pairs)
+            end = random_end(30)
+            return MarketPrice.objects.filter(
+                crop=crop, market=market, date__gt=end - timedelta(days=30), date__lte=end
+            ).order_by('date').values_list('date', 'price_per_kg')
+        
+        def crop_year_average():
+            crop, _ = rng.choice(pairs)
+            end = random_end(365)
+            return MarketPrice.objects.filter(
+                crop=crop, date__gt=end - timedelta(days=365), date__lte=end
+            ).order_by().values('crop').annotate(avg=Avg('price_per_kg'))
+        
+        def market_day():
+            _, market = rng.choice(pairs)
+            return MarketPrice.objects.filter(market=market, date=random_end(0))
+        
+        def list_page():
+            end = random_end(30)
+            return MarketPrice.objects.filter(
+                date__gte=end - timedelta(days=30), date__lte=end
+            ).order_by('-date', '-id')[:100]
+        
+        queries = [
+            ('trend (crop, market, 30 days)', trend_30d),
+            ('average (crop, 365 days)', crop_year_average),
+            ('one market, one day', market_day),
+            ('list page (30 days, 100 rows)', list_page),
+        ]
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'{connection.vendor}: {MarketPrice.objects.count():,} rows, '
+            f'{bounds["first"]} to {bounds["last"]}, {options["runs"]} runs per query'
+        ))
+        
+        for label, build in queries:
+            list(build())  # warm up
+            timings = []
+            for _ in range(options['runs']):
+                queryset = build()
+                started = time.perf_counter()
+                list(queryset)
+                timings.append((time.perf_counter() - started) * 1000)
+            
+            p50, p95 = np.percentile(timings, [50, 95])
+            self.stdout.write(f'  {label:<32} p50 {p50:8.2f} ms   p95 {p95:8.2f} ms   max {max(timings):8.2f} ms')
+            
+            if connection.vendor == 'postgresql':
+                self.stdout.write(f'    partitions scanned: {self._partitions_scanned(build())}')
+    
+    def _partitions_scanned(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN {sql}', params)
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        scanned = sorted(set(
+            word for word in plan.replace('(', ' ').split()
+            if word.startswith(f'{MarketPrice._meta.db_table}_')
+        ))
+        return ', '.join(scanned) or MarketPrice._meta.db_table
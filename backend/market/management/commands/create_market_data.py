@@ -1,3 +1,4 @@
+from django.core.exceptions import ValidationError
 from django.core.management.base import BaseCommand
 from market.models import MarketPrice, PriceAlert
 from django.contrib.auth import get_user_model
@@ -11,7 +12,7 @@ User = get_user_model()
 
 class Command(BaseCommand):
     help = 'Create dummy market data for testing'
-
+    
     def handle(self, *args, **kwargs):
         self.stdout.write(self.style.SUCCESS('Creating dummy market data...'))
         
@@ -40,6 +41,7 @@ class Command(BaseCommand):
         
         # Create prices for last 60 days with realistic trends
         price_count = 0
+        quarantined_count = 0
         today = date.today()
         
         for crop, config in crops_config.items():
@@ -75,19 +77,26 @@ class Command(BaseCommand):
                     market_factor = market_modifiers[market]
                     final_price = Decimal(str(round(current_base * market_factor, 2)))
                     
-                    MarketPrice.objects.get_or_create(
-                        crop=crop,
-                        market=market,
-                        date=price_date,
-                        defaults={
-                            'price_per_kg': final_price,
-                            'source': 'manual'
-                        }
-                    )
+                    # Saved outside get_or_create's transaction so a quarantined outlier stays recorded
+                    if not MarketPrice.objects.filter(crop=crop, market=market, date=price_date).exists():
+                        try:
+                            MarketPrice(
+                                crop=crop,
+                                market=market,
+                                date=price_date,
+                                price_per_kg=final_price,
+                                source='manual'
+                            ).save()
+                        except ValidationError:
+                            # Screened as an outlier and quarantined for review
+                            quarantined_count += 1
+                            continue
                     price_count += 1
         
         self.stdout.write(self.style.SUCCESS(f'✓ Created {price_count} market prices'))
         self.stdout.write(self.style.SUCCESS(f'  - 8 crops × 5 markets × 60 days'))
+        if quarantined_count:
+            self.stdout.write(self.style.WARNING(f'  - {quarantined_count} outliers quarantined for review'))
         self.stdout.write(self.style.SUCCESS(f'  - Realistic trends: rising, falling, stable'))
         
         # Create sample price alerts for test user
@@ -138,7 +147,7 @@ class Command(BaseCommand):
                             f'  {trend_indicator} {crop:12} KES {latest.price_per_kg}/kg'
                         )
                     )
-            
+        
         except User.DoesNotExist:
             self.stdout.write(self.style.WARNING('  Test user not found, skipping alerts'))
         
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from market.forecasting import generate_forecasts, FORECAST_MODELS, HISTORY_DAYS, HORIZON_DAYS
+import time
+
+
+class Command(BaseCommand):
+    help = 'Precompute PriceForecast rows for every crop x market series (run daily)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--models',
+            nargs='+',
+            choices=FORECAST_MODELS,
+            default=FORECAST_MODELS,
+            help='Models to fit (default: all)'
+        )
+        parser.add_argument('--history-days', type=int, default=HISTORY_DAYS)
+        parser.add_argument('--horizon', type=int, default=HORIZON_DAYS, help='Days ahead to forecast')
+    
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Generating price forecasts...'))
+        
+        started = time.monotonic()
+        count = generate_forecasts(
+            models=options['models'],
+            history_days=options['history_days'],
+            horizon=options['horizon'],
+        )
+        elapsed = time.monotonic() - started
+        
+        self.stdout.write(self.style.SUCCESS(f'✓ Wrote {count} forecasts in {elapsed:.2f}s'))
+        self.stdout.write(self.style.SUCCESS(f'  - Models: {", ".join(options["models"])}'))
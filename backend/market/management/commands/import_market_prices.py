@@ -0,0 +1,222 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from market.anomalies import screen_prices
+from market.ingest import validate_price_rows, upsert_prices, merge_spans, finalize_ingest
+from datetime import date
+import csv
+import hashlib
+import json
+import os
+import time
+
+# Bytes hashed at the start of the file to tell a rewritten file from the checkpointed one
+FINGERPRINT_BYTES = 64 * 1024
+
+
+class Command(BaseCommand):
+    help = 'Stream a CSV or NDJSON market price dump into MarketPrice (resumable)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Path to a .csv or .ndjson/.jsonl file')
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'ndjson'],
+            help='File format (default: detected from the file extension)'
+        )
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows per transaction')
+        parser.add_argument('--source', default='api', help='Source for rows without one')
+        parser.add_argument(
+            '--checkpoint',
+            help='Checkpoint file (default: <file>.checkpoint)'
+        )
+        parser.add_argument(
+            '--no-screen',
+            action='store_true',
+            help='Load every valid row without outlier screening (trusted backfills)'
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore any existing checkpoint and start from the beginning'
+        )
+    
+    def handle(self, *args, **options):
+        path = options['file']
+        if not os.path.exists(path):
+            raise CommandError(f'File not found: {path}')
+        
+        file_format = options['format'] or self._detect_format(path)
+        chunk_size = options['chunk_size']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be at least 1')
+        
+        checkpoint_path = options['checkpoint'] or f'{path}.checkpoint'
+        checkpoint = {} if options['restart'] else self._load_checkpoint(checkpoint_path)
+        fingerprint = self._fingerprint(path)
+        if checkpoint:
+            if checkpoint.get('file_size', 0) > fingerprint['file_size']:
+                raise CommandError('Checkpoint is beyond the end of the file. Use --restart.')
+            if any(checkpoint.get(key) != fingerprint[key] for key in ('mtime', 'head_sha256')):
+                raise CommandError(f'{path} has changed since the checkpoint was written. Use --restart.')
+        
+        offset = checkpoint.get('offset', 0)
+        totals = {'rows': 0, 'inserted': 0, 'updated': 0, 'rejected': 0, 'quarantined': 0}
+        totals.update(checkpoint.get('totals', {}))
+        touched = {
+            (crop, market): (date.fromisoformat(first), date.fromisoformat(last))
+            for crop, market, first, last in checkpoint.get('touched', [])
+        }
+        
+        if offset:
+            self.stdout.write(self.style.WARNING(
+                f'Resuming {path} at byte {offset:,} ({totals["rows"]:,} rows already processed)'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Importing {path} ({file_format})...'))
+        
+        started = time.monotonic()
+        run_rows = 0
+        
+        for chunk, end_offset in self._chunks(path, file_format, offset, chunk_size):
+            rows = [row for row in chunk if row is not None]
+            valid, errors = validate_price_rows(rows, default_source=options['source'])
+            
+            # Quarantine rows, prices and the staged checkpoint commit together;
+            # the checkpoint only moves into place once the chunk is committed
+            with transaction.atomic():
+                quarantined = 0
+                if not options['no_screen']:
+                    valid, quarantined = screen_prices(valid)
+                inserted, updated, chunk_touched = upsert_prices(valid, batch_size=chunk_size)
+                
+                totals['rows'] += len(chunk)
+                totals['inserted'] += inserted
+                totals['updated'] += updated
+                totals['rejected'] += len(errors) + (len(chunk) - len(rows))
+                totals['quarantined'] += quarantined
+                merge_spans(touched, chunk_touched)
+                
+                staged = self._stage_checkpoint(checkpoint_path, {
+                    'file': os.path.abspath(path),
+                    **fingerprint,
+                    'offset': end_offset,
+                    'totals': totals,
+                    'touched': [
+                        [crop, market, first.isoformat(), last.isoformat()]
+                        for (crop, market), (first, last) in sorted(touched.items())
+                    ],
+                })
+            os.replace(staged, checkpoint_path)
+            run_rows += len(chunk)
+            
+            elapsed = time.monotonic() - started
+            rate = run_rows / elapsed if elapsed > 0 else 0
+            self.stdout.write(
+                f'  {totals["rows"]:,} rows | +{totals["inserted"]:,} new, '
+                f'{totals["updated"]:,} updated, {totals["rejected"]:,} rejected, '
+                f'{totals["quarantined"]:,} quarantined | {rate:,.0f} rows/s'
+            )
+        
+        finalize_ingest(touched)
+        
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        
+        elapsed = time.monotonic() - started
+        rate = run_rows / elapsed if elapsed > 0 else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Imported {totals["rows"]:,} rows in {elapsed:.1f}s ({rate:,.0f} rows/s)'
+        ))
+        self.stdout.write(self.style.SUCCESS(
+            f'  - {totals["inserted"]:,} inserted, {totals["updated"]:,} updated, '
+            f'{totals["rejected"]:,} rejected, {totals["quarantined"]:,} quarantined for review'
+        ))
+    
+    def _detect_format(self, path):
+        extension = os.path.splitext(path)[1].lower()
+        if extension == '.csv':
+            return 'csv'
+        if extension in ('.ndjson', '.jsonl'):
+            return 'ndjson'
+        raise CommandError(f'Cannot detect format of {path}. Use --format.')
+    
+    def _rows(self, path, file_format, offset):
+        """
+        Yield (row, end_offset) pairs, starting at a byte offset
+        
+        Reads the file in binary so end_offset is an exact resume point.
+        CSV records go through csv.reader, so quoted fields may span lines;
+        end_offset is taken after the last line of each record.
+        Unparseable records are yielded as None so they are counted as rejected.
+        """
+        with open(path, 'rb') as handle:
+            position = [0]
+            
+            def lines():
+                for line in iter(handle.readline, b''):
+                    position[0] = handle.tell()
+                    yield line.decode('utf-8', errors='replace')
+            
+            if file_format == 'csv':
+                records = csv.reader(lines())
+                header = next(records, [])
+                fieldnames = [name.strip().lstrip('\ufeff') for name in header]
+                if offset > position[0]:
+                    handle.seek(offset)
+                
+                for values in records:
+                    if not values or not any(value.strip() for value in values):
+                        continue
+                    row = dict(zip(fieldnames, values)) if len(values) == len(fieldnames) else None
+                    yield row, position[0]
+                return
+            
+            handle.seek(offset)
+            for text in lines():
+                text = text.strip()
+                if not text:
+                    continue
+                try:
+                    row = json.loads(text)
+                except ValueError:
+                    row = None
+                if not isinstance(row, dict):
+                    row = None
+                yield row, position[0]
+    
+    def _chunks(self, path, file_format, offset, chunk_size):
+        chunk = []
+        end_offset = offset
+        for row, end_offset in self._rows(path, file_format, offset):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk, end_offset
+                chunk = []
+        if chunk:
+            yield chunk, end_offset
+    
+    def _fingerprint(self, path):
+        """Size, mtime and a hash of the first block, to recognise the checkpointed file"""
+        with open(path, 'rb') as handle:
+            head = handle.read(FINGERPRINT_BYTES)
+        stat = os.stat(path)
+        return {
+            'file_size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'head_sha256': hashlib.sha256(head).hexdigest(),
+        }
+    
+    def _load_checkpoint(self, checkpoint_path):
+        if not os.path.exists(checkpoint_path):
+            return {}
+        with open(checkpoint_path) as handle:
+            return json.load(handle)
+    
+    def _stage_checkpoint(self, checkpoint_path, data):
+        """Write the checkpoint to a temporary file; the caller moves it into place"""
+        tmp_path = f'{checkpoint_path}.tmp'
+        with open(tmp_path, 'w') as handle:
+            json.dump(data, handle, default=str)
+            handle.flush()
+            os.fsync(handle.fileno())
+        return tmp_path
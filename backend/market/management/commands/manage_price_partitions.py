@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from market.partitions import (
+    ARCHIVE_SCHEMA,
+    detach_partitions,
+    ensure_partitions,
+    is_partitioned,
+    list_partitions,
+)
+
+
+class Command(BaseCommand):
+    help = 'Create future yearly market_prices partitions and detach/archive old ones (Postgres)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ahead',
+            type=int,
+            default=1,
+            help='Make sure partitions exist up to this many years ahead (default: 1)'
+        )
+        parser.add_argument(
+            '--detach-before',
+            type=int,
+            metavar='YEAR',
+            help=f'Detach partitions for years before YEAR and move them to the "{ARCHIVE_SCHEMA}" schema'
+        )
+        parser.add_argument(
+            '--drop',
+            action='store_true',
+            help='Drop detached partitions instead of archiving them'
+        )
+        parser.add_argument('--list', action='store_true', help='Only list partitions')
+    
+    def handle(self, *args, **options):
+        if not is_partitioned():
+            raise CommandError('market_prices is not partitioned (Postgres with market migration 0006 required)')
+        
+        if not options['list']:
+            created = ensure_partitions(years_ahead=options['ahead'])
+            for year in created:
+                self.stdout.write(self.style.SUCCESS(f'✓ Created partition for {year}'))
+            
+            if options['detach_before']:
+                detached = detach_partitions(options['detach_before'], drop=options['drop'])
+                action = 'Dropped' if options['drop'] else f'Archived to {ARCHIVE_SCHEMA}'
+                for year in detached:
+                    self.stdout.write(self.style.WARNING(f'{action}: {year}'))
+        
+        self.stdout.write('\nPartitions:')
+        for name, year, estimate in list_partitions():
+            label = year if year is not None else 'default'
+            self.stdout.write(f'  {name:<28} {label!s:<8} ~{estimate:,} rows')
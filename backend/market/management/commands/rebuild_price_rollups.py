@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from market.rollups import rebuild_rollups
+import time
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the weekly/monthly market price rollups from daily prices'
+    
+    def handle(self, *args, **kwargs):
+        self.stdout.write(self.style.SUCCESS('Rebuilding price rollups...'))
+        
+        started = time.monotonic()
+        series = rebuild_rollups()
+        elapsed = time.monotonic() - started
+        
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt rollups for {series} crop/market series in {elapsed:.1f}s'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from market.anomalies import rebuild_price_stats
+import time
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the rolling price statistics used to screen ingested prices'
+    
+    def handle(self, *args, **kwargs):
+        self.stdout.write(self.style.SUCCESS('Rebuilding rolling price statistics...'))
+        
+        started = time.monotonic()
+        series = rebuild_price_stats()
+        elapsed = time.monotonic() - started
+        
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt stats for {series} crop/market series in {elapsed:.1f}s'))
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+
+def backfill_latest_prices(apps, schema_editor):
+    MarketPrice = apps.get_model('market', 'MarketPrice')
+    MarketPriceLatest = apps.get_model('market', 'MarketPriceLatest')
+    
+    latest = MarketPrice.objects.annotate(
+        row_number=Window(
+            expression=RowNumber(),
+            partition_by=[F('crop'), F('market')],
+            order_by=F('date').desc(),
+        )
+    ).filter(row_number=1)
+    
+    MarketPriceLatest.objects.bulk_create(
+        [
+            MarketPriceLatest(
+                crop=price.crop,
+                market=price.market,
+                market_price_id=price.pk,
+                price_per_kg=price.price_per_kg,
+                date=price.date,
+                source=price.source,
+            )
+            for price in latest
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    
+    dependencies = [
+        ('market', '0001_initial'),
+    ]
+    
+    operations = [
+        migrations.CreateModel(
+            name='MarketPriceLatest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('crop', models.CharField(choices=[('Maize', 'Maize'), ('Beans', 'Beans'), ('Potatoes', 'Potatoes'), ('Tomatoes', 'Tomatoes'), ('Cabbage', 'Cabbage'), ('Kale', 'Kale'), ('Wheat', 'Wheat'), ('Rice', 'Rice'), ('Coffee', 'Coffee'), ('Tea', 'Tea'), ('Sugarcane', 'Sugarcane'), ('Bananas', 'Bananas'), ('Onions', 'Onions'), ('Carrots', 'Carrots'), ('Other', 'Other')], max_length=50)),
+                ('market', models.CharField(choices=[('nairobi', 'Nairobi'), ('nakuru', 'Nakuru'), ('mombasa', 'Mombasa'), ('kisumu', 'Kisumu'), ('eldoret', 'Eldoret'), ('thika', 'Thika'), ('meru', 'Meru'), ('national', 'National Average')], default='national', max_length=50)),
+                ('price_per_kg', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('date', models.DateField()),
+                ('source', models.CharField(choices=[('kace', 'KACE - Kenya Agricultural Commodity Exchange'), ('manual', 'Manual Entry'), ('api', 'External API'), ('scraper', 'Web Scraper')], default='manual', max_length=20)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('market_price', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='market.marketprice')),
+            ],
+            options={
+                'db_table': 'market_prices_latest',
+                'ordering': ['crop', 'market'],
+                'unique_together': {('crop', 'market')},
+            },
+        ),
+        migrations.RunPython(backfill_latest_prices, migrations.RunPython.noop),
+    ]
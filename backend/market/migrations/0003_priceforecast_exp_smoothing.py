@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0002_market_price_latest'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='priceforecast',
+            name='model_used',
+            field=models.CharField(choices=[('linear', 'Linear Regression'), ('arima', 'ARIMA Time Series'), ('prophet', 'Facebook Prophet'), ('gemini', 'Google Gemini AI'), ('average', 'Moving Average'), ('exp_smoothing', 'Exponential Smoothing')], default='average', max_length=20),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0003_priceforecast_exp_smoothing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarketPriceMonthly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('crop', models.CharField(choices=[('Maize', 'Maize'), ('Beans', 'Beans'), ('Potatoes', 'Potatoes'), ('Tomatoes', 'Tomatoes'), ('Cabbage', 'Cabbage'), ('Kale', 'Kale'), ('Wheat', 'Wheat'), ('Rice', 'Rice'), ('Coffee', 'Coffee'), ('Tea', 'Tea'), ('Sugarcane', 'Sugarcane'), ('Bananas', 'Bananas'), ('Onions', 'Onions'), ('Carrots', 'Carrots'), ('Other', 'Other')], max_length=50)),
+                ('market', models.CharField(choices=[('nairobi', 'Nairobi'), ('nakuru', 'Nakuru'), ('mombasa', 'Mombasa'), ('kisumu', 'Kisumu'), ('eldoret', 'Eldoret'), ('thika', 'Thika'), ('meru', 'Meru'), ('national', 'National Average')], default='national', max_length=50)),
+                ('period_start', models.DateField()),
+                ('open_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('high_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('low_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('close_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('avg_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('count', models.PositiveIntegerField(help_text='Daily prices in this period')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'market_prices_monthly',
+                'ordering': ['-period_start', 'crop'],
+                'abstract': False,
+                'indexes': [models.Index(fields=['crop', 'market', '-period_start'], name='market_pric_crop_412afe_idx')],
+                'unique_together': {('crop', 'market', 'period_start')},
+            },
+        ),
+        migrations.CreateModel(
+            name='MarketPriceWeekly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('crop', models.CharField(choices=[('Maize', 'Maize'), ('Beans', 'Beans'), ('Potatoes', 'Potatoes'), ('Tomatoes', 'Tomatoes'), ('Cabbage', 'Cabbage'), ('Kale', 'Kale'), ('Wheat', 'Wheat'), ('Rice', 'Rice'), ('Coffee', 'Coffee'), ('Tea', 'Tea'), ('Sugarcane', 'Sugarcane'), ('Bananas', 'Bananas'), ('Onions', 'Onions'), ('Carrots', 'Carrots'), ('Other', 'Other')], max_length=50)),
+                ('market', models.CharField(choices=[('nairobi', 'Nairobi'), ('nakuru', 'Nakuru'), ('mombasa', 'Mombasa'), ('kisumu', 'Kisumu'), ('eldoret', 'Eldoret'), ('thika', 'Thika'), ('meru', 'Meru'), ('national', 'National Average')], default='national', max_length=50)),
+                ('period_start', models.DateField()),
+                ('open_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('high_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('low_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('close_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('avg_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('count', models.PositiveIntegerField(help_text='Daily prices in this period')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'market_prices_weekly',
+                'ordering': ['-period_start', 'crop'],
+                'abstract': False,
+                'indexes': [models.Index(fields=['crop', 'market', '-period_start'], name='market_pric_crop_62e45e_idx')],
+                'unique_together': {('crop', 'market', 'period_start')},
+            },
+        ),
+    ]
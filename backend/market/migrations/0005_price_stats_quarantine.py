@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0004_price_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarketPriceStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('crop', models.CharField(choices=[('Maize', 'Maize'), ('Beans', 'Beans'), ('Potatoes', 'Potatoes'), ('Tomatoes', 'Tomatoes'), ('Cabbage', 'Cabbage'), ('Kale', 'Kale'), ('Wheat', 'Wheat'), ('Rice', 'Rice'), ('Coffee', 'Coffee'), ('Tea', 'Tea'), ('Sugarcane', 'Sugarcane'), ('Bananas', 'Bananas'), ('Onions', 'Onions'), ('Carrots', 'Carrots'), ('Other', 'Other')], max_length=50)),
+                ('market', models.CharField(choices=[('nairobi', 'Nairobi'), ('nakuru', 'Nakuru'), ('mombasa', 'Mombasa'), ('kisumu', 'Kisumu'), ('eldoret', 'Eldoret'), ('thika', 'Thika'), ('meru', 'Meru'), ('national', 'National Average')], default='national', max_length=50)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('mean', models.FloatField(default=0)),
+                ('m2', models.FloatField(default=0, help_text='Sum of squared deviations from the mean')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'market_price_stats',
+                'ordering': ['crop', 'market'],
+                'unique_together': {('crop', 'market')},
+            },
+        ),
+        migrations.CreateModel(
+            name='QuarantinedPrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('crop', models.CharField(choices=[('Maize', 'Maize'), ('Beans', 'Beans'), ('Potatoes', 'Potatoes'), ('Tomatoes', 'Tomatoes'), ('Cabbage', 'Cabbage'), ('Kale', 'Kale'), ('Wheat', 'Wheat'), ('Rice', 'Rice'), ('Coffee', 'Coffee'), ('Tea', 'Tea'), ('Sugarcane', 'Sugarcane'), ('Bananas', 'Bananas'), ('Onions', 'Onions'), ('Carrots', 'Carrots'), ('Other', 'Other')], max_length=50)),
+                ('market', models.CharField(choices=[('nairobi', 'Nairobi'), ('nakuru', 'Nakuru'), ('mombasa', 'Mombasa'), ('kisumu', 'Kisumu'), ('eldoret', 'Eldoret'), ('thika', 'Thika'), ('meru', 'Meru'), ('national', 'National Average')], default='national', max_length=50)),
+                ('date', models.DateField()),
+                ('price_per_kg', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('source', models.CharField(choices=[('kace', 'KACE - Kenya Agricultural Commodity Exchange'), ('manual', 'Manual Entry'), ('api', 'External API'), ('scraper', 'Web Scraper')], default='manual', max_length=20)),
+                ('z_score', models.FloatField()),
+                ('rolling_mean', models.FloatField()),
+                ('rolling_std', models.FloatField()),
+                ('status', models.CharField(choices=[('pending', 'Pending Review'), ('approved', 'Approved'), ('rejected', 'Rejected')], default='pending', max_length=20)),
+                ('reviewed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'market_prices_quarantine',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', '-created_at'], name='market_pric_status_b8b790_idx')],
+            },
+        ),
+    ]
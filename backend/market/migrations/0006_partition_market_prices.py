@@ -0,0 +1,111 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:37
+
+from datetime import date
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+COLUMNS = 'id, crop, market, price_per_kg, date, source, created_at, updated_at'
+
+COLUMN_DEFINITIONS = """
+    crop varchar(50) NOT NULL,
+    market varchar(50) NOT NULL,
+    price_per_kg numeric(10, 2) NOT NULL,
+    date date NOT NULL,
+    source varchar(20) NOT NULL,
+    created_at timestamp with time zone NOT NULL,
+    updated_at timestamp with time zone NOT NULL
+"""
+
+
+def create_indexes(apps, schema_editor):
+    """Recreate the model's indexes (same names) on the new market_prices"""
+    MarketPrice = apps.get_model('market', 'MarketPrice')
+    schema_editor.execute('CREATE INDEX market_prices_date_idx ON market_prices (date)')
+    for index in MarketPrice._meta.indexes:
+        schema_editor.add_index(MarketPrice, index)
+
+
+def partition_market_prices(apps, schema_editor):
+    """
+    Rebuild market_prices as a table partitioned by year on date (Postgres only)
+
+    Partitioned tables need the partition key in every unique constraint,
+    so the primary key becomes (id, date); ids keep coming from one
+    sequence. Creates one partition per year with data through next year,
+    plus a DEFAULT partition. Rows are copied in one transaction - on very
+    large tables run this in a maintenance window.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('SELECT EXTRACT(YEAR FROM MIN(date))::int, EXTRACT(YEAR FROM MAX(date))::int FROM market_prices')
+        first, last = cursor.fetchone()
+    this_year = date.today().year
+    first = min(first or this_year, this_year)
+    last = max(last or this_year, this_year) + 1
+
+    schema_editor.execute(f"""
+        CREATE TABLE market_prices_partitioned (
+            id bigint NOT NULL,
+            {COLUMN_DEFINITIONS},
+            PRIMARY KEY (id, date),
+            UNIQUE (crop, market, date)
+        ) PARTITION BY RANGE (date)
+    """)
+    for year in range(first, last + 1):
+        schema_editor.execute(
+            f"CREATE TABLE market_prices_y{year} PARTITION OF market_prices_partitioned "
+            f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+        )
+    schema_editor.execute('CREATE TABLE market_prices_default PARTITION OF market_prices_partitioned DEFAULT')
+
+    schema_editor.execute(f'INSERT INTO market_prices_partitioned ({COLUMNS}) SELECT {COLUMNS} FROM market_prices')
+    schema_editor.execute('DROP TABLE market_prices')
+    schema_editor.execute('ALTER TABLE market_prices_partitioned RENAME TO market_prices')
+
+    schema_editor.execute('CREATE SEQUENCE market_prices_id_seq OWNED BY market_prices.id')
+    schema_editor.execute("ALTER TABLE market_prices ALTER COLUMN id SET DEFAULT nextval('market_prices_id_seq')")
+    schema_editor.execute(
+        "SELECT setval('market_prices_id_seq', COALESCE((SELECT MAX(id) FROM market_prices), 0) + 1, false)"
+    )
+    create_indexes(apps, schema_editor)
+
+
+def unpartition_market_prices(apps, schema_editor):
+    """Copy market_prices back into a plain table (reverse of the above)"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute(f"""
+        CREATE TABLE market_prices_plain (
+            id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+            {COLUMN_DEFINITIONS},
+            UNIQUE (crop, market, date)
+        )
+    """)
+    schema_editor.execute(f'INSERT INTO market_prices_plain ({COLUMNS}) SELECT {COLUMNS} FROM market_prices')
+    schema_editor.execute('DROP TABLE market_prices')
+    schema_editor.execute('ALTER TABLE market_prices_plain RENAME TO market_prices')
+    schema_editor.execute(
+        "SELECT setval(pg_get_serial_sequence('market_prices', 'id'), "
+        "COALESCE((SELECT MAX(id) FROM market_prices), 0) + 1, false)"
+    )
+    create_indexes(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('market', '0005_price_stats_quarantine'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='marketpricelatest',
+            name='market_price',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='market.marketprice'),
+        ),
+        migrations.RunPython(partition_market_prices, unpartition_market_prices),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    
+    dependencies = [
+        ('market', '0006_partition_market_prices'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+    
+    operations = [
+        migrations.AddIndex(
+            model_name='pricealert',
+            index=models.Index(fields=['updated_at'], name='price_alert_updated_dede8b_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    
+    dependencies = [
+        ('market', '0007_pricealert_updated_at_index'),
+    ]
+    
+    operations = [
+        migrations.CreateModel(
+            name='AnalyticsVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(help_text="'crop:market', 'crop:*', '*:*' or '*' for everything", max_length=120, unique=True)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'market_analytics_versions',
+                'ordering': ['scope'],
+            },
+        ),
+    ]
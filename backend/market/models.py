@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from decimal import Decimal
 
 User = get_user_model()
@@ -67,6 +69,7 @@ class MarketPrice(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
+        # Partitioned by year on Postgres (migration 0006, see market.partitions)
         db_table = 'market_prices'
         ordering = ['-date', 'crop']
         unique_together = ['crop', 'market', 'date']  # One price per crop per market per day
@@ -78,6 +81,363 @@ class MarketPrice(models.Model):
     
     def __str__(self):
         return f"{self.crop} - {self.market} - KES {self.price_per_kg}/kg on {self.date}"
+    
+    def _screen(self):
+        """
+        (previous_price, score) for this row before it is written
+        
+        previous_price is the stored price for this crop/market/date, or
+        None for a new row; score is (z, mean, std, outlier), or None when
+        the price is unchanged and there is nothing to screen.
+        """
+        from .anomalies import score_prices
+        
+        previous = MarketPrice.objects.filter(
+            crop=self.crop, market=self.market, date=self.date
+        ).values_list('price_per_kg', flat=True).first()
+        if previous is not None and previous == Decimal(str(self.price_per_kg)):
+            return previous, None
+        z, mean, std, outlier = score_prices([(self.crop, self.market)], [float(self.price_per_kg)])
+        return previous, (z[0], mean[0], std[0], bool(outlier[0]))
+    
+    def _outlier_error(self, score):
+        z, mean, _, _ = score
+        return ValidationError({
+            'price_per_kg': (
+                f'KES {self.price_per_kg}/kg is {z:+.1f} standard deviations from the recent '
+                f'{self.crop} price in {self.market} (KES {mean:.2f}/kg). '
+                f'Load it through the quarantine review if it is correct.'
+            )
+        })
+    
+    def clean(self):
+        """Reject likely outliers in forms (the admin) before they are saved"""
+        super().clean()
+        if self.price_per_kg is None or not self.crop:
+            return
+        _, score = self._screen()
+        if score and score[3]:
+            raise self._outlier_error(score)
+    
+    def save(self, *args, screen=True, **kwargs):
+        """
+        Keep the latest-price, rollup and rolling-stats tables in step with this row and fire alerts
+        
+        With screen=True a new or changed price that is an outlier against
+        the rolling statistics is written to QuarantinedPrice instead, like
+        in the bulk ingest path, and ValidationError is raised; the row is
+        never skipped silently. The quarantine row is rolled back with any
+        enclosing transaction. Pass screen=False to write it regardless.
+        """
+        from .alerts import match_price_alerts
+        from .anomalies import quarantine, update_price_stats
+        from .rollups import refresh_rollups
+        
+        previous, score = self._screen()
+        if screen and score and score[3]:
+            quarantine(
+                {
+                    'crop': self.crop,
+                    'market': self.market,
+                    'date': self.date,
+                    'price_per_kg': self.price_per_kg,
+                    'source': self.source,
+                },
+                *score[:3]
+            ).save()
+            raise self._outlier_error(score)
+        
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if previous is None:
+                update_price_stats([(self.crop, self.market, self.date, self.price_per_kg)])
+            elif score:
+                update_price_stats([], [(self.crop, self.market, previous, self.price_per_kg)])
+        MarketPriceLatest.objects.record(self)
+        refresh_rollups({(self.crop, self.market): (self.date, self.date)})
+        match_price_alerts([(self.crop, self.market)])
+    
+    def delete(self, *args, **kwargs):
+        """Re-derive the latest price and rollups for this crop/market after removal"""
+        from .rollups import refresh_rollups
+        
+        pair = (self.crop, self.market)
+        day = self.date
+        result = super().delete(*args, **kwargs)
+        MarketPriceLatest.objects.refresh([pair])
+        refresh_rollups({pair: (day, day)})
+        return result
+
+
+class MarketPriceLatestManager(models.Manager):
+    """
+    Maintenance and lookups for the materialized latest-price table
+    """
+    
+    def record(self, price):
+        """Upsert a freshly saved MarketPrice if it is the newest for its crop/market"""
+        values = {
+            'market_price': price,
+            'price_per_kg': price.price_per_kg,
+            'date': price.date,
+            'source': price.source,
+        }
+        updated = self.filter(crop=price.crop, market=price.market, date__lte=price.date).update(
+            updated_at=timezone.now(), **values
+        )
+        if updated:
+            return
+        
+        latest, created = self.get_or_create(crop=price.crop, market=price.market, defaults=values)
+        if created:
+            return
+        if latest.market_price_id == price.pk:
+            # The current latest row was moved back in time - re-derive it
+            self.refresh([(price.crop, price.market)])
+        else:
+            # Older price changed: bump updated_at so cached responses are revalidated
+            self.filter(pk=latest.pk).update(updated_at=timezone.now())
+    
+    def refresh(self, pairs=None):
+        """
+        Rebuild latest rows from MarketPrice
+        
+        - pairs: iterable of (crop, market) to rebuild (None = everything)
+        
+        Call this after bulk loads, which bypass MarketPrice.save().
+        """
+        from .latest_prices import latest_prices
+        
+        if pairs is not None:
+            pairs = set(pairs)
+            if not pairs:
+                return 0
+            prices = latest_prices(crops={crop for crop, _ in pairs})
+        else:
+            prices = latest_prices()
+        
+        rows = [
+            MarketPriceLatest(
+                crop=price.crop,
+                market=price.market,
+                market_price_id=price.pk,
+                price_per_kg=price.price_per_kg,
+                date=price.date,
+                source=price.source,
+            )
+            for price in prices
+            if pairs is None or (price.crop, price.market) in pairs
+        ]
+        
+        # Pairs with no MarketPrice rows left are dropped
+        found = {(row.crop, row.market) for row in rows}
+        stale = self.all() if pairs is None else self.filter(
+            crop__in={crop for crop, _ in pairs},
+            market__in={market for _, market in pairs},
+        )
+        stale_ids = [
+            pk for pk, crop, market in stale.values_list('pk', 'crop', 'market')
+            if (crop, market) not in found and (pairs is None or (crop, market) in pairs)
+        ]
+        if stale_ids:
+            self.filter(pk__in=stale_ids).delete()
+        
+        self.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['crop', 'market'],
+            update_fields=['market_price', 'price_per_kg', 'date', 'source', 'updated_at'],
+        )
+        return len(rows)
+    
+    def get_latest(self, crop, market='national'):
+        """Latest price row for one crop/market, or None"""
+        return self.filter(crop=crop, market=market).first()
+    
+    def lookup(self, pairs):
+        """Map (crop, market) -> latest row for many pairs in one query"""
+        pairs = set(pairs)
+        if not pairs:
+            return {}
+        rows = self.filter(
+            crop__in={crop for crop, _ in pairs},
+            market__in={market for _, market in pairs},
+        )
+        return {
+            (row.crop, row.market): row
+            for row in rows
+            if (row.crop, row.market) in pairs
+        }
+
+
+class MarketPriceLatest(models.Model):
+    """
+    Materialized latest price per crop per market
+    Maintained on MarketPrice.save() and refreshed after bulk loads
+    """
+    crop = models.CharField(max_length=50, choices=MarketPrice.CROP_CHOICES)
+    market = models.CharField(max_length=50, choices=MarketPrice.MARKET_CHOICES, default='national')
+    
+    # Row this snapshot was taken from. No database constraint: market_prices
+    # is partitioned by date on Postgres and its id alone is not unique there
+    market_price = models.ForeignKey(
+        MarketPrice,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        db_constraint=False
+    )
+    
+    price_per_kg = models.DecimalField(max_digits=10, decimal_places=2)
+    date = models.DateField()
+    source = models.CharField(max_length=20, choices=MarketPrice.SOURCE_CHOICES, default='manual')
+    
+    # Metadata - bumped on every write to this crop/market, not only new latest prices
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    objects = MarketPriceLatestManager()
+    
+    class Meta:
+        db_table = 'market_prices_latest'
+        ordering = ['crop', 'market']
+        unique_together = ['crop', 'market']
+    
+    def __str__(self):
+        return f"{self.crop} - {self.market} - KES {self.price_per_kg}/kg (latest, {self.date})"
+
+
+class MarketPriceRollup(models.Model):
+    """
+    Open/high/low/close summary of daily MarketPrice rows per period
+    Refreshed incrementally for the buckets touched by each ingest
+    """
+    crop = models.CharField(max_length=50, choices=MarketPrice.CROP_CHOICES)
+    market = models.CharField(max_length=50, choices=MarketPrice.MARKET_CHOICES, default='national')
+    
+    # First day of the week (Monday) or month
+    period_start = models.DateField()
+    
+    open_price = models.DecimalField(max_digits=10, decimal_places=2)
+    high_price = models.DecimalField(max_digits=10, decimal_places=2)
+    low_price = models.DecimalField(max_digits=10, decimal_places=2)
+    close_price = models.DecimalField(max_digits=10, decimal_places=2)
+    avg_price = models.DecimalField(max_digits=10, decimal_places=2)
+    count = models.PositiveIntegerField(help_text="Daily prices in this period")
+    
+    # Metadata
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        abstract = True
+        ordering = ['-period_start', 'crop']
+        unique_together = ['crop', 'market', 'period_start']
+    
+    def __str__(self):
+        return f"{self.crop} - {self.market} - {self.period_start}: O {self.open_price} H {self.high_price} L {self.low_price} C {self.close_price}"
+
+
+class MarketPriceWeekly(MarketPriceRollup):
+    """
+    Weekly price rollup (weeks start on Monday)
+    """
+    class Meta(MarketPriceRollup.Meta):
+        db_table = 'market_prices_weekly'
+        indexes = [
+            models.Index(fields=['crop', 'market', '-period_start']),
+        ]
+
+
+class MarketPriceMonthly(MarketPriceRollup):
+    """
+    Monthly price rollup
+    """
+    class Meta(MarketPriceRollup.Meta):
+        db_table = 'market_prices_monthly'
+        indexes = [
+            models.Index(fields=['crop', 'market', '-period_start']),
+        ]
+
+
+class MarketPriceStats(models.Model):
+    """
+    Rolling price mean/variance per crop per market (Welford state)
+    Updated incrementally as prices are written; see market.anomalies
+    """
+    crop = models.CharField(max_length=50, choices=MarketPrice.CROP_CHOICES)
+    market = models.CharField(max_length=50, choices=MarketPrice.MARKET_CHOICES, default='national')
+    
+    count = models.PositiveIntegerField(default=0)
+    mean = models.FloatField(default=0)
+    m2 = models.FloatField(default=0, help_text="Sum of squared deviations from the mean")
+    
+    # Metadata
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'market_price_stats'
+        ordering = ['crop', 'market']
+        unique_together = ['crop', 'market']
+    
+    def __str__(self):
+        return f"{self.crop} - {self.market}: mean {self.mean:.2f} over {self.count} prices"
+
+
+class QuarantinedPrice(models.Model):
+    """
+    Ingested price held back from MarketPrice as a likely outlier
+    Approving it in the admin loads it like any other price
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending Review'),
+        ('approved', 'Approved'),
+        ('rejected', 'Rejected'),
+    ]
+    
+    crop = models.CharField(max_length=50, choices=MarketPrice.CROP_CHOICES)
+    market = models.CharField(max_length=50, choices=MarketPrice.MARKET_CHOICES, default='national')
+    date = models.DateField()
+    price_per_kg = models.DecimalField(max_digits=10, decimal_places=2)
+    source = models.CharField(max_length=20, choices=MarketPrice.SOURCE_CHOICES, default='manual')
+    
+    # Rolling statistics the price was scored against
+    z_score = models.FloatField()
+    rolling_mean = models.FloatField()
+    rolling_std = models.FloatField()
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    reviewed_at = models.DateTimeField(null=True, blank=True)
+    
+    # Metadata
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'market_prices_quarantine'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.crop} - {self.market} - KES {self.price_per_kg}/kg on {self.date} (z={self.z_score:.1f}, {self.status})"
+
+
+class AnalyticsVersion(models.Model):
+    """
+    Shared version counter per analytics cache scope
+    Bumped on every price or forecast write so processes caching locally
+    notice writes made elsewhere; see market.analytics_cache
+    """
+    scope = models.CharField(max_length=120, unique=True, help_text="'crop:market', 'crop:*', '*:*' or '*' for everything")
+    version = models.PositiveBigIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'market_analytics_versions'
+        ordering = ['scope']
+    
+    def __str__(self):
+        return f"{self.scope} v{self.version}"
 
 
 class PriceAlert(models.Model):
@@ -127,6 +487,8 @@ class PriceAlert(models.Model):
         indexes = [
             models.Index(fields=['user', 'is_active']),
             models.Index(fields=['crop', 'is_active']),
+            # Delta refreshes of the in-memory alert index (market.alert_index)
+            models.Index(fields=['updated_at']),
         ]
     
     def __str__(self):
@@ -172,6 +534,7 @@ class PriceForecast(models.Model):
         ('prophet', 'Facebook Prophet'),
         ('gemini', 'Google Gemini AI'),
         ('average', 'Moving Average'),
+        ('exp_smoothing', 'Exponential Smoothing'),
     ]
     model_used = models.CharField(max_length=20, choices=MODEL_CHOICES, default='average')
     
@@ -0,0 +1,108 @@
+from base64 import b64decode, b64encode
+from datetime import date
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on (date, id), newest first
+    
+    Each page is a "WHERE (date, id) < (cursor) ORDER BY date DESC, id DESC
+    LIMIT n" query, so deep pages cost the same as the first one and
+    cursors stay stable while new prices are inserted. No OFFSET is used.
+    
+    The date field defaults to 'date'; views can set `cursor_field`
+    (e.g. 'period_start' for the rollup tables). Works on model and
+    .values() querysets alike.
+    """
+    page_size = 100
+    max_page_size = 1000
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+    
+    def decode_cursor(self, request):
+        """(reverse, date, id) from the cursor param, or None for the first page"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            direction, day, pk = b64decode(encoded.encode('ascii'), altchars=b'-_').decode('ascii').split('|')
+            if direction not in ('n', 'p'):
+                raise ValueError(direction)
+            return direction == 'p', date.fromisoformat(day), int(pk)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+    
+    def encode_cursor(self, reverse, row):
+        if isinstance(row, dict):
+            day, pk = row[self.field], row['id']
+        else:
+            day, pk = getattr(row, self.field), row.pk
+        position = f"{'p' if reverse else 'n'}|{day.isoformat()}|{pk}"
+        encoded = b64encode(position.encode('ascii'), altchars=b'-_').decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.field = getattr(view, 'cursor_field', 'date')
+        self.base_url = request.build_absolute_uri()
+        size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor[0])
+        
+        if reverse:
+            queryset = queryset.order_by(self.field, 'id')
+        else:
+            queryset = queryset.order_by(f'-{self.field}', '-id')
+        
+        if cursor:
+            _, day, pk = cursor
+            lookup = 'gt' if reverse else 'lt'
+            queryset = queryset.filter(
+                Q(**{f'{self.field}__{lookup}': day}) | Q(**{self.field: day, f'id__{lookup}': pk})
+            )
+        
+        rows = list(queryset[:size + 1])
+        has_more = len(rows) > size
+        rows = rows[:size]
+        if reverse:
+            rows.reverse()
+        
+        self.next_url = self.previous_url = None
+        if rows:
+            if has_more or reverse:
+                self.next_url = self.encode_cursor(False, rows[-1])
+            if (has_more and reverse) or (cursor and not reverse):
+                self.previous_url = self.encode_cursor(True, rows[0])
+        
+        return rows
+    
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.next_url,
+            'previous': self.previous_url,
+            'results': data,
+        })
+    
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
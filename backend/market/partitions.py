@@ -0,0 +1,127 @@
+import re
+from datetime import date
+
+from django.db import connection, transaction
+
+from .analytics_cache import bump_data_version
+from .models import MarketPrice, MarketPriceLatest
+
+PARENT_TABLE = MarketPrice._meta.db_table
+DEFAULT_PARTITION = f'{PARENT_TABLE}_default'
+ARCHIVE_SCHEMA = 'archive'
+
+PARTITION_NAME = re.compile(rf'^{PARENT_TABLE}_y(\d{{4}})$')
+
+
+def partition_name(year):
+    return f'{PARENT_TABLE}_y{year}'
+
+
+def is_partitioned():
+    """True when market_prices is a partitioned table (Postgres only)"""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT 1 FROM pg_partitioned_table pt
+            JOIN pg_class c ON c.oid = pt.partrelid
+            WHERE c.relname = %s AND c.relnamespace = 'public'::regnamespace
+            """,
+            [PARENT_TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions():
+    """[(name, year or None for the default partition, estimated rows)] in name order"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname, c.reltuples::bigint
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            WHERE p.relname = %s AND p.relnamespace = 'public'::regnamespace
+            ORDER BY c.relname
+            """,
+            [PARENT_TABLE]
+        )
+        rows = cursor.fetchall()
+    
+    partitions = []
+    for name, estimate in rows:
+        match = PARTITION_NAME.match(name)
+        partitions.append((name, int(match.group(1)) if match else None, max(estimate, 0)))
+    return partitions
+
+
+def create_partition(year):
+    """
+    Create the partition for one year; returns False if it already exists
+    
+    Rows for that year already sitting in the default partition are moved
+    into the new partition in the same transaction.
+    """
+    name = partition_name(year)
+    if any(existing == name for existing, _, _ in list_partitions()):
+        return False
+    
+    bounds = f"FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+    in_range = f"date >= '{year}-01-01' AND date < '{year + 1}-01-01'"
+    
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_range})')
+        stranded = cursor.fetchone()[0]
+        
+        if not stranded:
+            cursor.execute(f'CREATE TABLE {name} PARTITION OF {PARENT_TABLE} FOR VALUES {bounds}')
+            return True
+        
+        # A new partition can't overlap rows in the default partition
+        cursor.execute(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION {DEFAULT_PARTITION}')
+        cursor.execute(f'CREATE TABLE {name} PARTITION OF {PARENT_TABLE} FOR VALUES {bounds}')
+        cursor.execute(f'INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE {in_range}')
+        cursor.execute(f'DELETE FROM {DEFAULT_PARTITION} WHERE {in_range}')
+        cursor.execute(f'ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT')
+    return True
+
+
+def ensure_partitions(years_ahead=1, today=None):
+    """Create any missing yearly partitions up to this year + years_ahead"""
+    today = today or date.today()
+    existing = [year for _, year, _ in list_partitions() if year is not None]
+    first = min(existing) if existing else today.year
+    return [
+        year for year in range(first, today.year + years_ahead + 1)
+        if create_partition(year)
+    ]
+
+
+def detach_partitions(before_year, drop=False):
+    """
+    Detach every yearly partition older than before_year
+    
+    Detached tables are moved to the ARCHIVE_SCHEMA schema (still
+    queryable, e.g. archive.market_prices_y2019) or dropped with drop=True.
+    Latest prices are re-derived afterwards since they may point into
+    the detached years. Returns the years detached.
+    """
+    old = sorted(year for _, year, _ in list_partitions() if year is not None and year < before_year)
+    if not old:
+        return []
+    
+    with transaction.atomic(), connection.cursor() as cursor:
+        if not drop:
+            cursor.execute(f'CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}')
+        for year in old:
+            name = partition_name(year)
+            cursor.execute(f'ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}')
+            if drop:
+                cursor.execute(f'DROP TABLE {name}')
+            else:
+                cursor.execute(f'ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}')
+    
+    MarketPriceLatest.objects.refresh()
+    bump_data_version()
+    return old
@@ -0,0 +1,131 @@
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import Max, Min
+
+from .models import MarketPrice, MarketPriceWeekly, MarketPriceMonthly
+
+# Ranges longer than these are served from the rollup tables
+WEEKLY_THRESHOLD_DAYS = 180
+MONTHLY_THRESHOLD_DAYS = 730
+
+ROLLUP_MODELS = {
+    'weekly': MarketPriceWeekly,
+    'monthly': MarketPriceMonthly,
+}
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def period_end(resolution, start):
+    """Last day of the bucket starting at `start`"""
+    if resolution == 'weekly':
+        return start + timedelta(days=6)
+    next_month = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return next_month - timedelta(days=1)
+
+
+BUCKET_START = {
+    'weekly': week_start,
+    'monthly': month_start,
+}
+
+
+def resolution_for_range(days):
+    """'daily', 'weekly' or 'monthly' depending on how long the range is"""
+    if days > MONTHLY_THRESHOLD_DAYS:
+        return 'monthly'
+    if days > WEEKLY_THRESHOLD_DAYS:
+        return 'weekly'
+    return 'daily'
+
+
+def build_rollups(crop, market, series, resolution):
+    """
+    OHLC rows for one crop/market from a date-ordered list of (date, price)
+    """
+    model = ROLLUP_MODELS[resolution]
+    bucket_start = BUCKET_START[resolution]
+    
+    buckets = {}
+    for day, price in series:
+        buckets.setdefault(bucket_start(day), []).append(price)
+    
+    return [
+        model(
+            crop=crop,
+            market=market,
+            period_start=start,
+            open_price=prices[0],
+            high_price=max(prices),
+            low_price=min(prices),
+            close_price=prices[-1],
+            avg_price=(sum(prices) / len(prices)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+            count=len(prices),
+        )
+        for start, prices in buckets.items()
+    ]
+
+
+def refresh_rollups(spans):
+    """
+    Recompute weekly and monthly buckets touched by new prices
+    
+    - spans: {(crop, market): (first_date, last_date)} of the rows written
+    
+    Only buckets overlapping each span are rebuilt; one read per crop/market.
+    """
+    for (crop, market), (first, last) in spans.items():
+        range_start = min(week_start(first), month_start(first))
+        range_end = max(
+            period_end('weekly', week_start(last)),
+            period_end('monthly', month_start(last)),
+        )
+        
+        series = list(
+            MarketPrice.objects.filter(
+                crop=crop,
+                market=market,
+                date__gte=range_start,
+                date__lte=range_end
+            ).order_by('date').values_list('date', 'price_per_kg')
+        )
+        
+        with transaction.atomic():
+            for resolution, model in ROLLUP_MODELS.items():
+                bucket_from = BUCKET_START[resolution](first)
+                bucket_to = period_end(resolution, BUCKET_START[resolution](last))
+                in_range = [(day, price) for day, price in series if bucket_from <= day <= bucket_to]
+                
+                model.objects.filter(
+                    crop=crop,
+                    market=market,
+                    period_start__gte=bucket_from,
+                    period_start__lte=bucket_to
+                ).delete()
+                model.objects.bulk_create(
+                    build_rollups(crop, market, in_range, resolution),
+                    batch_size=1000,
+                )
+
+
+def rebuild_rollups():
+    """Rebuild every rollup from scratch (initial backfill)"""
+    spans = {
+        (row['crop'], row['market']): (row['first'], row['last'])
+        for row in MarketPrice.objects.order_by().values('crop', 'market').annotate(
+            first=Min('date'),
+            last=Max('date'),
+        )
+    }
+    for model in ROLLUP_MODELS.values():
+        model.objects.all().delete()
+    refresh_rollups(spans)
+    return len(spans)
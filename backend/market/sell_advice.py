@@ -0,0 +1,170 @@
+from datetime import date, timedelta
+
+import numpy as np
+from django.db.models import Sum
+
+from .models import MarketPrice, MarketPriceLatest
+
+HISTORY_DAYS = 30
+RECENT_POINTS = 7
+MIN_POINTS = 3
+
+# Harvests this recent are counted as stock still on hand
+STOCK_WINDOW_DAYS = 90
+
+REASONS = {
+    'rising': 'Prices are trending upward. Consider waiting a few days for better rates.',
+    'above_average': 'Current price is above average. Good time to sell.',
+    'falling': 'Prices are declining. Sell now to avoid further losses.',
+    'stable': 'Price is stable. Good time to sell.',
+}
+
+
+def match_crop_names(names):
+    """Map free-text crop names (e.g. FarmProfile.crops) to MarketPrice crop choices"""
+    choices = {code.lower(): code for code, _ in MarketPrice.CROP_CHOICES}
+    matched = []
+    for name in names:
+        crop = choices.get(str(name).strip().lower())
+        if crop and crop not in matched:
+            matched.append(crop)
+    return matched
+
+
+def sell_recommendations(crops, market='national', today=None):
+    """
+    Sell/wait advice for many crops from one history query
+    
+    Same rules as the original single-crop endpoint: compare the average
+    of the last RECENT_POINTS prices and the current price against the
+    HISTORY_DAYS average. Statistics for every crop are computed at once
+    with bincount over the crop-sorted history.
+    
+    Returns {crop: advice}; crops without a current price map to None.
+    """
+    crops = list(crops)
+    if not crops:
+        return {}
+    today = today or date.today()
+    
+    latest = MarketPriceLatest.objects.lookup((crop, market) for crop in crops)
+    rows = list(
+        MarketPrice.objects.filter(
+            crop__in=crops,
+            market=market,
+            date__gte=today - timedelta(days=HISTORY_DAYS)
+        ).order_by('crop', 'date').values_list('crop', 'price_per_kg')
+    )
+    
+    index = {crop: i for i, crop in enumerate(crops)}
+    codes = np.array([index[crop] for crop, _ in rows], dtype=int)
+    prices = np.array([float(price) for _, price in rows])
+    size = len(crops)
+    
+    # Group rows by code, keeping date order within each crop
+    order = np.argsort(codes, kind='stable')
+    codes, prices = codes[order], prices[order]
+    
+    counts = np.bincount(codes, minlength=size)
+    totals = np.bincount(codes, weights=prices, minlength=size)
+    average = np.divide(totals, counts, out=np.zeros(size), where=counts > 0)
+    
+    # Position of each row from the end of its crop's (date-ordered) run
+    from_end = np.cumsum(counts)[codes] - np.arange(len(codes))
+    recent = from_end <= RECENT_POINTS
+    recent_totals = np.bincount(codes[recent], weights=prices[recent], minlength=size)
+    recent_counts = np.bincount(codes[recent], minlength=size)
+    recent_average = np.where(
+        counts >= RECENT_POINTS,
+        np.divide(recent_totals, recent_counts, out=np.zeros(size), where=recent_counts > 0),
+        average
+    )
+    
+    current = np.array([
+        float(latest[(crop, market)].price_per_kg) if (crop, market) in latest else np.nan
+        for crop in crops
+    ])
+    
+    rule = np.select(
+        [
+            recent_average > average * 1.1,
+            current > average * 1.05,
+            recent_average < average * 0.9,
+        ],
+        ['rising', 'above_average', 'falling'],
+        default='stable'
+    )
+    
+    advice = {}
+    for i, crop in enumerate(crops):
+        if np.isnan(current[i]):
+            advice[crop] = None
+        elif counts[i] < MIN_POINTS:
+            advice[crop] = {
+                'crop': crop,
+                'market': market,
+                'recommendation': 'sell_now',
+                'reason': 'Insufficient data for forecast. Current price is available.',
+                'confidence': 'low',
+                'current_price': float(current[i]),
+            }
+        else:
+            advice[crop] = {
+                'crop': crop,
+                'market': market,
+                'recommendation': 'wait' if rule[i] == 'rising' else 'sell_now',
+                'reason': REASONS[rule[i]],
+                'confidence': 'high' if rule[i] == 'above_average' else 'medium',
+                'current_price': float(current[i]),
+                'average_price': round(float(average[i]), 2),
+                'recent_trend': 'rising' if recent_average[i] > average[i] else 'falling',
+            }
+    return advice
+
+
+def stock_on_hand(farm, today=None):
+    """{crop: kg} harvested in the last STOCK_WINDOW_DAYS, from one aggregate"""
+    today = today or date.today()
+    rows = farm.harvest_records.filter(
+        harvest_date__gte=today - timedelta(days=STOCK_WINDOW_DAYS)
+    ).order_by().values('crop').annotate(quantity=Sum('quantity_kg'))
+    return {row['crop']: float(row['quantity']) for row in rows}
+
+
+def portfolio_advice(farm, market='national', today=None):
+    """
+    Sell advice for every crop on a farm, with unsold stock valued
+    
+    Crops come from FarmProfile.crops plus anything harvested recently.
+    Stock is valued at the current market price.
+    """
+    today = today or date.today()
+    stock = stock_on_hand(farm, today)
+    crops = match_crop_names(list(farm.crops or []) + list(stock))
+    advice = sell_recommendations(crops, market, today)
+    
+    results = []
+    total_value = 0.0
+    for crop in crops:
+        entry = advice[crop] or {
+            'crop': crop,
+            'market': market,
+            'recommendation': None,
+            'reason': f'No current price data for {crop}',
+            'confidence': None,
+            'current_price': None,
+        }
+        quantity = stock.get(crop, 0.0)
+        value = round(quantity * entry['current_price'], 2) if entry['current_price'] is not None else None
+        entry['stock_kg'] = round(quantity, 2)
+        entry['stock_value'] = value
+        total_value += value or 0.0
+        results.append(entry)
+    
+    return {
+        'market': market,
+        'as_of': today,
+        'stock_window_days': STOCK_WINDOW_DAYS,
+        'total_stock_value': round(total_value, 2),
+        'crops': results,
+    }
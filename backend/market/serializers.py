@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from .models import MarketPrice, PriceAlert, PriceForecast
+from .models import MarketPrice, MarketPriceLatest, PriceAlert, PriceForecast
 from datetime import date, timedelta
 
 User = get_user_model()
@@ -31,6 +31,25 @@ class MarketPriceSerializer(serializers.ModelSerializer):
         return value
 
 
+class MarketPriceRollupSerializer(serializers.Serializer):
+    """
+    Serializer for weekly/monthly OHLC price rollups
+    """
+    crop = serializers.CharField()
+    market = serializers.CharField()
+    resolution = serializers.SerializerMethodField()
+    period_start = serializers.DateField()
+    open_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    high_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    low_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    close_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    avg_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    count = serializers.IntegerField()
+    
+    def get_resolution(self, obj):
+        return self.context.get('resolution')
+
+
 class PriceAlertSerializer(serializers.ModelSerializer):
     """
     Serializer for PriceAlert
@@ -55,20 +74,22 @@ class PriceAlertSerializer(serializers.ModelSerializer):
     
     def get_current_price(self, obj):
         """Get the latest market price for this crop"""
-        try:
-            latest_price = MarketPrice.objects.filter(
-                crop=obj.crop,
-                market=obj.market
-            ).order_by('-date').first()
-            
-            if latest_price:
-                return {
-                    'price': str(latest_price.price_per_kg),
-                    'date': latest_price.date
-                }
-            return None
-        except:
-            return None
+        # Annotated by with_current_price() on list views
+        if hasattr(obj, 'current_price_value'):
+            if obj.current_price_value is None:
+                return None
+            return {
+                'price': str(obj.current_price_value),
+                'date': obj.current_price_date
+            }
+        
+        latest_price = MarketPriceLatest.objects.get_latest(obj.crop, obj.market)
+        if latest_price:
+            return {
+                'price': str(latest_price.price_per_kg),
+                'date': latest_price.date
+            }
+        return None
     
     def validate_target_price(self, value):
         """Ensure target price is positive"""
@@ -0,0 +1,24 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import MarketPrice, PriceAlert
+from .alert_index import price_alert_index
+from .analytics_cache import bump_data_version
+
+
+@receiver(post_save, sender=PriceAlert)
+def sync_alert_index_on_save(sender, instance, **kwargs):
+    """Keep the in-memory threshold index in step with alert edits"""
+    price_alert_index.update(instance)
+
+
+@receiver(post_delete, sender=PriceAlert)
+def sync_alert_index_on_delete(sender, instance, **kwargs):
+    price_alert_index.discard([instance.pk])
+
+
+@receiver(post_save, sender=MarketPrice)
+@receiver(post_delete, sender=MarketPrice)
+def bump_analytics_version(sender, instance, **kwargs):
+    """Cached trends/forecasts/advice for this crop/market are stale once its price changes"""
+    bump_data_version([(instance.crop, instance.market)])
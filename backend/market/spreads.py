@@ -0,0 +1,106 @@
+import numpy as np
+
+from .analytics_cache import cached
+from .models import MarketPrice, MarketPriceLatest
+
+NATIONAL = 'national'
+
+
+def _round(value, digits=2):
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def compute_spreads(crop=None):
+    """
+    Cross-market comparison of the latest prices
+    
+    Builds a crops x markets matrix from MarketPriceLatest in one query,
+    then computes pairwise spreads, best/cheapest market and z-scores of
+    each regional market against the crop's national average.
+    """
+    latest = MarketPriceLatest.objects.all()
+    if crop:
+        latest = latest.filter(crop=crop)
+    rows = list(latest.values_list('crop', 'market', 'price_per_kg', 'date'))
+    
+    markets = [code for code, _ in MarketPrice.MARKET_CHOICES]
+    crops = sorted({row[0] for row in rows})
+    if not crops:
+        return {'as_of': None, 'markets': markets, 'crops': []}
+    
+    crop_index = {name: i for i, name in enumerate(crops)}
+    market_index = {code: j for j, code in enumerate(markets)}
+    
+    prices = np.full((len(crops), len(markets)), np.nan)
+    for crop_name, market, price, _ in rows:
+        prices[crop_index[crop_name], market_index[market]] = float(price)
+    
+    # Pairwise spreads: spreads[c, a, b] = price at a - price at b
+    spreads = prices[:, :, None] - prices[:, None, :]
+    
+    regional_mask = np.array([code != NATIONAL for code in markets])
+    regional = np.where(regional_mask[None, :], prices, np.nan)
+    
+    observed = ~np.isnan(regional)
+    counts = observed.sum(axis=1)
+    regional_mean = np.nansum(regional, axis=1) / np.maximum(counts, 1)
+    regional_std = np.sqrt(
+        np.nansum((regional - regional_mean[:, None]) ** 2, axis=1) / np.maximum(counts, 1)
+    )
+    
+    # z-score of each regional market against the crop's national average
+    national = prices[:, market_index[NATIONAL]]
+    reference = np.where(np.isnan(national), regional_mean, national)
+    scale = np.where(regional_std > 0, regional_std, 1.0)
+    z_scores = np.where(regional_std[:, None] > 0, (regional - reference[:, None]) / scale[:, None], 0.0)
+    z_scores = np.where(observed, z_scores, np.nan)
+    
+    filled_high = np.where(np.isnan(regional), -np.inf, regional)
+    filled_low = np.where(np.isnan(regional), np.inf, regional)
+    best = np.argmax(filled_high, axis=1)
+    cheapest = np.argmin(filled_low, axis=1)
+    
+    results = []
+    for i, crop_name in enumerate(crops):
+        present = [j for j in range(len(markets)) if not np.isnan(prices[i, j])]
+        entry = {
+            'crop': crop_name,
+            'national_price': _round(national[i]),
+            'prices': {markets[j]: _round(prices[i, j]) for j in present},
+            'z_scores': {
+                markets[j]: _round(z_scores[i, j], 3)
+                for j in present if regional_mask[j]
+            },
+            'spreads': {
+                markets[a]: {markets[b]: _round(spreads[i, a, b]) for b in present if b != a}
+                for a in present
+            },
+            'best_market': None,
+            'cheapest_market': None,
+            'max_spread': None,
+        }
+        
+        if counts[i]:
+            high, low = best[i], cheapest[i]
+            spread = prices[i, high] - prices[i, low]
+            entry['best_market'] = {'market': markets[high], 'price': _round(prices[i, high])}
+            entry['cheapest_market'] = {'market': markets[low], 'price': _round(prices[i, low])}
+            entry['max_spread'] = {
+                'buy_market': markets[low],
+                'sell_market': markets[high],
+                'spread': _round(spread),
+                'spread_pct': _round(100 * spread / prices[i, low]) if prices[i, low] > 0 else None,
+            }
+        
+        results.append(entry)
+    
+    return {
+        'as_of': max(row[3] for row in rows),
+        'markets': markets,
+        'crops': results,
+    }
+
+
+def market_spreads(crop=None):
+    """compute_spreads() cached until the next price ingest"""
+    return cached('spreads', crop or 'all', None, (), lambda: compute_spreads(crop))
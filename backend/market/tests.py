@@ -1,3 +1,595 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+import os
+import tempfile
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from communication.models import Notification, NotificationPreference
+
+from .alert_index import price_alert_index
+from .alerts import match_price_alerts
+from .analytics_cache import AnalyticsCache, LocalBackend, RedisBackend, analytics_cache
+from .forecasting import forecasts_current
+from .ingest import ingest_prices, upsert_prices, validate_price_rows
+from .models import (
+    MarketPrice, MarketPriceLatest, MarketPriceStats, PriceAlert, PriceForecast, QuarantinedPrice
+)
+
+
+class FakeRedis:
+    """In-memory stand-in for the few redis-py calls RedisBackend makes"""
+    
+    def __init__(self):
+        self.data = {}
+    
+    def get(self, key):
+        return self.data.get(key)
+    
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+    
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+    
+    def hincrby(self, key, field, amount=1):
+        fields = self.data.setdefault(key, {})
+        fields[field] = fields.get(field, 0) + amount
+        return fields[field]
+    
+    def hmget(self, key, fields):
+        values = self.data.get(key, {})
+        return [values.get(field) for field in fields]
+    
+    def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+    
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+    
+    def hincrby(self, *args):
+        self.calls.append(args)
+    
+    def execute(self):
+        return [self.client.hincrby(*args) for args in self.calls]
+
+
+class AnalyticsCacheTestMixin:
+    """Hit/miss counting and scoped invalidation, run against each backend"""
+    
+    def make_cache(self):
+        raise NotImplementedError
+    
+    def setUp(self):
+        self.cache = self.make_cache()
+        self.computed = []
+    
+    def get(self, endpoint, crop, market):
+        def compute():
+            self.computed.append((endpoint, crop, market))
+            return f'{endpoint}-{crop}-{market}-{len(self.computed)}'
+        return self.cache.get_or_compute(endpoint, crop, market, (30,), compute)
+    
+    def test_hits_and_misses_are_counted(self):
+        first = self.get('trend', 'Maize', 'nairobi')
+        self.assertEqual(self.get('trend', 'Maize', 'nairobi'), first)
+        self.get('forecast', 'Maize', 'nairobi')
+        
+        stats = self.cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['hit_rate'], 0.3333)
+        self.assertEqual(stats['endpoints']['trend'], {'hits': 1, 'misses': 1})
+        self.assertEqual(stats['endpoints']['forecast'], {'hits': 0, 'misses': 1})
+    
+    def test_bump_invalidates_only_the_changed_pair(self):
+        maize = self.get('trend', 'Maize', 'nairobi')
+        beans = self.get('trend', 'Beans', 'nairobi')
+        spreads = self.get('spreads', 'all', None)
+        maize_spreads = self.get('spreads', 'Maize', None)
+        
+        self.cache.bump([('Maize', 'nairobi')])
+        
+        self.assertNotEqual(self.get('trend', 'Maize', 'nairobi'), maize)
+        self.assertEqual(self.get('trend', 'Beans', 'nairobi'), beans)
+        self.assertNotEqual(self.get('spreads', 'all', None), spreads)
+        self.assertNotEqual(self.get('spreads', 'Maize', None), maize_spreads)
+    
+    def test_global_bump_invalidates_everything(self):
+        maize = self.get('trend', 'Maize', 'nairobi')
+        beans = self.get('trend', 'Beans', 'nairobi')
+        
+        self.cache.bump()
+        
+        self.assertNotEqual(self.get('trend', 'Maize', 'nairobi'), maize)
+        self.assertNotEqual(self.get('trend', 'Beans', 'nairobi'), beans)
+
+
+class LocalAnalyticsCacheTests(AnalyticsCacheTestMixin, TestCase):
+    
+    def make_cache(self):
+        return AnalyticsCache(LocalBackend(max_entries=4), poll_seconds=0)
+    
+    def test_bump_leaves_old_entries_to_the_lru(self):
+        self.get('trend', 'Maize', 'nairobi')
+        self.get('trend', 'Beans', 'nairobi')
+        self.cache.bump([('Maize', 'nairobi')])
+        self.assertEqual(self.cache.backend.size(), 2)
+        
+        for crop in ('Kale', 'Carrots', 'Cabbage'):
+            self.get('trend', crop, 'nairobi')
+        self.assertEqual(self.cache.backend.size(), 4)
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+    
+    def test_poll_picks_up_bumps_from_other_processes(self):
+        maize = self.get('trend', 'Maize', 'nairobi')
+        beans = self.get('trend', 'Beans', 'nairobi')
+        
+        # Another process with its own local cache records a write
+        AnalyticsCache(LocalBackend(), poll_seconds=0).bump([('Maize', 'nairobi')])
+        
+        self.assertNotEqual(self.get('trend', 'Maize', 'nairobi'), maize)
+        self.assertEqual(self.get('trend', 'Beans', 'nairobi'), beans)
+    
+    def test_poll_reads_only_the_version_table(self):
+        ingest_prices([{'crop': 'Maize', 'market': 'nairobi', 'date': '2024-01-01', 'price_per_kg': 50}], screen=False)
+        with self.assertNumQueries(1):
+            self.cache.data_version('Maize', 'nairobi')
+
+
+class RedisAnalyticsCacheTests(AnalyticsCacheTestMixin, TestCase):
+    
+    def make_cache(self):
+        return AnalyticsCache(RedisBackend(prefix='test', client=FakeRedis()))
+    
+    def test_versions_are_shared_between_processes(self):
+        client = FakeRedis()
+        one = AnalyticsCache(RedisBackend(prefix='test', client=client))
+        other = AnalyticsCache(RedisBackend(prefix='test', client=client))
+        
+        one.get_or_compute('trend', 'Maize', 'nairobi', (30,), lambda: 'first')
+        self.assertEqual(other.get_or_compute('trend', 'Maize', 'nairobi', (30,), lambda: 'second'), 'first')
+        
+        other.bump([('Maize', 'nairobi')])
+        self.assertEqual(one.get_or_compute('trend', 'Maize', 'nairobi', (30,), lambda: 'third'), 'third')
+        self.assertEqual(one.stats()['hits'], 1)
+
+
+class PriceQuarantineTests(TestCase):
+    """Rolling stats and outlier quarantine on the bulk and single-row write paths"""
+    
+    start = date(2024, 1, 1)
+    
+    def setUp(self):
+        self.history = [
+            {'crop': 'Maize', 'market': 'nairobi', 'date': str(self.start + timedelta(days=i)), 'price_per_kg': 48 + i % 5}
+            for i in range(12)
+        ]
+        ingest_prices(self.history, screen=False)
+    
+    def stats(self):
+        return MarketPriceStats.objects.get(crop='Maize', market='nairobi')
+    
+    def price(self, day, value, **fields):
+        return MarketPrice(crop='Maize', market='nairobi', date=day, price_per_kg=Decimal(value), **fields)
+    
+    def test_reingest_does_not_double_count(self):
+        before = self.stats()
+        self.assertEqual(before.count, 12)
+        
+        ingest_prices(self.history, screen=False)
+        after = self.stats()
+        self.assertEqual(after.count, 12)
+        self.assertAlmostEqual(after.mean, before.mean)
+        
+        ingest_prices([dict(self.history[0], price_per_kg=60)], screen=False)
+        self.assertEqual(self.stats().count, 12)
+        self.assertAlmostEqual(self.stats().mean, before.mean + (60 - 48) / 12)
+    
+    def test_bulk_outlier_is_quarantined(self):
+        summary = ingest_prices([{'crop': 'Maize', 'market': 'nairobi', 'date': '2024-01-20', 'price_per_kg': 500}])
+        
+        self.assertEqual((summary['inserted'], summary['quarantined']), (0, 1))
+        self.assertFalse(MarketPrice.objects.filter(date=date(2024, 1, 20)).exists())
+        self.assertEqual(QuarantinedPrice.objects.get().price_per_kg, Decimal('500.00'))
+        self.assertEqual(self.stats().count, 12)
+    
+    def test_save_raises_for_an_outlier_instead_of_skipping(self):
+        with self.assertRaises(ValidationError):
+            MarketPrice.objects.create(crop='Maize', market='nairobi', date=date(2024, 1, 20), price_per_kg=500)
+        
+        self.assertFalse(MarketPrice.objects.filter(date=date(2024, 1, 20)).exists())
+        self.assertEqual(QuarantinedPrice.objects.get().date, date(2024, 1, 20))
+        self.assertEqual(self.stats().count, 12)
+    
+    def test_save_without_screening_writes_the_outlier(self):
+        price = self.price(date(2024, 1, 20), '500')
+        price.save(screen=False)
+        
+        self.assertIsNotNone(price.pk)
+        self.assertFalse(QuarantinedPrice.objects.exists())
+        self.assertEqual(self.stats().count, 13)
+    
+    def test_save_folds_normal_prices_into_the_stats(self):
+        self.price(date(2024, 1, 20), '51').save()
+        self.assertEqual(self.stats().count, 13)
+        
+        # Re-saving the same price leaves the stats alone
+        MarketPrice.objects.get(date=date(2024, 1, 20)).save()
+        self.assertEqual(self.stats().count, 13)
+    
+    def test_clean_rejects_an_outlier(self):
+        with self.assertRaises(ValidationError):
+            self.price(date(2024, 1, 20), '500').full_clean()
+        self.price(date(2024, 1, 20), '52').full_clean()
+
+
+class PriceAlertIndexTests(TestCase):
+    """The in-memory threshold index against the table, including writes it never saw"""
+    
+    def setUp(self):
+        price_alert_index.invalidate()
+        self.addCleanup(price_alert_index.invalidate)
+        self.user = get_user_model().objects.create(username='farmer', email='farmer@example.com')
+    
+    def alert(self, target, crop='Maize', market='nairobi', **fields):
+        return PriceAlert.objects.create(user=self.user, crop=crop, market=market, target_price=target, **fields)
+    
+    def ingest(self, price, crop='Maize', market='nairobi'):
+        ingest_prices([{'crop': crop, 'market': market, 'date': '2024-01-01', 'price_per_kg': price}], screen=False)
+    
+    def test_matching_agrees_with_a_table_scan(self):
+        for target in (40, 45, 45, 50, 55, 60):
+            self.alert(target)
+        self.alert(30, crop='Beans')
+        self.alert(30, is_active=False)
+        price_alert_index.warm()
+        
+        for price in (Decimal('39.99'), Decimal('45'), Decimal('52.5'), Decimal('100')):
+            expected = set(PriceAlert.objects.filter(
+                crop='Maize', market='nairobi', is_active=True, target_price__lte=price
+            ).values_list('id', flat=True))
+            self.assertEqual(set(price_alert_index.matching('Maize', 'nairobi', price)), expected)
+    
+    def test_alert_created_by_another_process_fires_on_the_next_price(self):
+        price_alert_index.warm()
+        # bulk_create skips the signals, as a write from another worker would
+        PriceAlert.objects.bulk_create([PriceAlert(user=self.user, crop='Maize', market='nairobi', target_price=50)])
+        
+        self.ingest(55)
+        
+        alert = PriceAlert.objects.get()
+        self.assertIsNotNone(alert.triggered_at)
+        self.assertEqual(alert.triggered_price, Decimal('55.00'))
+        self.assertEqual(Notification.objects.filter(related_object_id=alert.pk).count(), 1)
+    
+    def test_alert_edited_by_another_process_is_moved(self):
+        alert = self.alert(50)
+        price_alert_index.warm()
+        PriceAlert.objects.filter(pk=alert.pk).update(target_price=70, updated_at=timezone.now())
+        
+        self.ingest(55)
+        self.assertIsNone(PriceAlert.objects.get().triggered_at)
+        
+        price_alert_index.refresh()
+        self.assertEqual(price_alert_index.matching('Maize', 'nairobi', Decimal('70')), [alert.pk])
+        self.assertEqual(price_alert_index.matching('Maize', 'nairobi', Decimal('69.99')), [])
+    
+    def test_cold_start_matches_through_sql_and_loads_the_index(self):
+        self.alert(50)
+        self.assertFalse(price_alert_index.loaded)
+        
+        self.ingest(55)
+        
+        self.assertIsNotNone(PriceAlert.objects.get().triggered_at)
+        self.assertTrue(price_alert_index.loaded)
+        self.assertEqual(len(price_alert_index), 0)
+
+
+class MatchPriceAlertsTests(TestCase):
+    """Alerts are triggered and notified once, however many matches see them"""
+    
+    def setUp(self):
+        price_alert_index.invalidate()
+        self.addCleanup(price_alert_index.invalidate)
+        self.user = get_user_model().objects.create(username='farmer', email='farmer@example.com')
+        self.alert = PriceAlert.objects.create(user=self.user, crop='Maize', market='nairobi', target_price=50)
+        ingest_prices([{'crop': 'Maize', 'market': 'nairobi', 'date': '2024-01-01', 'price_per_kg': 40}], screen=False)
+        price_alert_index.warm()
+    
+    def raise_price(self, price):
+        ingest_prices([{'crop': 'Maize', 'market': 'nairobi', 'date': '2024-01-02', 'price_per_kg': price}], screen=False)
+    
+    def test_triggers_and_notifies_once(self):
+        self.raise_price(55)
+        self.assertEqual(match_price_alerts([('Maize', 'nairobi')]), 0)
+        
+        self.alert.refresh_from_db()
+        self.assertEqual(self.alert.triggered_price, Decimal('55.00'))
+        self.assertEqual(Notification.objects.filter(notification_type='price_alert').count(), 1)
+    
+    def test_alert_claimed_elsewhere_is_not_notified_again(self):
+        self.raise_price(55)
+        self.assertEqual(Notification.objects.count(), 1)
+        
+        # A concurrent match computed its hits before this alert was triggered
+        stale = [(self.alert.pk, self.user.pk, 'Maize', 'nairobi', Decimal('50'), Decimal('55'))]
+        with mock.patch('market.alerts._index_hits', return_value=stale):
+            self.assertEqual(match_price_alerts([('Maize', 'nairobi')]), 0)
+        self.assertEqual(Notification.objects.count(), 1)
+    
+    def test_muted_users_are_triggered_without_a_notification(self):
+        NotificationPreference.objects.create(user=self.user, price_alerts=False)
+        self.raise_price(55)
+        
+        self.alert.refresh_from_db()
+        self.assertIsNotNone(self.alert.triggered_at)
+        self.assertFalse(Notification.objects.exists())
+
+
+class PriceForecastViewTests(TestCase):
+    """GET /forecast/ parameter handling; the view never writes forecasts"""
+    
+    def setUp(self):
+        # on_commit invalidation never runs inside TestCase
+        analytics_cache().bump()
+        today = date.today()
+        ingest_prices([
+            {'crop': 'Maize', 'market': 'national', 'date': str(today - timedelta(days=i)), 'price_per_kg': 50 + i % 3}
+            for i in range(10)
+        ], screen=False)
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create(username='farmer', email='farmer@example.com'))
+    
+    def get(self, **params):
+        return self.client.get(reverse('market:price_forecast'), {'crop': 'Maize', **params})
+    
+    def test_forecast_is_fitted_without_writing(self):
+        response = self.get(days=5, model='moving_average')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['forecasts']), 5)
+        self.assertEqual(response.data['forecasts'][0]['model'], 'moving_average')
+        self.assertFalse(PriceForecast.objects.exists())
+    
+    def test_days_must_be_a_positive_integer(self):
+        for days in ('0', '-3', 'abc'):
+            self.assertEqual(self.get(days=days).status_code, 400, days)
+        self.assertEqual(len(self.get(days=90).data['forecasts']), 30)
+    
+    def test_no_stored_forecasts_are_not_current(self):
+        self.assertFalse(forecasts_current([], 'Maize', 'national', 0))
+
+
+class ImportMarketPricesTests(TestCase):
+    """import_market_prices: checkpoints, resuming after a crash, and changed files"""
+    
+    def setUp(self):
+        ingest_prices([
+            {'crop': 'Maize', 'market': 'nairobi', 'date': str(date(2024, 1, 1) + timedelta(days=i)), 'price_per_kg': 48 + i % 5}
+            for i in range(12)
+        ], screen=False)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'prices.csv')
+        lines = ['crop,market,date,price_per_kg,source']
+        lines += [f'Beans,nakuru,2024-02-{day:02d},80,api' for day in range(1, 7)]
+        lines.insert(2, 'Maize,nairobi,2024-02-01,900,scraper')
+        lines.insert(4, 'Beans,"nak\nuru",2024-03-01,80,api')
+        self.write(lines)
+    
+    def write(self, lines):
+        with open(self.path, 'w') as handle:
+            handle.write('\n'.join(lines) + '\n')
+    
+    def run_import(self, *args):
+        out = StringIO()
+        call_command('import_market_prices', self.path, '--chunk-size', '3', *args, stdout=out)
+        return out.getvalue()
+    
+    def test_import_counts_quoted_multiline_records_as_one_row(self):
+        output = self.run_import()
+        
+        self.assertIn('Imported 8 rows', output)
+        self.assertIn('6 inserted, 0 updated, 1 rejected, 1 quarantined', output)
+        self.assertEqual(MarketPrice.objects.filter(crop='Beans').count(), 6)
+        self.assertFalse(os.path.exists(f'{self.path}.checkpoint'))
+    
+    def import_until_second_chunk_fails(self):
+        calls = []
+        
+        def fail_second_chunk(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError('crash')
+            return upsert_prices(*args, **kwargs)
+        
+        with mock.patch('market.management.commands.import_market_prices.upsert_prices', fail_second_chunk):
+            with self.assertRaises(RuntimeError):
+                self.run_import()
+        self.assertTrue(os.path.exists(f'{self.path}.checkpoint'))
+    
+    def test_resume_after_a_failed_chunk(self):
+        self.import_until_second_chunk_fails()
+        # Only the first chunk of three records (two prices and the outlier) committed
+        self.assertEqual(MarketPrice.objects.filter(crop='Beans').count(), 2)
+        
+        output = self.run_import()
+        self.assertIn('Resuming', output)
+        self.assertIn('Imported 8 rows', output)
+        self.assertEqual(MarketPrice.objects.filter(crop='Beans').count(), 6)
+        self.assertEqual(QuarantinedPrice.objects.count(), 1)
+    
+    def test_crash_before_the_checkpoint_moves_does_not_duplicate_quarantine(self):
+        real_replace = os.replace
+        
+        def crash(src, dst):
+            if dst.endswith('.checkpoint'):
+                raise OSError('crash')
+            return real_replace(src, dst)
+        
+        with mock.patch('market.management.commands.import_market_prices.os.replace', crash):
+            with self.assertRaises(OSError):
+                self.run_import()
+        self.assertEqual(QuarantinedPrice.objects.count(), 1)
+        
+        self.run_import()
+        self.assertEqual(QuarantinedPrice.objects.count(), 1)
+        self.assertEqual(MarketPrice.objects.filter(crop='Beans').count(), 6)
+    
+    def test_changed_file_is_not_resumed(self):
+        self.import_until_second_chunk_fails()
+        with open(self.path) as handle:
+            lines = handle.read().splitlines()
+        self.write([lines[0]] + [line.replace('80', '81') for line in lines[1:]])
+        
+        with self.assertRaisesMessage(CommandError, 'has changed since the checkpoint'):
+            self.run_import()
+        self.assertIn('Imported 8 rows', self.run_import('--restart'))
+
+
+class ValidatePriceRowsTests(SimpleTestCase):
+    """Bad values in a bulk price payload are per-row errors, never exceptions"""
+    
+    base = {'crop': 'Maize', 'market': 'nairobi', 'date': '2024-01-02', 'price_per_kg': '50.5'}
+    
+    def errors_for(self, **fields):
+        _, errors = validate_price_rows([dict(self.base, **fields)])
+        return [error['error'] for error in errors]
+    
+    def test_valid_row_is_cleaned(self):
+        row = {key: value for key, value in self.base.items() if key != 'price_per_kg'}
+        valid, errors = validate_price_rows([dict(row, price=12.346)])
+        self.assertEqual(errors, [])
+        self.assertEqual(valid, [{
+            'crop': 'Maize', 'market': 'nairobi', 'date': date(2024, 1, 2),
+            'price_per_kg': Decimal('12.35'), 'source': 'api',
+        }])
+    
+    def test_oversized_prices_are_too_large(self):
+        for price in ('1e30', 10 ** 12, '100000000.00'):
+            self.assertEqual(self.errors_for(price_per_kg=price), ['price too large'], price)
+        self.assertEqual(self.errors_for(price_per_kg='99999999.99'), [])
+    
+    def test_non_finite_and_non_scalar_prices_are_invalid(self):
+        for price in ('NaN', 'Infinity', '-inf', 'abc', [50], {'value': 50}, True, None):
+            self.assertEqual(self.errors_for(price_per_kg=price), ['invalid price'], price)
+        self.assertEqual(self.errors_for(price_per_kg='0'), ['price must be greater than 0'])
+    
+    def test_non_string_text_fields_are_invalid(self):
+        self.assertEqual(self.errors_for(crop=['Maize']), ['invalid crop'])
+        self.assertEqual(self.errors_for(market={'name': 'nairobi'}), ['invalid market'])
+        self.assertEqual(self.errors_for(source=5), ['invalid source'])
+        self.assertEqual(self.errors_for(date=20240102), ['invalid date'])
+        self.assertEqual(self.errors_for(date=str(date.today() + timedelta(days=1))), ['date cannot be in the future'])
+    
+    def test_errors_are_reported_per_row(self):
+        rows = [self.base, dict(self.base, price_per_kg='1e30'), dict(self.base, crop=None), self.base]
+        valid, errors = validate_price_rows(rows)
+        self.assertEqual(len(valid), 2)
+        self.assertEqual(errors, [{'row': 1, 'error': 'price too large'}, {'row': 2, 'error': 'invalid crop'}])
+
+
+class MarketPriceBulkIngestViewTests(TestCase):
+    """POST /prices/bulk/ loads valid rows and reports the rest"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create(username='admin', email='admin@example.com', is_staff=True)
+        self.client.force_authenticate(self.admin)
+        self.url = reverse('market:price_bulk_ingest')
+    
+    def test_bad_rows_are_rejected_and_the_rest_loaded(self):
+        response = self.client.post(self.url, {'source': 'kace', 'prices': [
+            {'crop': 'Maize', 'market': 'nairobi', 'date': '2024-01-02', 'price_per_kg': 50},
+            {'crop': 'Maize', 'market': 'nairobi', 'date': '2024-01-03', 'price_per_kg': '1e30'},
+            {'crop': 'Beans', 'market': 'nairobi', 'date': '2024-01-02', 'price_per_kg': [80]},
+        ]}, format='json')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['inserted'], response.data['rejected']), (1, 2))
+        self.assertEqual(MarketPrice.objects.get().source, 'kace')
+    
+    def test_payload_shape_is_checked(self):
+        for payload in ([], {'prices': 'x'}, [1, 2]):
+            self.assertEqual(self.client.post(self.url, payload, format='json').status_code, 400, payload)
+    
+    def test_admins_only(self):
+        self.client.force_authenticate(get_user_model().objects.create(username='farmer', email='farmer@example.com'))
+        self.assertEqual(self.client.post(self.url, [self.admin.pk], format='json').status_code, 403)
+
+
+class KeysetPaginationTests(TestCase):
+    """Cursor pages of GET /prices/ walk (date, id) without gaps, repeats or OFFSET drift"""
+    
+    def setUp(self):
+        today = date.today()
+        ingest_prices([
+            {'crop': crop, 'market': market, 'date': str(today - timedelta(days=day)), 'price_per_kg': 50}
+            for crop in ('Maize', 'Beans')
+            for market in ('nairobi', 'nakuru')
+            for day in range(5)
+        ], screen=False)
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create(username='farmer', email='farmer@example.com'))
+        self.expected = list(MarketPrice.objects.order_by('-date', '-id').values_list('id', flat=True))
+    
+    def get(self, url=None, **params):
+        response = self.client.get(url or reverse('market:price_list'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+    
+    def walk(self, page, link):
+        pages = [[row['id'] for row in page['results']]]
+        while page[link]:
+            page = self.get(page[link])
+            pages.append([row['id'] for row in page['results']])
+        return pages
+    
+    def test_next_links_cover_every_row_once(self):
+        pages = self.walk(self.get(page_size=3), 'next')
+        
+        self.assertEqual([len(page) for page in pages], [3] * 6 + [2])
+        self.assertEqual([pk for page in pages for pk in page], self.expected)
+    
+    def test_previous_links_walk_back_to_the_first_page(self):
+        first = self.get(page_size=3)
+        self.assertIsNone(first['previous'])
+        page = first
+        for _ in range(3):
+            page = self.get(page['next'])
+        
+        backwards = self.walk(page, 'previous')
+        self.assertEqual(backwards[-1], [row['id'] for row in first['results']])
+        self.assertEqual([pk for page in reversed(backwards) for pk in page], self.expected[:12])
+    
+    def test_rows_inserted_above_the_cursor_do_not_shift_the_next_page(self):
+        first = self.get(page_size=4)
+        ingest_prices([{'crop': 'Kale', 'market': 'nairobi', 'date': str(date.today()), 'price_per_kg': 40}], screen=False)
+        
+        second = self.get(first['next'])
+        self.assertEqual([row['id'] for row in second['results']], self.expected[4:8])
+    
+    def test_page_size_is_clamped(self):
+        self.assertEqual(len(self.get(page_size=0)['results']), 1)
+        self.assertEqual(len(self.get(page_size='many')['results']), 20)
+    
+    def test_invalid_cursor_is_not_found(self):
+        for cursor in ('not-base64!', 'eHx5fHo=', 'bnwyMDI0LTAxLTAxfGFiYw=='):
+            response = self.client.get(reverse('market:price_list'), {'cursor': cursor})
+            self.assertEqual(response.status_code, 404, cursor)
@@ -0,0 +1,273 @@
+from bisect import bisect_left
+from datetime import timedelta
+
+import numpy as np
+from django.db.models import Avg, Count, Max, Min, Q
+
+from core.columnar import to_columns
+
+from .models import MarketPrice
+from .rollups import ROLLUP_MODELS, BUCKET_START, build_rollups, period_end
+
+MIN_POINTS = 3
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling
+    
+    Returns the indices of `threshold` points of (x, y) that keep the
+    visual shape of the series. First and last points are always kept.
+    """
+    n = len(x)
+    if threshold >= n or threshold < MIN_POINTS:
+        return np.arange(n)
+    
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    
+    indices = np.empty(threshold, dtype=int)
+    indices[0] = 0
+    indices[-1] = n - 1
+    selected = 0
+    
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start = end
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        
+        area = np.abs(
+            (x[selected] - avg_x) * (y[start:end] - y[selected])
+            - (x[selected] - x[start:end]) * (avg_y - y[selected])
+        )
+        selected = start + int(np.argmax(area))
+        indices[bucket + 1] = selected
+    
+    return indices
+
+
+def trend_direction(values):
+    """'rising', 'falling' or 'stable' from first-half vs second-half averages"""
+    values = np.asarray(values, dtype=float)
+    mid_point = len(values) // 2
+    if mid_point == 0:
+        return 'stable'
+    
+    first_half_avg = values[:mid_point].mean()
+    second_half_avg = values[mid_point:].mean()
+    
+    if second_half_avg > first_half_avg * 1.05:  # 5% increase
+        return 'rising'
+    if second_half_avg < first_half_avg * 0.95:  # 5% decrease
+        return 'falling'
+    return 'stable'
+
+
+def downsample(dates, prices, max_points=None):
+    """LTTB-downsample parallel date/price lists to max_points if longer"""
+    if max_points and len(dates) > max_points:
+        x = np.array(dates, dtype='datetime64[D]').astype(int)
+        keep = lttb_indices(x, np.array(prices, dtype=float), max_points)
+        dates = [dates[i] for i in keep]
+        prices = [prices[i] for i in keep]
+    return dates, prices
+
+
+def format_points(dates, prices, columnar=False):
+    """(date, price) pairs for the API: a list of objects, or parallel arrays"""
+    if columnar:
+        return to_columns(list(zip(dates, prices)), ['date', 'price'], date_fields=['date'])
+    return [{'date': day, 'price': str(price)} for day, price in zip(dates, prices)]
+
+
+def price_trend(crop, market, date_from, date_to, max_points=None, columnar=False):
+    """
+    Trend summary for one crop/market over a date range, or None if empty
+    
+    Statistics come from one SQL aggregate; the series itself is read as
+    (date, price) tuples and optionally downsampled to max_points.
+    With columnar=True the points are returned as parallel arrays.
+    """
+    queryset = MarketPrice.objects.filter(
+        crop=crop,
+        market=market,
+        date__gte=date_from,
+        date__lte=date_to
+    )
+    
+    stats = queryset.aggregate(
+        count=Count('id'),
+        avg=Avg('price_per_kg'),
+        min=Min('price_per_kg'),
+        max=Max('price_per_kg'),
+    )
+    if not stats['count']:
+        return None
+    
+    series = list(queryset.order_by('date').values_list('date', 'price_per_kg'))
+    dates = [day for day, _ in series]
+    prices = [price for _, price in series]
+    kept_dates, kept_prices = downsample(dates, prices, max_points)
+    
+    return {
+        'crop': crop,
+        'market': market,
+        'date_from': date_from,
+        'date_to': date_to,
+        'prices': format_points(kept_dates, kept_prices, columnar),
+        'average_price': round(float(stats['avg']), 2),
+        'min_price': round(float(stats['min']), 2),
+        'max_price': round(float(stats['max']), 2),
+        'trend': trend_direction([float(price) for price in prices]),
+        'data_points': stats['count'],
+        'returned_points': len(kept_dates),
+        'resolution': 'daily',
+    }
+
+
+def summarize_series(crop, market, date_from, date_to, dates, prices, max_points=None, columnar=False):
+    """Same summary as price_trend(), computed from already-loaded arrays"""
+    values = np.array([float(price) for price in prices])
+    kept_dates, kept_prices = downsample(dates, prices, max_points)
+    
+    return {
+        'crop': crop,
+        'market': market,
+        'date_from': date_from,
+        'date_to': date_to,
+        'prices': format_points(kept_dates, kept_prices, columnar),
+        'average_price': round(float(values.mean()), 2),
+        'min_price': round(float(values.min()), 2),
+        'max_price': round(float(values.max()), 2),
+        'trend': trend_direction(values),
+        'data_points': len(values),
+        'returned_points': len(kept_dates),
+        'resolution': 'daily',
+    }
+
+
+def price_trends(series, date_to, max_points=None):
+    """
+    Trend summaries for many (crop, market, days) series from one query
+    
+    Loads the widest date range once for every requested crop/market and
+    slices each series out of it in memory. Returns one entry per request,
+    in order; series with no data get an 'error' entry instead.
+    """
+    if not series:
+        return []
+    
+    earliest = date_to - timedelta(days=max(days for _, _, days in series))
+    keys = {(crop, market) for crop, market, _ in series}
+    
+    rows = MarketPrice.objects.filter(
+        crop__in={crop for crop, _ in keys},
+        market__in={market for _, market in keys},
+        date__gte=earliest,
+        date__lte=date_to
+    ).order_by('crop', 'market', 'date').values_list('crop', 'market', 'date', 'price_per_kg')
+    
+    grouped = {}
+    for crop, market, day, price in rows:
+        if (crop, market) in keys:
+            dates, prices = grouped.setdefault((crop, market), ([], []))
+            dates.append(day)
+            prices.append(price)
+    
+    results = []
+    for crop, market, days in series:
+        date_from = date_to - timedelta(days=days)
+        dates, prices = grouped.get((crop, market), ([], []))
+        start = bisect_left(dates, date_from)
+        
+        if start >= len(dates):
+            results.append({
+                'crop': crop,
+                'market': market,
+                'days': days,
+                'error': f'No price data found for {crop} in {market}'
+            })
+            continue
+        
+        results.append(summarize_series(
+            crop, market, date_from, date_to,
+            dates[start:], prices[start:], max_points
+        ))
+    
+    return results
+
+
+def rollup_trend(crop, market, date_from, date_to, resolution, max_points=None, columnar=False):
+    """
+    Trend summary for long ranges read from the weekly/monthly rollups
+    
+    Only buckets lying wholly inside date_from..date_to are read from the
+    rollup table; the partial buckets at either end are rebuilt from the
+    daily rows inside the range, so no day outside it is counted. Returns
+    None when the rollups do not cover the range's daily rows (missing or
+    not yet backfilled) so callers can fall back to the daily rows.
+    """
+    bucket_start = BUCKET_START[resolution]
+    first_full = date_from if bucket_start(date_from) == date_from else (
+        period_end(resolution, bucket_start(date_from)) + timedelta(days=1)
+    )
+    tail_start = bucket_start(date_to)
+    if period_end(resolution, tail_start) <= date_to:
+        tail_start = date_to + timedelta(days=1)
+    tail_start = max(tail_start, first_full)
+    
+    interior = list(
+        ROLLUP_MODELS[resolution].objects.filter(
+            crop=crop,
+            market=market,
+            period_start__gte=first_full,
+            period_start__lt=tail_start
+        ).order_by('period_start').values_list(
+            'period_start', 'low_price', 'high_price', 'close_price', 'avg_price', 'count'
+        )
+    )
+    daily = MarketPrice.objects.filter(crop=crop, market=market)
+    interior_days = daily.filter(date__gte=first_full, date__lt=tail_start).count()
+    if sum(row[5] for row in interior) != interior_days:
+        return None
+    
+    edge_days = list(
+        daily.filter(
+            Q(date__gte=date_from, date__lt=first_full, date__lte=date_to)
+            | Q(date__gte=tail_start, date__lte=date_to)
+        ).order_by('date').values_list('date', 'price_per_kg')
+    )
+    edges = [
+        (
+            max(bucket.period_start, date_from), bucket.low_price, bucket.high_price,
+            bucket.close_price, bucket.avg_price, bucket.count
+        )
+        for bucket in build_rollups(crop, market, edge_days, resolution)
+    ]
+    rows = sorted(interior + edges)
+    if not rows:
+        return None
+    
+    starts = [row[0] for row in rows]
+    closes = [row[3] for row in rows]
+    averages = np.array([float(row[4]) for row in rows])
+    counts = np.array([row[5] for row in rows])
+    kept_dates, kept_prices = downsample(starts, closes, max_points)
+    
+    return {
+        'crop': crop,
+        'market': market,
+        'date_from': date_from,
+        'date_to': date_to,
+        'prices': format_points(kept_dates, kept_prices, columnar),
+        'average_price': round(float(np.average(averages, weights=counts)), 2),
+        'min_price': round(float(min(row[1] for row in rows)), 2),
+        'max_price': round(float(max(row[2] for row in rows)), 2),
+        'trend': trend_direction(np.repeat(averages, counts)),
+        'data_points': int(counts.sum()),
+        'returned_points': len(kept_dates),
+        'resolution': resolution,
+    }
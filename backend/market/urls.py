@@ -2,11 +2,16 @@ from django.urls import path
 from .views import (
     MarketPriceListView,
     LatestPricesView,
+    MarketPriceBulkIngestView,
     PriceTrendView,
+    PriceTrendBatchView,
+    MarketSpreadsView,
     PriceAlertListCreateView,
     PriceAlertDetailView,
     PriceForecastView,
     BestTimeToSellView,
+    SellAdviceView,
+    AnalyticsCacheStatsView,
 )
 
 app_name = 'market'
@@ -15,7 +20,11 @@ urlpatterns = [
     # Market Prices
     path('prices/', MarketPriceListView.as_view(), name='price_list'),
     path('prices/latest/', LatestPricesView.as_view(), name='latest_prices'),
+    path('prices/bulk/', MarketPriceBulkIngestView.as_view(), name='price_bulk_ingest'),
     path('prices/trend/', PriceTrendView.as_view(), name='price_trend'),
+    path('prices/trends/', PriceTrendBatchView.as_view(), name='price_trends'),
+    
+    path('spreads/', MarketSpreadsView.as_view(), name='market_spreads'),
     
     # Price Alerts
     path('alerts/', PriceAlertListCreateView.as_view(), name='alert_list'),
@@ -24,4 +33,7 @@ urlpatterns = [
     # Forecasting & Recommendations
     path('forecast/', PriceForecastView.as_view(), name='price_forecast'),
     path('best-time-to-sell/', BestTimeToSellView.as_view(), name='best_time_to_sell'),
+    path('sell-advice/', SellAdviceView.as_view(), name='sell_advice'),
+    
+    path('cache-stats/', AnalyticsCacheStatsView.as_view(), name='analytics_cache_stats'),
 ]
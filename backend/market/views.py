@@ -1,22 +1,33 @@
 from rest_framework import status, generics, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.db.models import Avg, Min, Max, Count
+from django.db.models import Avg
 from django.utils import timezone
 from datetime import date, timedelta
-from decimal import Decimal
-import statistics
 
-from .models import MarketPrice, PriceAlert, PriceForecast
+from core.columnar import columnar_renderers, is_columnar, to_columns
+from farms.models import FarmProfile
+
+from .models import MarketPrice, MarketPriceLatest, PriceAlert, PriceForecast
+from .latest_prices import with_current_price
+from .conditional import conditional_on_prices
+from .pagination import KeysetPagination
+from .ingest import ingest_prices
+from .forecasting import API_MODEL_NAMES, FORECAST_MODELS, forecast_series, forecasts_current
+from .trends import price_trend, price_trends, rollup_trend, MIN_POINTS
+from .spreads import market_spreads
+from .analytics_cache import analytics_cache, cached
+from .sell_advice import sell_recommendations, portfolio_advice
+from .rollups import ROLLUP_MODELS, BUCKET_START, resolution_for_range
 from .serializers import (
     MarketPriceSerializer,
+    MarketPriceRollupSerializer,
     PriceAlertSerializer,
     PriceAlertCreateSerializer,
-    PriceForecastSerializer,
-    PriceTrendSerializer,
 )
 
 
+@conditional_on_prices()
 class MarketPriceListView(generics.ListAPIView):
     """
     GET /api/v1/market/prices/
@@ -27,12 +38,86 @@ class MarketPriceListView(generics.ListAPIView):
     - market: Filter by market
     - date_from: Start date
     - date_to: End date
+    - resolution: daily, weekly, monthly or auto (default: auto)
+    - page_size: Rows per page (default: 100, max: 1000)
+    - cursor: Opaque cursor from the previous response's next/previous link
+    - format: 'columnar' for parallel arrays instead of a list of objects
+    
+    Results are keyset-paginated on (date, id), newest first.
+    With resolution=auto, an explicit date_from..date_to range longer than
+    WEEKLY_THRESHOLD_DAYS / MONTHLY_THRESHOLD_DAYS is served from the
+    weekly/monthly rollups; everything else returns daily prices.
+    Supports conditional GET (ETag / Last-Modified).
     """
     serializer_class = MarketPriceSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    renderer_classes = columnar_renderers()
+    
+    columnar_fields = {
+        'daily': ['id', 'crop', 'market', 'date', 'price_per_kg', 'source'],
+        'rollup': [
+            'id', 'crop', 'market', 'period_start',
+            'open_price', 'high_price', 'low_price', 'close_price', 'avg_price', 'count'
+        ],
+    }
+    
+    @property
+    def cursor_field(self):
+        return 'date' if self.get_resolution() == 'daily' else 'period_start'
+    
+    def get_date_range(self):
+        """(date_from, date_to) as requested; date_from may be None"""
+        date_from = self.request.query_params.get('date_from')
+        date_to = self.request.query_params.get('date_to')
+        
+        if date_to:
+            date_to = date.fromisoformat(date_to)
+            date_from = date.fromisoformat(date_from) if date_from else None
+        else:
+            # Default: last 30 days
+            date_to = date.today()
+            requested_from = date.fromisoformat(date_from) if date_from else None
+            date_from = date_to - timedelta(days=30)
+            if requested_from and requested_from > date_from:
+                date_from = requested_from
+        
+        return date_from, date_to
+    
+    def get_resolution(self):
+        if not hasattr(self, '_resolution'):
+            resolution = self.request.query_params.get('resolution', 'auto')
+            if resolution not in ('daily', 'weekly', 'monthly'):
+                date_from, date_to = self.get_date_range()
+                # Open-ended ranges stay daily; only an explicit long range is rolled up
+                resolution = resolution_for_range((date_to - date_from).days) if date_from else 'daily'
+            self._resolution = resolution
+        return self._resolution
+    
+    def get_serializer_class(self):
+        if self.get_resolution() == 'daily':
+            return MarketPriceSerializer
+        return MarketPriceRollupSerializer
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['resolution'] = self.get_resolution()
+        return context
     
     def get_queryset(self):
-        queryset = MarketPrice.objects.all()
+        resolution = self.get_resolution()
+        date_from, date_to = self.get_date_range()
+        
+        if resolution == 'daily':
+            queryset = MarketPrice.objects.filter(date__lte=date_to)
+            if date_from:
+                queryset = queryset.filter(date__gte=date_from)
+            order_field = '-date'
+        else:
+            queryset = ROLLUP_MODELS[resolution].objects.filter(period_start__lte=date_to)
+            if date_from:
+                queryset = queryset.filter(period_start__gte=BUCKET_START[resolution](date_from))
+            order_field = '-period_start'
         
         # Filter by crop
         crop = self.request.query_params.get('crop')
@@ -44,52 +129,93 @@ class MarketPriceListView(generics.ListAPIView):
         if market:
             queryset = queryset.filter(market=market)
         
-        # Filter by date range
-        date_from = self.request.query_params.get('date_from')
-        date_to = self.request.query_params.get('date_to')
-        
-        if date_from:
-            queryset = queryset.filter(date__gte=date_from)
-        if date_to:
-            queryset = queryset.filter(date__lte=date_to)
-        else:
-            # Default: last 30 days
-            date_to = date.today()
-            date_from = date_to - timedelta(days=30)
-            queryset = queryset.filter(date__gte=date_from, date__lte=date_to)
-        
-        return queryset.order_by('-date')
+        return queryset.order_by(order_field)
+    
+    def list(self, request, *args, **kwargs):
+        if not is_columnar(request):
+            return super().list(request, *args, **kwargs)
+        
+        # Columnar: page straight over .values() rows, no serializer
+        resolution = self.get_resolution()
+        fields = self.columnar_fields['daily' if resolution == 'daily' else 'rollup']
+        page = self.paginate_queryset(self.get_queryset().values(*fields))
+        
+        data = to_columns(
+            [tuple(row[field] for field in fields) for row in page],
+            fields,
+            date_fields=[self.cursor_field],
+        )
+        data['resolution'] = resolution
+        return self.get_paginated_response(data)
 
 
+@conditional_on_prices(default_market='national')
 class LatestPricesView(APIView):
     """
     GET /api/v1/market/prices/latest/
     Get latest price for each crop
     
     Query params:
-    - market: Filter by specific market (default: national)
+    - market: Filter by specific market (default: national, 'all' for every market)
+    
+    Supports conditional GET (ETag / Last-Modified).
     """
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
         market = request.query_params.get('market', 'national')
         
-        # Get unique crops
-        crops = MarketPrice.objects.values_list('crop', flat=True).distinct()
+        # Read from the materialized latest-price table (one query)
+        latest = MarketPriceLatest.objects.filter(market_price__isnull=False).select_related('market_price')
+        if market != 'all':
+            latest = latest.filter(market=market)
+        prices = [row.market_price for row in latest]
         
-        latest_prices = []
-        for crop in crops:
-            price = MarketPrice.objects.filter(
-                crop=crop,
-                market=market
-            ).order_by('-date').first()
-            
-            if price:
-                latest_prices.append(MarketPriceSerializer(price).data)
+        return Response(MarketPriceSerializer(prices, many=True).data, status=status.HTTP_200_OK)
+
+
+class MarketPriceBulkIngestView(APIView):
+    """
+    POST /api/v1/market/prices/bulk/
+    Upsert many market prices in one request (scraper/KACE feeds)
+    
+    Body: list of rows, or {"prices": [...], "source": "kace"}
+    Each row: crop, market, date, price_per_kg (or price), source (optional)
+    
+    Rows are upserted on (crop, market, date). Invalid rows are skipped
+    and reported; valid rows are still loaded.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    max_rows = 50000
+    
+    def post(self, request):
+        payload = request.data
+        default_source = 'api'
+        if isinstance(payload, dict):
+            default_source = payload.get('source') or default_source
+            payload = payload.get('prices')
+        
+        if not isinstance(payload, list) or not payload:
+            return Response({
+                'error': 'Provide a non-empty list of price rows'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if len(payload) > self.max_rows:
+            return Response({
+                'error': f'Too many rows. Maximum is {self.max_rows} per request.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not all(isinstance(row, dict) for row in payload):
+            return Response({
+                'error': 'Each price row must be an object'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        result = ingest_prices(payload, default_source=default_source)
         
-        return Response(latest_prices, status=status.HTTP_200_OK)
+        return Response(result, status=status.HTTP_200_OK)
 
 
+@conditional_on_prices(default_market='national')
 class PriceTrendView(APIView):
     """
     GET /api/v1/market/prices/trend/
@@ -99,8 +225,15 @@ class PriceTrendView(APIView):
     - crop: Crop name
     - market: Market name (default: national)
     - days: Number of days to analyze (default: 30)
+    - max_points: Downsample the returned series to this many points (optional)
+    - resolution: daily, weekly or monthly (default: by range length)
+    - format: 'columnar' to return prices as parallel arrays
+    
+    Long ranges are summarized from the weekly/monthly rollups.
+    Supports conditional GET (ETag / Last-Modified).
     """
     permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = columnar_renderers()
     
     def get(self, request):
         crop = request.query_params.get('crop')
@@ -110,62 +243,130 @@ class PriceTrendView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         market = request.query_params.get('market', 'national')
+        columnar = is_columnar(request)
         days = int(request.query_params.get('days', 30))
+        max_points = request.query_params.get('max_points')
+        try:
+            max_points = max(int(max_points), MIN_POINTS) if max_points else None
+        except ValueError:
+            return Response({
+                'error': 'max_points must be an integer'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
         date_to = date.today()
         date_from = date_to - timedelta(days=days)
-        
-        # Get prices
-        prices = MarketPrice.objects.filter(
-            crop=crop,
-            market=market,
-            date__gte=date_from,
-            date__lte=date_to
-        ).order_by('date')
-        
-        if not prices.exists():
+        resolution = request.query_params.get('resolution') or resolution_for_range(days)
+        
+        def compute():
+            result = None
+            if resolution in ROLLUP_MODELS:
+                result = rollup_trend(
+                    crop, market, date_from, date_to, resolution,
+                    max_points=max_points, columnar=columnar
+                )
+            if result is None:
+                result = price_trend(
+                    crop, market, date_from, date_to,
+                    max_points=max_points, columnar=columnar
+                )
+            return result
+        
+        result = cached('trend', crop, market, (days, max_points, resolution, columnar, date_to), compute)
+        
+        if result is None:
             return Response({
                 'error': f'No price data found for {crop} in {market}'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        # Calculate statistics
-        price_values = [float(p.price_per_kg) for p in prices]
-        avg_price = statistics.mean(price_values)
-        min_price = min(price_values)
-        max_price = max(price_values)
-        
-        # Determine trend (compare first half vs second half)
-        mid_point = len(price_values) // 2
-        first_half_avg = statistics.mean(price_values[:mid_point]) if mid_point > 0 else avg_price
-        second_half_avg = statistics.mean(price_values[mid_point:]) if mid_point > 0 else avg_price
-        
-        if second_half_avg > first_half_avg * 1.05:  # 5% increase
-            trend = 'rising'
-        elif second_half_avg < first_half_avg * 0.95:  # 5% decrease
-            trend = 'falling'
-        else:
-            trend = 'stable'
+        return Response(result, status=status.HTTP_200_OK)
+
+
+class PriceTrendBatchView(APIView):
+    """
+    POST /api/v1/market/prices/trends/
+    Trend analysis for several crop/market series in one request
+    
+    Body:
+    {
+        "series": [
+            {"crop": "Maize", "market": "nairobi", "days": 30},
+            ["Beans", "national", 90]
+        ],
+        "max_points": 100  (optional)
+    }
+    
+    Each entry has the same shape as /prices/trend/, in request order.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_series = 50
+    max_days = 3650
+    
+    def post(self, request):
+        entries = request.data.get('series') if isinstance(request.data, dict) else request.data
+        if not isinstance(entries, list) or not entries:
+            return Response({
+                'error': 'series must be a non-empty list'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Format response
-        price_data = [{
-            'date': p.date,
-            'price': str(p.price_per_kg)
-        } for p in prices]
+        if len(entries) > self.max_series:
+            return Response({
+                'error': f'Too many series. Maximum is {self.max_series} per request.'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        result = {
-            'crop': crop,
-            'market': market,
-            'date_from': date_from,
-            'date_to': date_to,
-            'prices': price_data,
-            'average_price': round(avg_price, 2),
-            'min_price': round(min_price, 2),
-            'max_price': round(max_price, 2),
-            'trend': trend,
-            'data_points': len(price_values)
-        }
+        series = []
+        for entry in entries:
+            if isinstance(entry, dict):
+                crop, market, days = entry.get('crop'), entry.get('market'), entry.get('days')
+            elif isinstance(entry, list) and 1 <= len(entry) <= 3:
+                crop, market, days = (list(entry) + [None, None])[:3]
+            else:
+                crop = None
+            
+            if not crop:
+                return Response({
+                    'error': 'Each series needs a crop'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            try:
+                days = int(days or 30)
+            except (TypeError, ValueError):
+                return Response({
+                    'error': f'Invalid days for {crop}'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            series.append((crop, market or 'national', min(max(days, 1), self.max_days)))
         
-        return Response(result, status=status.HTTP_200_OK)
+        max_points = request.data.get('max_points') if isinstance(request.data, dict) else None
+        try:
+            max_points = max(int(max_points), MIN_POINTS) if max_points else None
+        except (TypeError, ValueError):
+            return Response({
+                'error': 'max_points must be an integer'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        results = price_trends(series, date.today(), max_points=max_points)
+        
+        return Response(results, status=status.HTTP_200_OK)
+
+
+class MarketSpreadsView(APIView):
+    """
+    GET /api/v1/market/spreads/
+    Compare the latest prices across markets
+    
+    Query params:
+    - crop: Limit to one crop (optional)
+    
+    Per crop: prices by market, pairwise spreads, best (highest) and
+    cheapest regional market, the widest buy/sell spread and z-scores of
+    regional prices against the national average. Cached until the next
+    price ingest.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        crop = request.query_params.get('crop')
+        return Response(market_spreads(crop), status=status.HTTP_200_OK)
 
 
 class PriceAlertListCreateView(generics.ListCreateAPIView):
@@ -179,7 +380,9 @@ class PriceAlertListCreateView(generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return PriceAlert.objects.filter(user=self.request.user)
+        return with_current_price(
+            PriceAlert.objects.filter(user=self.request.user).select_related('user')
+        )
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -206,7 +409,14 @@ class PriceForecastView(APIView):
     Query params:
     - crop: Crop name (required)
     - market: Market name (default: national)
-    - days: Days ahead to forecast (default: 7, max: 30)
+    - days: Days ahead to forecast (default: 7, min: 1, max: 30)
+    - model: average (alias moving_average), linear or exp_smoothing
+      (default: average)
+    
+    Reads forecasts precomputed by `manage.py generate_price_forecasts`.
+    When they are missing, cover fewer days than asked for, or are older
+    than today's run or the latest price change, the series is fitted in
+    memory for the response instead; the GET never writes forecasts.
     """
     permission_classes = [permissions.IsAuthenticated]
     
@@ -218,61 +428,80 @@ class PriceForecastView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         market = request.query_params.get('market', 'national')
-        days_ahead = min(int(request.query_params.get('days', 7)), 30)
+        try:
+            days_ahead = min(int(request.query_params.get('days', 7)), 30)
+        except ValueError:
+            return Response({
+                'error': 'days must be an integer'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if days_ahead < 1:
+            return Response({
+                'error': 'days must be at least 1'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        model = request.query_params.get('model', 'average')
+        if model == API_MODEL_NAMES['average']:
+            model = 'average'
         
-        # Get historical prices (last 30 days)
-        date_to = date.today()
-        date_from = date_to - timedelta(days=30)
+        if model not in FORECAST_MODELS:
+            return Response({
+                'error': f'model must be one of: {", ".join(FORECAST_MODELS)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        historical_prices = MarketPrice.objects.filter(
-            crop=crop,
-            market=market,
-            date__gte=date_from
-        ).order_by('date')
+        today = date.today()
+        payload = cached(
+            'forecast', crop, market, (days_ahead, model, today),
+            lambda: self.forecast_payload(crop, market, model, days_ahead, today)
+        )
         
-        if historical_prices.count() < 3:
+        if payload is None:
             return Response({
                 'error': f'Insufficient data for {crop} forecast. Need at least 3 data points.'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Simple moving average forecast
-        price_values = [float(p.price_per_kg) for p in historical_prices]
-        avg_price = statistics.mean(price_values)
-        
-        # Calculate trend
-        if len(price_values) >= 7:
-            recent_avg = statistics.mean(price_values[-7:])
-            overall_avg = statistics.mean(price_values)
-            trend_factor = recent_avg / overall_avg if overall_avg > 0 else 1.0
+        return Response(payload, status=status.HTTP_200_OK)
+    
+    def forecast_payload(self, crop, market, model, days_ahead, today):
+        stored = list(PriceForecast.objects.filter(
+            crop=crop,
+            market=market,
+            model_used=model,
+            forecast_date__gt=today,
+            forecast_date__lte=today + timedelta(days=days_ahead)
+        ).order_by('forecast_date'))
+        
+        if forecasts_current(stored, crop, market, days_ahead, today):
+            forecasts = [
+                (forecast.forecast_date, float(forecast.predicted_price), float(forecast.confidence))
+                for forecast in stored
+            ]
+            generated_at = max(forecast.generated_at for forecast in stored)
         else:
-            trend_factor = 1.0
+            # Missing, partial or stale: fit in memory; the daily job owns the stored rows
+            forecasts = forecast_series(crop, market, model, days_ahead, end_date=today)
+            generated_at = timezone.now()
         
-        # Generate forecasts
-        forecasts = []
-        for i in range(1, days_ahead + 1):
-            forecast_date = date_to + timedelta(days=i)
-            
-            # Simple forecast: average * trend factor with slight decay
-            predicted_price = avg_price * (trend_factor ** (0.9 ** i))
-            
-            # Confidence decreases with days ahead
-            confidence = max(100 - (i * 3), 50)  # 97% to 50%
-            
-            forecasts.append({
-                'date': forecast_date,
-                'predicted_price': round(predicted_price, 2),
-                'confidence': confidence,
-                'model': 'moving_average'
-            })
+        if not forecasts:
+            return None
         
-        return Response({
+        # Historical average (last 30 days)
+        avg_price = MarketPrice.objects.filter(
+            crop=crop,
+            market=market,
+            date__gte=today - timedelta(days=30)
+        ).aggregate(Avg('price_per_kg'))['price_per_kg__avg'] or 0
+        
+        return {
             'crop': crop,
             'market': market,
-            'historical_avg': round(avg_price, 2),
-            'trend_factor': round(trend_factor, 3),
-            'forecasts': forecasts,
-            'generated_at': timezone.now()
-        }, status=status.HTTP_200_OK)
+            'historical_avg': round(float(avg_price), 2),
+            'forecasts': [{
+                'date': forecast_date,
+                'predicted_price': predicted_price,
+                'confidence': confidence,
+                'model': API_MODEL_NAMES.get(model, model)
+            } for forecast_date, predicted_price, confidence in forecasts],
+            'generated_at': generated_at
+        }
 
 
 class BestTimeToSellView(APIView):
@@ -294,66 +523,53 @@ class BestTimeToSellView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         market = request.query_params.get('market', 'national')
+        advice = cached(
+            'best_time_to_sell', crop, market, (date.today(),),
+            lambda: sell_recommendations([crop], market)[crop]
+        )
         
-        # Get current price
-        current_price_obj = MarketPrice.objects.filter(
-            crop=crop,
-            market=market
-        ).order_by('-date').first()
-        
-        if not current_price_obj:
+        if advice is None:
             return Response({
                 'error': f'No current price data for {crop}'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        current_price = float(current_price_obj.price_per_kg)
-        
-        # Get forecasts (30 days ahead)
-        date_from = date.today() - timedelta(days=30)
-        historical = MarketPrice.objects.filter(
-            crop=crop,
-            market=market,
-            date__gte=date_from
-        )
-        
-        if historical.count() < 3:
+        return Response(advice, status=status.HTTP_200_OK)
+
+
+class SellAdviceView(APIView):
+    """
+    GET /api/v1/market/sell-advice/
+    Sell/wait advice for every crop on the user's farm
+    
+    Query params:
+    - market: Market name (default: national)
+    
+    Crops come from the farm profile plus recent harvests. Recent harvest
+    quantities are valued at the current price as unsold stock.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        try:
+            farm = request.user.farm_profile
+        except FarmProfile.DoesNotExist:
             return Response({
-                'recommendation': 'sell_now',
-                'reason': 'Insufficient data for forecast. Current price is available.',
-                'current_price': current_price,
-                'confidence': 'low'
-            }, status=status.HTTP_200_OK)
-        
-        # Simple forecast logic
-        prices = [float(p.price_per_kg) for p in historical.order_by('date')]
-        avg_price = statistics.mean(prices)
-        recent_avg = statistics.mean(prices[-7:]) if len(prices) >= 7 else avg_price
-        
-        # Decision logic
-        if recent_avg > avg_price * 1.1:  # Prices rising strongly
-            recommendation = 'wait'
-            reason = 'Prices are trending upward. Consider waiting a few days for better rates.'
-            confidence = 'medium'
-        elif current_price > avg_price * 1.05:  # Above average
-            recommendation = 'sell_now'
-            reason = 'Current price is above average. Good time to sell.'
-            confidence = 'high'
-        elif recent_avg < avg_price * 0.9:  # Prices falling
-            recommendation = 'sell_now'
-            reason = 'Prices are declining. Sell now to avoid further losses.'
-            confidence = 'medium'
-        else:
-            recommendation = 'sell_now'
-            reason = 'Price is stable. Good time to sell.'
-            confidence = 'medium'
+                'error': 'Farm profile not found'
+            }, status=status.HTTP_404_NOT_FOUND)
         
-        return Response({
-            'crop': crop,
-            'market': market,
-            'recommendation': recommendation,
-            'reason': reason,
-            'confidence': confidence,
-            'current_price': current_price,
-            'average_price': round(avg_price, 2),
-            'recent_trend': 'rising' if recent_avg > avg_price else 'falling'
-        }, status=status.HTTP_200_OK)
+        market = request.query_params.get('market', 'national')
+        return Response(portfolio_advice(farm, market), status=status.HTTP_200_OK)
+
+
+class AnalyticsCacheStatsView(APIView):
+    """
+    GET /api/v1/market/cache-stats/
+    Hit/miss counters of the market analytics cache (admin only)
+    
+    Counters are per process with the local backend and fleet-wide
+    with the Redis backend.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get(self, request):
+        return Response(analytics_cache().stats(), status=status.HTTP_200_OK)